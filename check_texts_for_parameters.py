@@ -1,16 +1,8 @@
 import re
 from pathlib import Path
 
-params_patterns = [
-    # Kd = 10 nM / Kd < 10 nM / Kd > 10 nM
-    ("classic", r"(?P<param>Kd|IC50|Ki|C50)\s*[=<>]?\s*(?P<value>\d+\.?\d*)\s*(?P<unit>nM|μM|mM)"),
-    # Kd (10 nM)
-    ("brackets", r"(?P<param>Kd|IC50|Ki|C50)\s*\(\s*(?P<value>\d+\.?\d*)\s*(?P<unit>nM|μM|mM)\s*\)"),
-    # Kd: 10 nM / Kd, 10 nM
-    ("colon_or_comma", r"(?P<param>Kd|IC50|Ki|C50)\s*[:|,]\s*(?P<value>\d+\.?\d*)\s*(?P<unit>nM|μM|mM)"),
-    # 10 nM
-    ("value_only", r"(?P<value>\d+\.?\d*)\s*(?P<unit>nM|μM|mM)")
-]
+from src.processing.prefilter import params_patterns
+
 
 def extract_params(text: str):
     any_found = False
@@ -20,6 +20,7 @@ from src.constants.general import (
 from src.constants.processing import PATENTS_PER_BATCH
 from src.utils import logger, cut_str
 from src.filtering import PatentsRegistry
+from src.storage import document_name, get_default_corpus_store
 
 current_results = None
 processing_status = {"status": "idle", "progress": 0, "message": ""}
@@ -59,19 +60,15 @@ def run_in_thread(func, *args, **kwargs):
 
 
 def get_project_stats():
-    stats = {
-        "patents_count": len(list(PATENTS_DIR.glob("*.pdf")))
-        if PATENTS_DIR.exists()
-        else 0,
-        "processed_files": len(list(RESULTS_INTERMEDIATE_DIR.glob("*.pkl")))
-        if RESULTS_INTERMEDIATE_DIR.exists()
-        else 0,
-        "final_results": len(list(RESULTS_FINAL_DIR.glob("*.csv")))
-        if RESULTS_FINAL_DIR.exists()
-        else 0,
+    # Хранилище корпуса при открытии импортирует результаты, сохраненные до его появления
+    store = get_default_corpus_store()
+    corpus = store.stats()
+    return {
+        "patents_count": corpus["patents"],
+        "processed_files": corpus["processed"],
+        "final_results": len(store.list_results()),
         "api_key_configured": bool(USPT_API_KEY),
     }
-    return stats
 
 
 def format_stats_display(stats):
@@ -113,6 +110,7 @@ def download_patents(count: int, query: str = "protein binding"):
                     patent_id=patent.id, path=PATENTS_DIR, filename=f"US{patent.id}B2"
                 )
                 downloaded += 1
+                get_default_corpus_store().add_patents([PATENTS_DIR / f"US{patent.id}B2.pdf"])
             except Exception as e:
                 logger.error(f"Ошибка скачивания патента {patent.id}: {e}")
                 continue
@@ -266,25 +264,16 @@ def run_full_pipeline():
 
 
 def get_results_list():
-    if not RESULTS_FINAL_DIR.exists():
-        return []
-
-    results = []
-    for csv_file in RESULTS_FINAL_DIR.glob("*.csv"):
-        try:
-            df = pd.read_csv(csv_file)
-            results.append(
-                {
-                    "filename": csv_file.name,
-                    "path": str(csv_file),
-                    "rows": len(df),
-                    "interactions": len(df[df["ligand"] != ""]),
-                }
-            )
-        except Exception as e:
-            logger.error(f"Ошибка чтения {csv_file}: {e}")
-
-    return results
+    # Документы, результаты которых есть в хранилище корпуса
+    return [
+        {
+            "name": result["name"],
+            "filename": f"{result['name']}.txt.csv",
+            "path": str(RESULTS_FINAL_DIR / f"{result['name']}.txt.csv"),
+            "interactions": result["interactions"],
+        }
+        for result in get_default_corpus_store().list_results()
+    ]
 
 
 def load_result_file(filename):
@@ -292,8 +281,12 @@ def load_result_file(filename):
         return None, "Выберите файл для просмотра"
 
     try:
-        file_path = RESULTS_FINAL_DIR / filename
-        df = pd.read_csv(file_path)
+        store = get_default_corpus_store()
+        name = document_name(filename)
+        if store.get_status(name) is not None and (rows := store.get_interactions(name)):
+            df = pd.DataFrame(rows).drop(columns="source")
+        else:
+            df = pd.read_csv(RESULTS_FINAL_DIR / filename)
 
         df_filtered = df[df["ligand"] != ""].copy()
 
@@ -319,8 +312,13 @@ def export_combined_results():
 
         combined_df = pd.DataFrame()
 
+        store = get_default_corpus_store()
         for result in results:
-            df = pd.read_csv(result["path"])
+            if not result["interactions"]:
+                continue
+            df = pd.DataFrame(store.get_interactions(result["name"])).drop(
+                columns="source", errors="ignore"
+            )
             df["source_file"] = result["filename"]
             combined_df = pd.concat([combined_df, df], ignore_index=True)
 
@@ -418,8 +416,13 @@ def create_combined_export():
 
         combined_df = pd.DataFrame()
 
+        store = get_default_corpus_store()
         for result in results:
-            df = pd.read_csv(result["path"])
+            if not result["interactions"]:
+                continue
+            df = pd.DataFrame(store.get_interactions(result["name"])).drop(
+                columns="source", errors="ignore"
+            )
             df["source_file"] = result["filename"]
             combined_df = pd.concat([combined_df, df], ignore_index=True)
 
@@ -444,6 +447,25 @@ def create_combined_export():
         return gr.File(visible=False), f"Ошибка экспорта: {str(e)}"
 
 
+def search_corpus_pages(query: str, limit: int = 50):
+    if not query or not query.strip():
+        return None, "Введите поисковый запрос"
+
+    try:
+        pages = get_default_corpus_store().search_pages(query, limit=int(limit))
+    except Exception as e:
+        logger.error(f"Ошибка поиска по корпусу: {e}")
+        return None, f"Ошибка поиска: {str(e)}"
+
+    if not pages:
+        return None, f"По запросу «{query}» страниц не найдено"
+
+    df = pd.DataFrame(pages, columns=["name", "page_number", "snippet"])
+    df.columns = ["Патент", "Страница", "Фрагмент"]
+    documents = df["Патент"].nunique()
+    return df, f"Найдено страниц: {len(df)} в {documents} патентах"
+
+
 with gr.Blocks(title="Longevity Project - AI Platform", theme=Soft()) as demo:
     gr.Markdown(""" 
     **Платформа для извлечения данных о связывании лигандов с белками из патентов**
@@ -451,6 +473,7 @@ with gr.Blocks(title="Longevity Project - AI Platform", theme=Soft()) as demo:
     Используйте вкладки ниже для различных операций:
     - **Обработка текста** - анализ отдельных текстов
     - **Управление патентами** - скачивание и обработка патентов USPTO  
+    - **Поиск по корпусу** - поиск страниц патентов по тексту
     - **Результаты** - просмотр и экспорт результатов
     """)
 
@@ -541,6 +564,27 @@ with gr.Blocks(title="Longevity Project - AI Platform", theme=Soft()) as demo:
                 label="Результат выполнения пайплайна", lines=5, interactive=False
             )
 
+        with gr.TabItem("Поиск по корпусу"):
+            gr.Markdown("### Поиск страниц извлеченных патентов")
+            gr.Markdown(
+                "Страница находится, если на ней встречаются все слова запроса "
+                "(например, `CDK9 IC50`)"
+            )
+
+            with gr.Row():
+                search_query = gr.Textbox(
+                    label="Поисковый запрос", placeholder="CDK9 IC50", scale=4
+                )
+                search_limit = gr.Number(
+                    label="Максимум страниц", value=50, precision=0, scale=1
+                )
+                search_btn = gr.Button("Найти", variant="primary", scale=1)
+
+            search_info = gr.Markdown("")
+            search_results = gr.Dataframe(
+                label="Найденные страницы", interactive=False, wrap=True
+            )
+
         with gr.TabItem("Результаты"):
             gr.Markdown("### Просмотр результатов")
 
@@ -607,6 +651,17 @@ with gr.Blocks(title="Longevity Project - AI Platform", theme=Soft()) as demo:
 
     pipeline_btn.click(run_full_pipeline, outputs=pipeline_output)
 
+    search_btn.click(
+        search_corpus_pages,
+        inputs=[search_query, search_limit],
+        outputs=[search_results, search_info],
+    )
+    search_query.submit(
+        search_corpus_pages,
+        inputs=[search_query, search_limit],
+        outputs=[search_results, search_info],
+    )
+
     refresh_stats_btn.click(
         lambda: format_stats_display(get_project_stats()), outputs=stats_display
     )
@@ -1,8 +1,28 @@
+import argparse
+import sys
 from pathlib import Path
-from src.orchestration import create_patent_orchestrator
+from src.orchestration import Shard, create_patent_orchestrator, run_shards
 from src.constants import PATENTS_PER_BATCH
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Обработка патентов")
+    parser.add_argument(
+        "--shards", type=int, default=1,
+        help="Количество процессов, между которыми делится корпус",
+    )
+    parser.add_argument(
+        "--shard-index", type=int, default=None,
+        help="Номер шарда, обрабатываемого процессом (без него запускаются процессы всех шардов)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    orchestrator = create_patent_orchestrator(patent_per_batch=PATENTS_PER_BATCH)
-    orchestrator.run(initial_context={"documents_path": Path("patents")})
\ No newline at end of file
+    args = parse_args()
+    if args.shards > 1 and args.shard_index is None:
+        sys.exit(run_shards(args.shards, [sys.executable, str(Path(__file__).resolve())]))
+
+    shard = Shard(args.shards, args.shard_index) if args.shard_index is not None else None
+    orchestrator = create_patent_orchestrator(patent_per_batch=PATENTS_PER_BATCH, shard=shard)
+    orchestrator.run(initial_context={"documents_path": Path("patents")})
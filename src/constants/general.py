@@ -15,9 +15,15 @@ RESULTS_DIR = PROJECT_DIR / "results"
 RESULTS_RAW_DIR = RESULTS_DIR / "raw"
 RESULTS_INTERMEDIATE_DIR = RESULTS_DIR / "intermediate"
 RESULTS_FINAL_DIR = RESULTS_DIR / "final"
+# Хранилище корпуса: патенты, страницы, метаданные извлечения и взаимодействия
+CORPUS_DB_FILE = RESULTS_DIR / "corpus.sqlite"
 
 DATA_DIR = PROJECT_DIR / "data"
 
+CACHE_DIR = PROJECT_DIR / "cache"
+LLM_CACHE_FILE = CACHE_DIR / "llm_responses.sqlite"
+OCR_CACHE_FILE = CACHE_DIR / "ocr_pages.sqlite"
+
 # Logging
 LOGS_DIR = PROJECT_DIR / "logs"
 TERMINAL_LOGGING_LEVEL = "INFO"
@@ -25,5 +31,11 @@ FILE_LOGGING_LEVEL = "DEBUG"
 
 # LLM
 LLAMA_API_ENDPOINT = os.getenv("LLAMA_API_ENDPOINT")
+# Игнорировать сохраненные ответы LLM (ответы при этом перезаписываются в кэш)
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+# OCR
+# Игнорировать сохраненные результаты OCR страниц (результаты при этом перезаписываются в кэш)
+OCR_CACHE_BYPASS = os.getenv("OCR_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
 
 
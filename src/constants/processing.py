@@ -1,7 +1,21 @@
 # Настройка обработки текста
-PAGES_LIMIT = 50
+PAGES_LIMIT = 50  # PDF длиннее этого значения извлекаются окнами по PAGES_LIMIT страниц
 PAGE_DIVIDER = "=== СТРАНИЦА %NUM% ==="
+OCR_CACHE_MAX_ENTRIES = 500_000  # Максимальное число страниц в кэше OCR
+OCR_CACHE_MAX_SIZE_MB = 1024  # Максимальный суммарный размер сжатого текста страниц в кэше OCR
+
+# Настройка обработки текста LLM
+LLM_MAX_CONCURRENCY = 4  # Максимальное число страниц, одновременно обрабатываемых LLM
+LLM_CACHE_MAX_ENTRIES = 200_000  # Максимальное число ответов LLM в кэше
+LLM_CACHE_MAX_SIZE_MB = 1024  # Максимальный суммарный размер ответов LLM в кэше
+SEARCHER_BATCH_SIZE = 4  # Количество страниц в одном запросе к агенту-поиска
+SEARCHER_BATCH_MAX_SYMBOLS = 4000  # Страницы длиннее этого значения классифицируются по одной
+PAGES_FSYNC_BATCH = 16  # Количество результатов страниц, которые сбрасываются на диск одним пакетом
 
 # Настройка обработки патентов
 PATENTS_PER_BATCH = 25
+# Потоковый режим (скачивание -> извлечение текста -> LLM -> сохранение)
+DOWNLOAD_WORKERS = 4  # Количество патентов, одновременно скачиваемых с USPTO
+OCR_WORKERS = 1  # Количество одновременно распознаваемых документов (страницы документа распознаются пулом процессов)
+SAVE_FSYNC_BATCH = 16  # Количество документов, результаты которых сбрасываются на диск одним пакетом
 DEFAULT_YEAR_RANGE = "1999"
\ No newline at end of file
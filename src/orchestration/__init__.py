@@ -4,8 +4,13 @@
 Публичные функции:
 - create_patent_orchestrator: Создает оркестратор для обработки патентов
 - create_document_orchestrator: Создает оркестратор для обработки документов
+- run_shards: Запускает процессы обработки для всех шардов корпуса
+
+Публичные классы:
+- Shard: Часть корпуса, обрабатываемая одним процессом
 """
 
 from .orchestrator import create_patent_orchestrator, create_document_orchestrator
+from .sharding import Shard, run_shards
 
-__all__ = ["create_patent_orchestrator", "create_document_orchestrator"]
\ No newline at end of file
+__all__ = ["create_patent_orchestrator", "create_document_orchestrator", "Shard", "run_shards"]
\ No newline at end of file
@@ -1,13 +1,21 @@
-# src/orchestration/checkpoint.py
+import dataclasses
+import importlib
+import json
+import os
 import pickle
+import shutil
+import uuid
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from datetime import datetime
 
+from src.processing.txt_reader import TxtDocument
+from src.utils import logger
+
 class CheckpointData:
     """
     Структура данных чекпоинта
-    
+
     Args:
         last_completed_step: Имя последнего завершенного шага
         context: Контекст выполнения
@@ -18,95 +26,308 @@ class CheckpointData:
         self.context = context
         self.timestamp = timestamp or datetime.now()
 
+
+@dataclasses.dataclass
+class _JournalState:
+    """
+    Состояние, восстановленное из журнала
+
+    last_step : имя последнего завершенного шага
+    context   : закодированный контекст последнего завершенного шага
+    timestamp : время завершения последнего шага
+    documents : документы, обработанные каждым шагом (по именам шагов)
+    """
+
+    last_step: str | None = None
+    context: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    timestamp: datetime | None = None
+    documents: Dict[str, set[str]] = dataclasses.field(default_factory=dict)
+
+
 class CheckpointManager:
     """
-    Менеджер чекпоинтов для оркестратора
-    
+    Менеджер чекпоинтов для оркестратора.
+
+    Чекпоинты хранятся в журнале JSONL, в который только дописываются
+    небольшие записи: завершение шага с его контекстом и завершение
+    обработки документа шагом. Журнал читается один раз, дальше состояние
+    обновляется в памяти, поэтому восстановление выполняется за O(записей),
+    а запись чекпоинта не зависит от размера корпуса. Большие объекты
+    контекста сохраняются ссылками: TxtDocument - путем к .txt, прочие
+    объекты, которые нельзя записать в JSON, - путем к pickle файлу
+    в директории <checkpoint_file>.objects.
+
     Args:
-        checkpoint_file: Путь к файлу чекпоинтов
+        checkpoint_file: Путь к файлу журнала
     """
     def __init__(self, checkpoint_file: Path):
         self.checkpoint_file = checkpoint_file
-        
+        self.objects_dir = checkpoint_file.with_suffix(".objects")
+        self._state: _JournalState | None = None
+
+    @property
+    def state(self) -> _JournalState:
+        """Состояние журнала (журнал читается при первом обращении)"""
+        if self._state is None:
+            self._state = self._replay()
+        return self._state
+
+    def _replay(self) -> _JournalState:
+        state = _JournalState()
+        if not self.checkpoint_file.exists():
+            return state
+
+        with open(self.checkpoint_file, "rb") as f:
+            head = f.read(1)
+            f.seek(0)
+            if head and head != b"{":
+                legacy = True
+            else:
+                legacy = False
+                size, partial_tail, missing_newline = 0, False, False
+                for line_num, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Неполная запись в конце журнала (процесс завершился во время записи)
+                        logger.warning(f"Пропуск поврежденной записи {line_num} журнала {self.checkpoint_file}")
+                        partial_tail = not line.endswith(b"\n")
+                        if not partial_tail:
+                            size += len(line)
+                        continue
+                    self._apply(state, record)
+                    size += len(line)
+                    missing_newline = not line.endswith(b"\n")
+
+        if legacy:
+            return self._migrate_legacy()
+        # Следующая запись журнала не должна дописываться к последней строке
+        if partial_tail:
+            os.truncate(self.checkpoint_file, size)
+        elif missing_newline:
+            with open(self.checkpoint_file, "a", encoding="utf-8") as f:
+                f.write("\n")
+        return state
+
+    def _migrate_legacy(self) -> _JournalState:
+        """Заменяет чекпоинт в прежнем формате (pickle CheckpointData) журналом"""
+        try:
+            with open(self.checkpoint_file, "rb") as f:
+                checkpoint = pickle.load(f)
+        except (pickle.PickleError, EOFError, AttributeError, ImportError):
+            # Если файл поврежден, начинаем с пустого состояния
+            checkpoint = None
+
+        self.checkpoint_file.unlink()
+        state = _JournalState()
+        if checkpoint is not None:
+            record = {
+                "type": "step",
+                "step": checkpoint.last_completed_step,
+                "context": self._encode(checkpoint.context or {}),
+                "timestamp": checkpoint.timestamp.isoformat(),
+            }
+            self._write_lines([record])
+            self._apply(state, record)
+        return state
+
+    @staticmethod
+    def _apply(state: _JournalState, record: Dict[str, Any]) -> None:
+        if record["type"] == "step":
+            state.last_step = record["step"]
+            state.context = record["context"]
+            state.timestamp = datetime.fromisoformat(record["timestamp"])
+        elif record["type"] == "document":
+            state.documents.setdefault(record["step"], set()).add(record["document"])
+
+    def _append(self, *records: Dict[str, Any]) -> None:
+        """Дописывает записи в журнал одной записью на диск и применяет их к состоянию"""
+        state = self.state
+        self._write_lines(records)
+        for record in records:
+            self._apply(state, record)
+
+    def _write_lines(self, records: Iterable[Dict[str, Any]]) -> None:
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.checkpoint_file, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _store_object(self, value: Any) -> str:
+        """Сохраняет объект в pickle файл и возвращает путь к нему"""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        path = self.objects_dir / f"{uuid.uuid4().hex}.pkl"
+        with open(path, "wb") as f:
+            pickle.dump(value, f)
+        return str(path)
+
+    def _encode(self, value: Any) -> Any:
+        """Кодирует значение контекста в JSON (большие объекты - ссылками)"""
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, Path):
+            return {"$path": str(value)}
+        if isinstance(value, TxtDocument):
+            return {"$txt": str(value.path)}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(item) for item in value]
+        if isinstance(value, dict) and all(
+            isinstance(key, str) and not key.startswith("$") for key in value
+        ):
+            return {key: self._encode(item) for key, item in value.items()}
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            cls = type(value)
+            fields = {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+            if all(_is_plain(item) for item in fields.values()):
+                return {
+                    "$dataclass": f"{cls.__module__}:{cls.__qualname__}",
+                    "fields": self._encode(fields),
+                }
+        return {"$pickle": self._store_object(value)}
+
+    def _decode(self, value: Any) -> Any:
+        """Восстанавливает значение контекста, закодированное _encode"""
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if "$path" in value:
+            return Path(value["$path"])
+        if "$txt" in value:
+            return TxtDocument(Path(value["$txt"]), lazy=True)
+        if "$dataclass" in value:
+            module, name = value["$dataclass"].split(":")
+            cls = getattr(importlib.import_module(module), name)
+            return cls(**self._decode(value["fields"]))
+        if "$pickle" in value:
+            with open(value["$pickle"], "rb") as f:
+                return pickle.load(f)
+        return {key: self._decode(item) for key, item in value.items()}
+
     def save_checkpoint(self, last_completed_step: str, context: Dict[str, Any] | None = None) -> None:
         """
-        Сохраняет состояние выполнения с использованием pickle
-        
+        Записывает в журнал завершение шага и его контекст
+
         Args:
             last_completed_step: Имя последнего завершенного шага
             context: Контекст выполнения
         """
-        checkpoint_data = CheckpointData(
-            last_completed_step=last_completed_step,
-            context=context or {},
-            timestamp=datetime.now()
-        )
-        
-        # Создаем директорию если не существует
-        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Сохраняем с использованием pickle
-        with open(self.checkpoint_file, 'wb') as f:
-            pickle.dump(checkpoint_data, f)
-            
+        self._append({
+            "type": "step",
+            "step": last_completed_step,
+            "context": self._encode(context or {}),
+            "timestamp": datetime.now().isoformat(),
+        })
+
+    def record_document(self, step_name: str, document: str) -> None:
+        """
+        Записывает в журнал завершение обработки документа шагом
+
+        Args:
+            step_name: Имя шага
+            document: Имя документа
+        """
+        self.record_documents(step_name, [document])
+
+    def record_documents(self, step_name: str, documents: list[str]) -> None:
+        """
+        Записывает в журнал завершение обработки нескольких документов шагом
+        (одна запись на диск и один fsync для всех документов)
+
+        Args:
+            step_name: Имя шага
+            documents: Имена документов
+        """
+        if not documents:
+            return
+        timestamp = datetime.now().isoformat()
+        self._append(*(
+            {"type": "document", "step": step_name, "document": document, "timestamp": timestamp}
+            for document in documents
+        ))
+
+    def completed_documents(self, step_name: str) -> set[str]:
+        """
+        Возвращает документы, обработку которых шаг уже завершил
+
+        Args:
+            step_name: Имя шага
+
+        Returns:
+            set[str]: Имена документов
+        """
+        return set(self.state.documents.get(step_name, {}))
+
     def load_checkpoint(self) -> Optional[CheckpointData]:
         """
-        Загружает сохраненное состояние из pickle
-        
+        Восстанавливает последний чекпоинт из журнала
+
         Returns:
-            Optional[CheckpointData]: Сохраненные данные или None, если файл не существует
+            Optional[CheckpointData]: Сохраненные данные или None, если ни один шаг не завершен
         """
-        if not self.checkpoint_file.exists():
+        state = self.state
+        if state.last_step is None:
             return None
-            
+
         try:
-            with open(self.checkpoint_file, 'rb') as f:
-                return pickle.load(f)
-        except (pickle.PickleError, FileNotFoundError, EOFError):
-            # Если файл поврежден, возвращаем None
+            context = self._decode(state.context)
+        except (OSError, pickle.PickleError, EOFError, ImportError, AttributeError, TypeError) as e:
+            # Объекты контекста недоступны, шаг выполняется заново
+            logger.warning(f"Не удалось восстановить контекст чекпоинта: {e}")
             return None
-            
+        return CheckpointData(state.last_step, context, state.timestamp)
+
     def should_skip_step(self, step_name: str) -> bool:
         """
         Проверяет, нужно ли пропустить шаг
-        
+
         Args:
             step_name: Имя шага для проверки
-        
+
         Returns:
             bool: True, если шаг нужно пропустить, False в противном случае
         """
-        checkpoint = self.load_checkpoint()
-        if not checkpoint:
-            return False
-        return checkpoint.last_completed_step == step_name
-        
+        return self.state.last_step == step_name
+
     def clear_checkpoint(self) -> None:
         """
-        Очищает чекпоинт после успешного завершения
-        
+        Очищает журнал и сохраненные объекты после успешного завершения
+
         Returns:
             None
         """
         if self.checkpoint_file.exists():
             self.checkpoint_file.unlink()
-            
+        shutil.rmtree(self.objects_dir, ignore_errors=True)
+        self._state = _JournalState()
+
     def get_last_step(self) -> Optional[str]:
         """
         Возвращает имя последнего завершенного шага
-        
+
         Returns:
             Optional[str]: Имя последнего завершенного шага или None, если чекпоинт не существует
         """
-        checkpoint = self.load_checkpoint()
-        return checkpoint.last_completed_step if checkpoint else None
-        
+        return self.state.last_step
+
     def get_saved_context(self) -> Dict[str, Any]:
         """
         Возвращает сохраненный контекст
-        
+
         Returns:
             Dict[str, Any]: Сохраненный контекст или пустой словарь, если чекпоинт не существует
         """
         checkpoint = self.load_checkpoint()
-        return checkpoint.context if checkpoint and checkpoint.context else {}
\ No newline at end of file
+        return checkpoint.context if checkpoint and checkpoint.context else {}
+
+
+def _is_plain(value: Any) -> bool:
+    """Проверяет, что значение записывается в JSON без pickle (поля dataclass)"""
+    if value is None or isinstance(value, (bool, int, float, str, Path, TxtDocument)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_plain(item) for key, item in value.items())
+    return False
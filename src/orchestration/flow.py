@@ -23,9 +23,47 @@ class Step(ABC):
         checkpoint_manager.save_checkpoint(self.name, context)
 
 class GeneratorStep(Step):
-    """Шаг, который может генерировать промежуточные результаты"""
+    """
+    Шаг, который может генерировать промежуточные результаты.
+
+    Каждый отданный контекст соответствует одному обработанному документу:
+    имя документа хранится в context[document_key], результат - в
+    context[result_key]. Оркестратор записывает завершение документа
+    в журнал чекпоинтов, поэтому после прерывания шаг пропускает
+    обработанные документы (CheckpointManager.completed_documents).
+    """
+
+    document_key = "current_filename"
+    result_key = "current_pipeline_results"
     
     @abstractmethod
     def execute_generator(self, context: Dict[str, Any], checkpoint_manager: CheckpointManager) -> Generator[Dict[str, Any], None, None]:
         """Выполняет шаг и генерирует промежуточные результаты"""
-        pass
\ No newline at end of file
+        pass
+
+    def execute(self, context: Dict[str, Any], checkpoint_manager: CheckpointManager) -> Dict[str, Any]:
+        """Выполняет шаг целиком и возвращает контекст последнего документа"""
+        for updated_context in self.execute_generator(context, checkpoint_manager):
+            context = updated_context
+        return context
+
+
+class SinkStep(Step):
+    """
+    Шаг-приемник: выполняется для каждого контекста, отданного предыдущим
+    GeneratorStep (например, сохраняет результаты каждого документа сразу
+    после обработки), а не один раз после завершения генератора.
+
+    Приемник может откладывать сброс записанных данных на диск: оркестратор
+    вызывает flush, когда should_flush возвращает True, и после последнего
+    документа, и только после этого записывает завершение документов
+    в журнал чекпоинтов.
+    """
+
+    def should_flush(self) -> bool:
+        """Проверяет, нужно ли сбросить записанные данные на диск"""
+        return True
+
+    def flush(self) -> None:
+        """Сбрасывает записанные данные на диск"""
+        pass
@@ -1,7 +1,8 @@
 from typing import List, Dict, Any
 from pathlib import Path
-from src.orchestration.flow import Step, GeneratorStep
+from src.orchestration.flow import Step, GeneratorStep, SinkStep
 from src.orchestration.checkpoint import CheckpointManager
+from src.orchestration.sharding import Shard
 from src.utils import logger
 
 
@@ -9,16 +10,20 @@ class FlexibleOrchestrator:
     def __init__(
         self,
         steps: List[Step],
-        checkpoint_file: Path = Path("checkpoints/orchestrator.pkl"),
+        checkpoint_file: Path = Path("checkpoints/orchestrator.jsonl"),
     ):
         """
         Инициализация оркестратора
 
         Args:
             steps: Список шагов в порядке выполнения.
-            checkpoint_file: Путь к файлу чекпоинтов.
+            checkpoint_file: Путь к журналу чекпоинтов.
         """
         self.steps = steps
+        legacy_file = checkpoint_file.with_suffix(".pkl")
+        if not checkpoint_file.exists() and legacy_file.exists():
+            # Чекпоинт в прежнем формате переводится в журнал при первом чтении
+            legacy_file.rename(checkpoint_file)
         self.checkpoint_manager = CheckpointManager(checkpoint_file)
         self.step_names = [step.name for step in steps]
 
@@ -58,28 +63,38 @@ class FlexibleOrchestrator:
             logger.info(f"Новая обработка ({len(self.steps)} шагов)")
 
         try:
-            for i in range(start_index, len(self.steps)):
+            i = start_index
+            while i < len(self.steps):
                 step = self.steps[i]
-                step_num = i + 1
+                # Приемники после шага-генератора выполняются для каждого его документа
+                sinks: List[SinkStep] = []
+                if isinstance(step, GeneratorStep):
+                    while i + 1 + len(sinks) < len(self.steps) and isinstance(
+                        self.steps[i + 1 + len(sinks)], SinkStep
+                    ):
+                        sinks.append(self.steps[i + 1 + len(sinks)])  # type: ignore[arg-type]
 
-                logger.info(f"Шаг {step_num}/{len(self.steps)}: {step.name}")
+                names = " -> ".join(s.name for s in [step, *sinks])
+                logger.info(f"Шаг {i + 1}/{len(self.steps)}: {names}")
 
                 try:
                     if isinstance(step, GeneratorStep):
-                        for updated_context in step.execute_generator(
-                            context, self.checkpoint_manager
-                        ):
-                            context = updated_context
+                        context = self._run_generator(step, sinks, context)
                     else:
                         context = step.execute(context, self.checkpoint_manager)
+                        if isinstance(step, SinkStep):
+                            step.flush()
 
-                    step.mark_completed(self.checkpoint_manager, context)
+                    for completed in [step, *sinks]:
+                        completed.mark_completed(self.checkpoint_manager, context)
                     logger.success("Шаг завершен")
 
                 except Exception as step_error:
                     logger.error(f"Ошибка на шаге {step.name}: {step_error}")
                     raise
 
+                i += 1 + len(sinks)
+
             self.checkpoint_manager.clear_checkpoint()
             logger.success("Обработка успешно завершена!")
 
@@ -90,6 +105,50 @@ class FlexibleOrchestrator:
             logger.error(f"Критическая ошибка: {e}")
             raise
 
+    def _run_generator(
+        self, step: GeneratorStep, sinks: List[SinkStep], context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Выполняет шаг-генератор и передает каждый отданный им контекст приемникам.
+
+        Завершение документа записывается в журнал чекпоинтов только после того,
+        как приемники сбросили его результаты на диск. Возвращаемый контекст
+        не содержит результата последнего документа, поэтому чекпоинт шага
+        его не сохраняет.
+        """
+        pending: List[str] = []
+
+        def flush() -> None:
+            for sink in sinks:
+                sink.flush()
+            self.checkpoint_manager.record_documents(step.name, pending)
+            pending.clear()
+
+        try:
+            for context in step.execute_generator(context, self.checkpoint_manager):
+                for sink in sinks:
+                    context = sink.execute(context, self.checkpoint_manager)
+
+                document = context.get(step.document_key)
+                if document is None:
+                    continue
+                if not sinks:
+                    self.checkpoint_manager.record_document(step.name, document)
+                    continue
+
+                pending.append(document)
+                if any(sink.should_flush() for sink in sinks):
+                    flush()
+        finally:
+            # Результаты уже обработанных документов сохраняются и при ошибке
+            flush()
+
+        return {
+            key: value
+            for key, value in context.items()
+            if key not in (step.document_key, step.result_key)
+        }
+
     def reset(self) -> None:
         """Сбрасывает весь прогресс"""
         self.checkpoint_manager.clear_checkpoint()
@@ -97,7 +156,10 @@ class FlexibleOrchestrator:
 
 
 def create_patent_orchestrator(
-    patent_per_batch: int = 10, checkpoint_file: Path = Path("checkpoints/patents.pkl")
+    patent_per_batch: int = 10,
+    checkpoint_file: Path = Path("checkpoints/patents.jsonl"),
+    streaming: bool = True,
+    shard: Shard | None = None,
 ) -> FlexibleOrchestrator:
     """
     Создает стандартный оркестратор с полным циклом работы:
@@ -109,54 +171,66 @@ def create_patent_orchestrator(
 
     Args:
         patent_per_batch: Количество патентов для обработки за раз
-        checkpoint_file: Путь к файлу чекпоинтов
+        checkpoint_file: Путь к журналу чекпоинтов
+        streaming: Выполнять стадии потоково (PatentFlowStep): каждый патент
+            скачивается, распознается и обрабатывается LLM независимо
+            от остальных, стадии разных патентов выполняются одновременно,
+            результаты сохраняются по мере обработки документов
+        shard: Обрабатывать только патенты шарда (только в потоковом режиме);
+            журнал чекпоинтов шарда хранится отдельно от журналов других шардов
 
     Returns:
         FlexibleOrchestrator: Стандартный оркестратор с полным циклом работы
     """
-    from src.orchestration.steps import (
-        CheckPatentsStep,
-        ExtractTextsStep,
-        CollectDocumentsStep,
-        ProcessDocumentsStep,
-        SaveResultsStep,
-    )
+    from src.orchestration.steps import CheckPatentsStep, PatentFlowStep, SaveResultsStep
 
-    steps = [
-        CheckPatentsStep(patent_per_batch),
-        ExtractTextsStep(),
-        CollectDocumentsStep(),
-        ProcessDocumentsStep(),
-        SaveResultsStep(),
-    ]
+    if shard is not None:
+        if not streaming:
+            raise ValueError("Sharding is supported only in streaming mode")
+        checkpoint_file = shard.checkpoint_file(checkpoint_file)
+
+    if streaming:
+        steps: List[Step] = [PatentFlowStep(patent_per_batch, shard=shard), SaveResultsStep()]
+    else:
+        steps = [CheckPatentsStep(patent_per_batch), *_document_steps(streaming)]
 
     return FlexibleOrchestrator(steps, checkpoint_file)
 
 
 def create_document_orchestrator(
-    checkpoint_file: Path = Path("checkpoints/documents.pkl"),
+    checkpoint_file: Path = Path("checkpoints/documents.jsonl"),
+    streaming: bool = True,
 ) -> FlexibleOrchestrator:
     """
     Создает оркестратор для обработки документов, исключая шаг поиска и скачивания патентов
 
     Args:
-        checkpoint_file: Путь к файлу чекпоинтов
+        checkpoint_file: Путь к журналу чекпоинтов
+        streaming: Передавать страницы LLM по мере распознавания (извлечение
+            текстов и обработка документов выполняются одновременно)
 
     Returns:
         FlexibleOrchestrator: Чистый оркестратор для обработки документов
     """
+    return FlexibleOrchestrator(_document_steps(streaming), checkpoint_file)
+
+
+def _document_steps(streaming: bool) -> List[Step]:
+    """Шаги извлечения, обработки и сохранения результатов документов"""
     from src.orchestration.steps import (
         ExtractTextsStep,
         CollectDocumentsStep,
         ProcessDocumentsStep,
         SaveResultsStep,
+        StreamDocumentsStep,
     )
 
-    steps = [
+    if streaming:
+        return [StreamDocumentsStep(), SaveResultsStep()]
+
+    return [
         ExtractTextsStep(),
         CollectDocumentsStep(),
         ProcessDocumentsStep(),
         SaveResultsStep(),
     ]
-
-    return FlexibleOrchestrator(steps, checkpoint_file)
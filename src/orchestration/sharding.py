@@ -0,0 +1,100 @@
+import hashlib
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.utils import logger
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Часть корпуса, обрабатываемая одним процессом.
+
+    Документ относится к шарду по хешу имени патента (например, US11111111B2),
+    поэтому шарды не пересекаются и не зависят от порядка и количества
+    документов: при перезапуске процесс получает те же патенты.
+
+    count : количество шардов
+    index : номер шарда (от 0 до count - 1)
+    """
+
+    count: int
+    index: int
+
+    def __post_init__(self):
+        if self.count < 1:
+            raise ValueError("count must be greater than 0")
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"index must be in range [0, {self.count})")
+
+    def owns(self, name: str) -> bool:
+        """
+        Проверяет, относится ли патент к шарду
+
+        Args:
+            name: Имя патента (имя PDF файла без расширения)
+
+        Returns:
+            bool: True, если патент обрабатывается этим шардом
+        """
+        # hash() строк зависит от PYTHONHASHSEED процесса, поэтому используется sha1
+        digest = hashlib.sha1(name.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
+
+    def checkpoint_file(self, checkpoint_file: Path) -> Path:
+        """
+        Возвращает путь к журналу чекпоинтов шарда
+
+        Args:
+            checkpoint_file: Путь к журналу чекпоинтов без шардов
+
+        Returns:
+            Path: Путь к отдельному журналу шарда
+        """
+        return checkpoint_file.with_name(
+            f"{checkpoint_file.stem}.shard-{self.index}-of-{self.count}{checkpoint_file.suffix}"
+        )
+
+
+def run_shards(count: int, command: list[str]) -> int:
+    """
+    Запускает процессы для всех шардов и ожидает их завершения.
+
+    Каждый процесс выполняет command с аргументами --shards count
+    --shard-index i, ведет свой журнал чекпоинтов и записывает результаты
+    в общее хранилище корпуса. Если координатор прерывается, процессы
+    шардов завершаются; прогресс каждого сохранен в его журнале.
+
+    Args:
+        count: Количество шардов
+        command: Команда запуска процесса шарда (например, [sys.executable, "main.py"])
+
+    Returns:
+        int: 0, если все процессы завершились успешно, иначе код первого завершившегося с ошибкой
+    """
+    logger.info(f"Запуск {count} процессов обработки")
+    processes = [
+        subprocess.Popen([*command, "--shards", str(count), "--shard-index", str(index)])
+        for index in range(count)
+    ]
+
+    exit_code = 0
+    try:
+        for index, process in enumerate(processes):
+            code = process.wait()
+            if code != 0:
+                logger.error(f"Шард {index} завершился с кодом {code}")
+                exit_code = exit_code or code
+    except KeyboardInterrupt:
+        logger.warning("Остановка процессов обработки...")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        raise
+
+    if exit_code == 0:
+        logger.success(f"Все {count} шардов обработаны")
+    return exit_code
+
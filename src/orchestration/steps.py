@@ -1,20 +1,38 @@
+import os
 import pickle
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Generator
+from typing import Any, Dict, Generator, Iterable, Iterator
 
 import pandas as pd
 
 from src.constants.general import (
     RESULTS_FINAL_DIR,
     RESULTS_INTERMEDIATE_DIR,
+    RESULTS_RAW_DIR,
     USPT_API_KEY,
 )
+from src.constants.processing import (
+    DOWNLOAD_WORKERS,
+    LLM_MAX_CONCURRENCY,
+    OCR_WORKERS,
+    SAVE_FSYNC_BATCH,
+)
 from src.filtering import PatentsRegistry
 from src.orchestration.checkpoint import CheckpointManager
-from src.orchestration.flow import GeneratorStep, Step
-from src.processing.pipeline import Pipeline
-from src.processing.text_extraction import extract_texts
+from src.orchestration.flow import GeneratorStep, SinkStep, Step
+from src.orchestration.sharding import Shard
+from src.orchestration.streaming import Stage, StreamingExecutor, StreamStage
+from src.processing.pipeline import PipelineResult
+from src.processing.scheduler import CorpusScheduler
+from src.processing.text_extraction import (
+    OCRConfig,
+    OCRConfigEnum,
+    PDFTextExtractor,
+    extract_texts,
+)
 from src.processing.txt_reader import TxtDocument
+from src.storage import CorpusStore, document_name, get_default_corpus_store
 from src.utils import cut_str, logger, patent_id_to_uspto_id
 
 
@@ -42,6 +60,7 @@ class CheckPatentsStep(Step):
         else:
             logger.info(f"Патентов найдено: {patents_amount}, скачивание не требуется")
 
+        get_default_corpus_store().add_patents(documents_path.glob("*.pdf"))
         return context
 
     def _download_patents(self, amount: int, to_dir: Path) -> None:
@@ -59,14 +78,15 @@ class CheckPatentsStep(Step):
 
 
 class ExtractTextsStep(Step):
-    def __init__(self):
+    def __init__(self, config: OCRConfig = OCRConfigEnum.HIGH_ACCURACY):
         super().__init__("extract_texts")
+        self.config = config
 
     def execute(
         self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
     ) -> Dict[str, Any]:
         documents_path = Path(context["documents_path"])
-        results = extract_texts(documents_path)
+        results = extract_texts(documents_path, config=self.config)
         logger.info(
             f"Извлечено {results.count_total} текстов за {results.time_taken:.2f} секунд"
         )
@@ -86,11 +106,11 @@ class CollectDocumentsStep(Step):
         all_docs = []
 
         for new_text in results.new_txts:
-            doc = TxtDocument(new_text)
+            doc = TxtDocument(new_text, lazy=True)
             logger.success(f"+ {cut_str(doc.name)} ({len(doc)} страниц)")
             all_docs.append(doc)
         for old_text in results.old_txts:
-            doc = TxtDocument(old_text)
+            doc = TxtDocument(old_text, lazy=True)
             logger.info(f"  {cut_str(doc.name)} ({len(doc)} страниц)")
             all_docs.append(doc)
 
@@ -100,114 +120,382 @@ class CollectDocumentsStep(Step):
 
 
 class ProcessDocumentsStep(GeneratorStep):
-    def __init__(self):
+    def __init__(
+        self, max_concurrency: int = LLM_MAX_CONCURRENCY, page_query: str | None = None
+    ):
         super().__init__("process_documents")
+        self.max_concurrency = max_concurrency
+        self.page_query = page_query
 
     def execute_generator(
         self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
     ) -> Generator[Dict[str, Any], None, None]:
         docs = context.get("document_objects", [])
-        processed_docs = context.get("processed_documents", [])
-
-        # Фильтруем уже обработанные документы
-        docs_to_process = [doc for doc in docs if doc.name not in processed_docs]
+        # Фильтруем уже обработанные документы (в том числе записанные в журнал
+        # чекпоинтов до прерывания шага)
+        processed = set(context.get("processed_documents", []))
+        skipped = processed | checkpoint_manager.completed_documents(self.name)
+        docs_to_process = [doc for doc in docs if doc.name not in skipped]
 
         logger.info(f"Нужно обработать: {len(docs_to_process)} документов")
 
-        for i, text_file in enumerate(docs_to_process):
-            logger.info(
-                f"Обработка документа ({i+1}/{len(docs_to_process)}): {cut_str(text_file.name)}"
-            )
+        scheduler = _make_scheduler(self.max_concurrency, page_query=self.page_query)
+        for text_file, results in _processed_documents(
+            scheduler.process(docs_to_process), len(docs_to_process)
+        ):
+            yield _document_context(context, text_file.name, results)
+
+
+class StreamDocumentsStep(GeneratorStep):
+    """
+    Извлечение текстов и обработка документов одновременно: страницы PDF
+    передаются LLM по мере распознавания (заменяет шаги extract_texts,
+    collect_documents и process_documents)
+    """
+
+    def __init__(
+        self,
+        config: OCRConfig = OCRConfigEnum.HIGH_ACCURACY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+    ):
+        super().__init__("stream_documents")
+        self.config = config
+        self.max_concurrency = max_concurrency
 
-            pipeline = Pipeline(
-                txt_document=text_file,
-                output_dir=RESULTS_INTERMEDIATE_DIR,
+    def execute_generator(
+        self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
+    ) -> Generator[Dict[str, Any], None, None]:
+        documents_path = Path(context["documents_path"])
+        processed = set(context.get("processed_documents", []))
+        skipped = processed | checkpoint_manager.completed_documents(self.name)
+
+        pdf_files = []
+        docs = []
+        for pdf_file in sorted(documents_path.glob("*.pdf")):
+            text_file = RESULTS_RAW_DIR / f"{pdf_file.stem}.txt"
+            if text_file.name in skipped:
+                continue
+            if text_file.exists():
+                docs.append(TxtDocument(text_file, lazy=True))
+            else:
+                pdf_files.append(pdf_file)
+
+        logger.info(
+            f"Нужно извлечь: {len(pdf_files)} документов, "
+            f"обработать уже извлеченных: {len(docs)} документов"
+        )
+
+        scheduler = _make_scheduler(self.max_concurrency, store=get_default_corpus_store())
+        results_iter = scheduler.process_pdfs(
+            pdf_files,
+            extractor=PDFTextExtractor(self.config),
+            export_path=RESULTS_RAW_DIR,
+            documents=docs,
+        )
+        for text_file, results in _processed_documents(results_iter, len(pdf_files) + len(docs)):
+            yield _document_context(context, text_file.name, results)
+
+
+def _make_scheduler(max_concurrency: int, **kwargs: Any) -> CorpusScheduler:
+    """Планировщик LLM-обработки, сохраняющий прогресс в директории промежуточных результатов"""
+    return CorpusScheduler(
+        max_concurrency=max_concurrency, output_dir=RESULTS_INTERMEDIATE_DIR, **kwargs
+    )
+
+
+def _processed_documents(
+    results_iter: Iterable[tuple[TxtDocument, PipelineResult | None]], total: int | None = None
+) -> Generator[tuple[TxtDocument, PipelineResult], None, None]:
+    """
+    Отдает успешно обработанные документы планировщика
+
+    Args:
+        results_iter: Результаты CorpusScheduler
+        total: Количество документов (для лога)
+
+    Yields:
+        tuple[TxtDocument, PipelineResult]: Документ и результат его обработки
+    """
+    for i, (document, results) in enumerate(results_iter, 1):
+        progress = f"{i}/{total}" if total is not None else str(i)
+        logger.info(f"Обработан документ ({progress}): {cut_str(document.name)}")
+        if not results:
+            logger.warning(f"Не удалось обработать документ: {document.name}")
+            continue
+        yield document, results
+
+
+def _document_context(
+    context: Dict[str, Any], filename: str, results: PipelineResult
+) -> Dict[str, Any]:
+    """Записывает в контекст результат документа и добавляет его в список обработанных"""
+    context["current_pipeline_results"] = results
+    context["current_filename"] = filename
+    processed_docs = context.get("processed_documents", [])
+    processed_docs.append(filename)
+    context["processed_documents"] = processed_docs
+    return context
+
+
+def save_document_results(
+    filename: str, results: PipelineResult, fsync: bool = True
+) -> list[Path]:
+    """
+    Сохраняет промежуточные (pkl) и финальные (CSV) результаты документа
+    и записывает взаимодействия в хранилище корпуса
+
+    Args:
+        filename: Имя текстового файла документа
+        results: Результат обработки документа
+        fsync: Сбросить записанные файлы на диск (иначе их сбрасывает вызывающий код)
+
+    Returns:
+        list[Path]: Записанные файлы
+    """
+    # Промежуточные результаты
+    if not RESULTS_INTERMEDIATE_DIR.exists():
+        RESULTS_INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
+    logger.debug(f"Сохранение промежуточных результатов для документа: {filename}")
+    intermediate_path = RESULTS_INTERMEDIATE_DIR / f"{filename}.pkl"
+    with open(intermediate_path, "wb") as f:
+        pickle.dump(results, f)
+
+    # Финальные результаты
+    if not RESULTS_FINAL_DIR.exists():
+        RESULTS_FINAL_DIR.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Сохранение результатов для документа: {filename}")
+
+    data = []
+    for pagedata in results.interactions:
+        page = pagedata.page
+        page_number = getattr(page, "number", "")
+        interactions = pagedata.interactions.interactions
+
+        if not interactions:
+            data.append(
+                {
+                    "page_number": page_number,
+                    "ligand": "",
+                    "protein": "",
+                    "interaction_type": "",
+                    "context": "",
+                    "Ki": "",
+                    "IC50": "",
+                    "Kd": "",
+                    "EC50": "",
+                }
             )
-            results = pipeline.run()
+        else:
+            for interaction in interactions:
+                params = interaction.parameters
+                data.append(
+                    {
+                        "page_number": page_number,
+                        "ligand": interaction.ligand,
+                        "protein": interaction.protein,
+                        "interaction_type": interaction.interaction_type,
+                        "context": interaction.context,
+                        "Ki": getattr(params, "Ki", ""),
+                        "IC50": getattr(params, "IC50", ""),
+                        "Kd": getattr(params, "Kd", ""),
+                        "EC50": getattr(params, "EC50", ""),
+                    }
+                )
 
-            if not results:
-                logger.warning(f"Не удалось обработать документ: {text_file.name}")
-                continue
+    final_path = RESULTS_FINAL_DIR / f"{filename}.csv"
+    df = pd.DataFrame(data)
+    df.to_csv(final_path, index=False, encoding="utf-8")
 
-            context["current_pipeline_results"] = results
-            context["current_filename"] = text_file.name
+    get_default_corpus_store().save_results(document_name(filename), results)
 
-            # Добавляем в список обработанных
-            processed_docs.append(text_file.name)
-            context["processed_documents"] = processed_docs
+    paths = [intermediate_path, final_path]
+    if fsync:
+        _fsync_files(paths)
+    return paths
 
-            yield context
 
-    def execute(
-        self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
-    ) -> Dict[str, Any]:
-        # Для обычного выполнения собираем все результаты
-        for updated_context in self.execute_generator(context, checkpoint_manager):
-            context = updated_context
-        return context
+def _fsync_files(paths: list[Path]) -> None:
+    """Сбрасывает на диск файлы и записи о них в директориях"""
+    # Директории открываются для fsync только в POSIX системах
+    directories = {path.parent for path in paths} if os.name == "posix" else set()
+    for path in [*paths, *directories]:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
 
-class SaveResultsStep(Step):
-    def __init__(self):
+class SaveResultsStep(SinkStep):
+    """
+    Сохранение результатов каждого документа сразу после его обработки
+    (приемник шага-генератора). Файлы сбрасываются на диск пакетами
+    по fsync_batch документов, а не после каждого документа.
+    """
+
+    def __init__(self, fsync_batch: int = SAVE_FSYNC_BATCH):
         super().__init__("save_results")
+        self.fsync_batch = max(1, fsync_batch)
+        self._unsynced: list[Path] = []
+        self._unsynced_documents = 0
 
     def execute(
         self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
     ) -> Dict[str, Any]:
-        filename = context["current_filename"]
-        results = context["current_pipeline_results"]
-
-        # Промежуточные результаты
-        if not RESULTS_INTERMEDIATE_DIR.exists():
-            RESULTS_INTERMEDIATE_DIR.mkdir(parents=True, exist_ok=True)
-        logger.debug(f"Сохранение промежуточных результатов для документа: {filename}")
-        with open(RESULTS_INTERMEDIATE_DIR / f"{filename}.pkl", "wb") as f:
-            pickle.dump(results, f)
+        self._unsynced += save_document_results(
+            context["current_filename"], context["current_pipeline_results"], fsync=False
+        )
+        self._unsynced_documents += 1
+        return context
 
-        # Финальные результаты
-        if not RESULTS_FINAL_DIR.exists():
-            RESULTS_FINAL_DIR.mkdir(parents=True, exist_ok=True)
+    def should_flush(self) -> bool:
+        return self._unsynced_documents >= self.fsync_batch
+
+    def flush(self) -> None:
+        if self._unsynced:
+            _fsync_files(self._unsynced)
+            logger.debug(f"Результаты {self._unsynced_documents} документов сброшены на диск")
+        self._unsynced = []
+        self._unsynced_documents = 0
+
+
+@dataclass
+class PatentItem:
+    """
+    name      : имя патента (имя PDF файла без расширения)
+    pdf_path  : путь к PDF файлу
+    patent_id : ID патента USPTO для скачивания (None - PDF уже скачан)
+    text_path : путь к текстовому файлу после извлечения текста
+    results   : результат обработки документа
+    """
+
+    name: str
+    pdf_path: Path
+    patent_id: str | None = None
+    text_path: Path | None = None
+    results: PipelineResult | None = None
+
+
+class PatentFlowStep(GeneratorStep):
+    """
+    Потоковая обработка патентов: скачивание -> извлечение текста -> LLM
+    (заменяет шаги check_patents, extract_texts, collect_documents
+    и process_documents).
+
+    Стадии связаны ограниченными очередями (StreamingExecutor), и каждый
+    патент проходит их независимо: скачивание, распознавание и обработка LLM
+    разных патентов выполняются одновременно. Скачанные PDF распознаются
+    в стадии обработки (CorpusScheduler.process_pdf_iter): страницы
+    передаются LLM по мере распознавания, как в StreamDocumentsStep, и
+    страницы всех документов обрабатываются общей очередью. Контекст
+    отдается сразу после обработки документа, поэтому приемник
+    SaveResultsStep сохраняет результаты по мере готовности.
+
+    Если задан shard, шаг обрабатывает только патенты этого шарда
+    (несколько процессов делят корпус, см. Shard).
+    """
+
+    def __init__(
+        self,
+        patent_per_batch: int,
+        config: OCRConfig = OCRConfigEnum.HIGH_ACCURACY,
+        download_workers: int = DOWNLOAD_WORKERS,
+        ocr_workers: int = OCR_WORKERS,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        shard: Shard | None = None,
+    ):
+        super().__init__("patent_flow")
+        self.patent_per_batch = patent_per_batch
+        self.config = config
+        self.download_workers = download_workers
+        self.ocr_workers = ocr_workers
+        self.max_concurrency = max_concurrency
+        self.shard = shard
+        self.registry: PatentsRegistry | None = None
 
-        logger.info(f"Сохранение результатов для документа: {filename}")
+    def execute_generator(
+        self, context: Dict[str, Any], checkpoint_manager: CheckpointManager
+    ) -> Generator[Dict[str, Any], None, None]:
+        documents_path = Path(context["documents_path"])
+        documents_path.mkdir(parents=True, exist_ok=True)
+        processed = set(context.get("processed_documents", []))
+        skipped = processed | checkpoint_manager.completed_documents(self.name)
+
+        store = get_default_corpus_store()
+        extractor = PDFTextExtractor(self.config)
+        executor = StreamingExecutor(
+            [
+                Stage("download", lambda item: self._download(item, store), self.download_workers),
+                StreamStage("process", lambda items: self._process(items, extractor, store)),
+            ]
+        )
 
-        data = []
-        for pagedata in results.interactions:
-            page = pagedata.page
-            page_number = getattr(page, "number", "")
-            interactions = pagedata.interactions.interactions
+        for item in executor.run(self._iter_patents(documents_path, skipped)):
+            filename = item.text_path.name  # type: ignore[union-attr]
+            yield _document_context(context, filename, item.results)  # type: ignore[arg-type]
 
-            if not interactions:
-                data.append(
-                    {
-                        "page_number": page_number,
-                        "ligand": "",
-                        "protein": "",
-                        "interaction_type": "",
-                        "context": "",
-                        "Ki": "",
-                        "IC50": "",
-                        "Kd": "",
-                        "EC50": "",
-                    }
-                )
-            else:
-                for interaction in interactions:
-                    params = interaction.parameters
-                    data.append(
-                        {
-                            "page_number": page_number,
-                            "ligand": interaction.ligand,
-                            "protein": interaction.protein,
-                            "interaction_type": interaction.interaction_type,
-                            "context": interaction.context,
-                            "Ki": getattr(params, "Ki", ""),
-                            "IC50": getattr(params, "IC50", ""),
-                            "Kd": getattr(params, "Kd", ""),
-                            "EC50": getattr(params, "EC50", ""),
-                        }
-                    )
-
-        df = pd.DataFrame(data)
-        df.to_csv(RESULTS_FINAL_DIR / f"{filename}.csv", index=False, encoding="utf-8")
+    def _iter_patents(self, documents_path: Path, skipped: set[str]) -> Iterator[PatentItem]:
+        """Скачанные патенты, затем патенты для скачивания до patent_per_batch"""
+        pdf_files = sorted(documents_path.glob("*.pdf"))
+        for pdf_file in pdf_files:
+            if f"{pdf_file.stem}.txt" not in skipped and self._owns(pdf_file.stem):
+                yield PatentItem(name=pdf_file.stem, pdf_path=pdf_file)
 
-        return context
+        if self.shard is None:
+            amount = self.patent_per_batch - len(pdf_files)
+        else:
+            # Процессы шардов скачивают патенты одновременно, поэтому количество
+            # скачанных файлов у них различается. Запрос не зависит от него,
+            # чтобы все процессы получили один список и разделили его без пропусков
+            amount = self.patent_per_batch
+        if amount <= 0:
+            logger.info(f"Патентов найдено: {len(pdf_files)}, скачивание не требуется")
+            return
+        if not USPT_API_KEY:
+            logger.error("USPT_API_KEY не задан, патенты не будут скачаны")
+            return
+
+        logger.info(f"Патентов найдено: {len(pdf_files)}, скачивание {amount} патентов...")
+        self.registry = PatentsRegistry(api_key=USPT_API_KEY)
+        for patent in self.registry.get_patents_by_query(query="protein binding", limit=amount):
+            name = patent_id_to_uspto_id(patent.id)
+            pdf_path = documents_path / f"{name}.pdf"
+            if pdf_path.exists() or f"{name}.txt" in skipped or not self._owns(name):
+                continue
+            yield PatentItem(name=name, pdf_path=pdf_path, patent_id=patent.id)
+
+    def _owns(self, name: str) -> bool:
+        return self.shard is None or self.shard.owns(name)
+
+    def _download(self, item: PatentItem, store: CorpusStore) -> PatentItem | None:
+        if item.patent_id is not None and self.registry is not None:
+            if not self.registry.download_document(
+                patent_id=item.patent_id, path=item.pdf_path.parent, filename=item.name
+            ):
+                logger.warning(f"Не удалось скачать патент {item.patent_id}")
+                return None
+        store.add_patents([item.pdf_path])
+        return item
+
+    def _process(
+        self, items: Iterator[PatentItem], extractor: PDFTextExtractor, store: CorpusStore
+    ) -> Generator[PatentItem, None, None]:
+        # PDF передаются планировщику по мере скачивания, а их страницы - LLM
+        # по мере распознавания. Результаты сопоставляются с патентами по имени
+        pending: dict[str, PatentItem] = {}
+
+        def pdf_files() -> Generator[Path, None, None]:
+            for item in items:
+                pending[item.name] = item
+                yield item.pdf_path
+
+        scheduler = _make_scheduler(self.max_concurrency, store=store)
+        results_iter = scheduler.process_pdf_iter(
+            pdf_files(), extractor, RESULTS_RAW_DIR, workers=self.ocr_workers
+        )
+        for document, results in _processed_documents(results_iter):
+            item = pending.pop(document.path.stem)
+            item.text_path = document.path
+            item.results = results
+            yield item
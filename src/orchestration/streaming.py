@@ -0,0 +1,284 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, Iterable, Iterator
+
+from src.utils import logger
+
+
+# Признак окончания потока элементов в очереди стадии
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    Стадия потоковой обработки: функция применяется к каждому элементу
+    в workers потоках одновременно
+
+    name    : имя стадии
+    func    : обработка элемента; возвращает элемент для следующей стадии
+              или None, если элемент дальше не передается
+    workers : количество потоков стадии
+    """
+
+    name: str
+    func: Callable[[Any], Any | None]
+    workers: int = 1
+
+
+@dataclass
+class StreamStage:
+    """
+    Стадия потоковой обработки, которая сама распределяет работу между
+    элементами: функция получает итератор входных элементов и отдает
+    результаты в любом порядке (например, CorpusScheduler, который
+    обрабатывает страницы нескольких документов одновременно).
+
+    Если функция завершается ошибкой, элементы, полученные ею, но не
+    отданные в результатах, и элементы, оставшиеся во входной очереди,
+    записываются в лог как необработанные.
+
+    name : имя стадии
+    func : обработка потока элементов
+    key  : ключ, по которому результат сопоставляется входному элементу
+           (по умолчанию функция отдает сами входные элементы)
+    """
+
+    name: str
+    func: Callable[[Iterator[Any]], Iterable[Any]]
+    key: Callable[[Any], Any] = id
+    workers: int = field(default=1, init=False)
+
+
+@dataclass
+class _StageStats:
+    """
+    processed : количество обработанных элементов
+    failed    : количество элементов, обработка которых завершилась ошибкой
+    busy_time : суммарное время обработки элементов всеми потоками стадии
+    """
+
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, processed: int = 0, failed: int = 0, busy_time: float = 0.0) -> None:
+        with self.lock:
+            self.processed += processed
+            self.failed += failed
+            self.busy_time += busy_time
+
+
+class StreamingExecutor:
+    """
+    Потоковое выполнение стадий, связанных ограниченными очередями.
+
+    Каждый элемент (например, патент) проходит стадии независимо от остальных:
+    пока одна стадия обрабатывает элемент, предыдущая уже обрабатывает
+    следующий. У каждой стадии свое количество потоков, а ограниченные
+    очереди между стадиями приостанавливают быстрые стадии, если следующая
+    не успевает, поэтому в памяти находится не больше queue_size элементов
+    на стадию. Ошибка обработки элемента записывается в лог, и элемент
+    дальше не передается.
+
+    Args:
+        stages: Стадии в порядке обработки
+        queue_size: Размер очереди перед каждой стадией (по умолчанию
+            удвоенное количество потоков стадии)
+    """
+
+    def __init__(self, stages: list[Stage | StreamStage], queue_size: int | None = None):
+        if not stages:
+            raise ValueError("stages must not be empty")
+        for stage in stages:
+            if stage.workers < 1:
+                raise ValueError(f"Stage {stage.name}: workers must be greater than 0")
+
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = {stage.name: _StageStats() for stage in stages}
+
+    def run(self, items: Iterable[Any]) -> Generator[Any, None, None]:
+        """
+        Запускает обработку элементов
+
+        Args:
+            items: Входные элементы первой стадии (итератор читается в отдельном потоке)
+
+        Yields:
+            Any: Результаты последней стадии по мере готовности
+        """
+        stop = threading.Event()
+        queues: list[queue.Queue] = [
+            queue.Queue(maxsize=self.queue_size or stage.workers * 2) for stage in self.stages
+        ]
+        output: queue.Queue = queue.Queue(maxsize=self.queue_size or self.stages[-1].workers * 2)
+        queues.append(output)
+
+        threads = [
+            threading.Thread(
+                target=self._feed, args=(items, queues[0], self.stages[0].workers, stop),
+                name="stream-source", daemon=True,
+            )
+        ]
+        for idx, stage in enumerate(self.stages):
+            next_workers = self.stages[idx + 1].workers if idx + 1 < len(self.stages) else 1
+            # Последний завершившийся поток стадии передает признак окончания дальше
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(stage, queues[idx], queues[idx + 1], next_workers, remaining, lock, stop),
+                        name=f"stream-{stage.name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        start_time = time.time()
+        for thread in threads:
+            thread.start()
+        try:
+            while (item := self._get(output, stop)) is not _DONE:
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self._log_stats(time.time() - start_time)
+
+    def _feed(self, items: Iterable[Any], target: queue.Queue, workers: int, stop: threading.Event) -> None:
+        try:
+            for item in items:
+                if not self._put(target, item, stop):
+                    return
+        except Exception as e:
+            logger.error(f"Ошибка при получении входных элементов: {e}")
+        for _ in range(workers):
+            self._put(target, _DONE, stop)
+
+    def _work(
+        self,
+        stage: Stage | StreamStage,
+        source: queue.Queue,
+        target: queue.Queue,
+        next_workers: int,
+        remaining: list[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+    ) -> None:
+        try:
+            if isinstance(stage, StreamStage):
+                self._work_stream(stage, source, target, stop)
+            else:
+                self._work_items(stage, source, target, stop)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(next_workers):
+                    self._put(target, _DONE, stop)
+
+    def _work_items(self, stage: Stage, source: queue.Queue, target: queue.Queue, stop: threading.Event) -> None:
+        stats = self.stats[stage.name]
+        while (item := self._get(source, stop)) is not _DONE:
+            start_time = time.time()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                logger.error(f"Ошибка на стадии {stage.name} для {_describe(item)}: {e}")
+                stats.add(failed=1, busy_time=time.time() - start_time)
+                continue
+
+            stats.add(processed=1, busy_time=time.time() - start_time)
+            if result is not None and not self._put(target, result, stop):
+                return
+
+    def _work_stream(self, stage: StreamStage, source: queue.Queue, target: queue.Queue, stop: threading.Event) -> None:
+        stats = self.stats[stage.name]
+        # Элементы, переданные функции и еще не отданные ею
+        pending: dict[Any, Any] = {}
+        lock = threading.Lock()
+        exhausted = threading.Event()
+        failed = threading.Event()
+
+        def take() -> Any:
+            while not stop.is_set() and not exhausted.is_set():
+                try:
+                    item = source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    exhausted.set()
+                    return _DONE
+                with lock:
+                    pending[stage.key(item)] = item
+                return item
+            return _DONE
+
+        def inputs() -> Generator[Any, None, None]:
+            # После ошибки функции полученный элемент остается в pending
+            while not failed.is_set() and (item := take()) is not _DONE:
+                yield item
+
+        start_time = time.time()
+        try:
+            for result in stage.func(inputs()):
+                stats.add(processed=1)
+                if result is None:
+                    continue
+                with lock:
+                    pending.pop(stage.key(result), None)
+                if not self._put(target, result, stop):
+                    return
+        except Exception as e:
+            failed.set()
+            logger.error(f"Ошибка на стадии {stage.name}: {e}")
+            # Оставшиеся элементы забираются из очереди, чтобы записать их в лог
+            while take() is not _DONE:
+                pass
+            with lock:
+                lost = list(pending.values())
+            for item in lost:
+                logger.error(f"Элемент {_describe(item)} не обработан стадией {stage.name}")
+            stats.add(failed=len(lost))
+        finally:
+            stats.add(busy_time=time.time() - start_time)
+
+    @staticmethod
+    def _put(target: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Помещает элемент в очередь, ожидая места; False, если выполнение остановлено"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: queue.Queue, stop: threading.Event) -> Any:
+        """Забирает элемент из очереди; _DONE, если выполнение остановлено"""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _log_stats(self, elapsed: float) -> None:
+        for stage in self.stages:
+            stats = self.stats[stage.name]
+            logger.info(
+                f"Стадия {stage.name}: обработано {stats.processed}, ошибок {stats.failed}, "
+                f"потоков {stage.workers}, загрузка {stats.busy_time / max(elapsed, 1e-9) / stage.workers:.0%}"
+            )
+
+
+def _describe(item: Any) -> str:
+    return str(getattr(item, "name", item))
@@ -3,32 +3,80 @@
 
 Публичные классы:
 - Pipeline: Класс для обработки текста
+- AgentSuite: Набор агентов, общий для всех документов
+- CorpusScheduler: Планировщик LLM-обработки страниц всего корпуса
+- ParametersPrefilter: Детерминированный префильтр страниц перед LLM
+- PrefilterStats: Статистика префильтра страниц
+- LLMResponseCache: Персистентный кэш ответов агентов
+- OCRPageCache: Персистентный кэш текста страниц PDF
 - TxtDocument: Класс для работы с текстовыми документами
 - ExtractionResults: Класс для хранения результатов извлечения текста
 - ImagePreprocessor: Класс для обработки изображений
 - OCRConfigEnum: Перечисление для настроек OCR
 - OCRConfig: Класс для настроек OCR
 - PDFTextExtractor: Класс для извлечения текста из PDF-документов
+- PageExtraction: Результат извлечения текста одной страницы PDF
+- PageSource: Способ получения текста страницы (текстовый слой или OCR)
+- PageClassifier: Классификатор растра страницы (пустая страница, рисунок, текст)
+- PageKind: Тип страницы по растровому изображению
+- OCRWords: Слова распознанного текста с координатами и уверенностью
+- TableDetector: Поиск таблиц на странице по линиям разметки и словам
+- PageTable: Таблица страницы (заголовки и строки ячеек)
+- AffinityTableReader: Чтение взаимодействий из таблиц аффинности без LLM
+
+Публичные функции:
+- words_sidecar_path: Путь к файлу слов для текстового файла документа
+- tables_sidecar_path: Путь к файлу таблиц для текстового файла документа
+- page_index_path: Путь к файлу индекса страниц для текстового файла документа
 """
 
+from .llm_cache import LLMResponseCache
+from .ocr_cache import OCRPageCache
+from .ocr_words import OCRWords, words_sidecar_path
+from .page_tables import AffinityTableReader, PageTable, tables_sidecar_path
 from .llm_models import DEFAULT_MODEL
+from .agent_suite import AgentSuite
 from .pipeline import Pipeline
-from .txt_reader import TxtDocument
+from .scheduler import CorpusScheduler
+from .prefilter import ParametersPrefilter, PrefilterStats
+from .txt_reader import TxtDocument, page_index_path
 from .text_extraction import (
     ExtractionResults,
     ImagePreprocessor,
     OCRConfigEnum,
     OCRConfig,
     PDFTextExtractor,
+    PageExtraction,
+    PageSource,
+    PageClassifier,
+    PageKind,
+    TableDetector,
 )
 
 __all__ = [
     "DEFAULT_MODEL",
     "Pipeline",
+    "AgentSuite",
+    "CorpusScheduler",
+    "ParametersPrefilter",
+    "PrefilterStats",
+    "LLMResponseCache",
+    "OCRPageCache",
     "TxtDocument",
     "ExtractionResults",
     "ImagePreprocessor",
     "OCRConfigEnum",
     "OCRConfig",
     "PDFTextExtractor",
+    "PageExtraction",
+    "PageSource",
+    "PageClassifier",
+    "PageKind",
+    "OCRWords",
+    "words_sidecar_path",
+    "TableDetector",
+    "PageTable",
+    "AffinityTableReader",
+    "tables_sidecar_path",
+    "page_index_path",
 ]
\ No newline at end of file
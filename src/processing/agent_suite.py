@@ -0,0 +1,360 @@
+import asyncio
+import threading
+from typing import Any, Callable
+
+from agents import Agent, AgentOutputSchema, Model, ModelBehaviorError, Runner
+from pydantic import BaseModel
+
+from src.processing.event_loop import run_coroutine
+from src.processing.llm_cache import LLMResponseCache, get_default_llm_cache
+from src.processing.llm_models import DEFAULT_MODEL
+from src.processing.schemas import (
+    BioinfAgentResults,
+    PageSearchDecision,
+    SearcherAgentResults,
+    SearcherBatchResults,
+    SupervisorAgentResults,
+)
+from src.processing.txt_reader import Page
+from src.utils import logger
+
+
+class AgentSuite:
+    """
+    Набор агентов для извлечения взаимодействий, общий для всех документов.
+
+    Агенты и их схемы вывода создаются один раз, после чего набор может
+    использоваться любым количеством Pipeline (в том числе из разных потоков):
+    состояние набора после инициализации не изменяется, а кэш ответов
+    синхронизирован внутри.
+
+    Запросы к агентам реализованы асинхронными методами; синхронные методы
+    выполняют их в общем цикле событий процесса (run_coroutine), поэтому
+    оба варианта работают одинаково.
+    """
+
+    def __init__(
+        self,
+        model: Model = DEFAULT_MODEL,
+        use_cache: bool = True,
+        cache: LLMResponseCache | None = None,
+    ):
+        """
+        Инициализация AgentSuite
+
+        Args:
+            model: Модель, используемая всеми агентами
+            use_cache: Использовать персистентный кэш ответов LLM
+            cache: Кэш ответов LLM (по умолчанию общий кэш процесса)
+        """
+        logger.debug("Инициализация набора агентов")
+        if not use_cache:
+            self.cache = None
+        else:
+            self.cache = cache if cache is not None else get_default_llm_cache()
+
+        self.runner = Runner()
+
+        # Схемы вывода строятся один раз: иначе Runner заново строит их при каждом вызове
+        bioinf_output_schema = AgentOutputSchema(BioinfAgentResults)
+
+        self.searcher_agent = Agent(
+            name="SearcherAgent",
+            instructions="""
+            You are an expert in the field of bioinformatics.
+            You are given a text and you need to determine if it contains any ligand-protein interactions.
+            One of the most important things is to determine if there are any parameters of the interactions like Ki, IC50, Kd, EC50.
+            If there are, you need to return True.
+            You need to return a boolean value and a confidence score.
+            Confidence score is a number between 0 and 1, where 1 means 100% confidence that the text contains ligand-protein interactions.
+            If you are not sure, return 0.5.
+            """,
+            model=model,
+            output_type=AgentOutputSchema(SearcherAgentResults),
+        )
+
+        self.batch_searcher_agent = Agent(
+            name="BatchSearcherAgent",
+            instructions="""
+            You are an expert in the field of bioinformatics.
+            You are given several pages of text, each page starts with a line "=== PAGE <number> ===".
+            For every page you need to determine if it contains any ligand-protein interactions.
+            One of the most important things is to determine if there are any parameters of the interactions like Ki, IC50, Kd, EC50.
+            If there are, the decision for the page is True.
+            Return exactly one decision for every page with its page number, a boolean value and a confidence score.
+            Confidence score is a number between 0 and 1, where 1 means 100% confidence that the page contains ligand-protein interactions.
+            If you are not sure, return 0.5.
+            """,
+            model=model,
+            output_type=AgentOutputSchema(SearcherBatchResults),
+        )
+
+        self.bioinf_agent = Agent(
+            name="BioinfAgent",
+            instructions="""
+            You are a bioinformatics expert.
+            You are given a text and you need to extract all mentions of ligand-protein interactions.
+            For each interaction, you need to specify:
+            - The parameters of the interaction (Ki, IC50, Kd, EC50) (some could be missing)
+            - The name or identifier of the ligand
+            - The name or identifier of the protein
+            - A description of the type of interaction (e.g., binding, inhibition, etc.)
+            - The context or a quote from the text where this interaction is described
+            Note that parameters HAVE TO BE taken from the text, and not calculated or imagined!
+            """,
+            model=model,
+            output_type=bioinf_output_schema,
+        )
+
+        self.supervisor_agent = Agent(
+            name="SupervisorAgent",
+            instructions="""
+            You are a very strict supervisor of the BioinfAgent.
+            You are given a text and structured output of the BioinfAgent, which is a list of ligand-protein interactions.
+            You need to check the output correctness and provide an explanation for your decision.
+            If output could be easily fixed, note that in the fixable field.
+            Correctness means:
+            - No mentions of patent numbers, dates, etc., and other non-biological information
+            - All ligands and proteins are mentioned are correct.
+            - No usage of don't know, unknown, etc.
+            - Note that some parameters could be missing, but not all of them
+            """,
+            model=model,
+            output_type=AgentOutputSchema(SupervisorAgentResults),
+        )
+
+        self.fix_agent = Agent(
+            name="FixAgent",
+            instructions="""
+            You are a fixer of the BioinfAgent.
+            You are given a text and structured output of the BioinfAgent and a decision of the SupervisorAgent.
+            You need to fix the output based on the explanation of the SupervisorAgent.
+            """,
+            model=model,
+            output_type=bioinf_output_schema,
+        )
+
+    def use_runner_safely(
+        self,
+        agent: Agent,
+        input: str,
+        max_attempts: int = 3,
+        cache_variant: int = 0,
+        validate: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Синхронная обертка над ause_runner_safely"""
+        return run_coroutine(
+            self.ause_runner_safely(agent, input, max_attempts, cache_variant, validate)
+        )
+
+    async def ause_runner_safely(
+        self,
+        agent: Agent,
+        input: str,
+        max_attempts: int = 3,
+        cache_variant: int = 0,
+        validate: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """
+        Запускает агента с повторными попытками при некорректном ответе модели.
+        Ответы берутся из кэша и сохраняются в него, если кэш включен.
+
+        Args:
+            agent: Агент
+            input: Входной текст
+            max_attempts: Количество повторных попыток
+            cache_variant: Номер повтора запроса: повторы одного запроса
+                кэшируются отдельно, поэтому повтор обращается к модели
+            validate: Проверка ответа: ответ, не прошедший проверку, возвращается,
+                но не сохраняется в кэш
+
+        Returns:
+            Any: Структурированный ответ агента (final_output)
+        """
+        cached = self._load_cached_output(agent, input, cache_variant)
+        if cached is not None:
+            return cached
+
+        output = await self._run_with_retries(agent, input, max_attempts)
+        if validate is None or validate(output):
+            self._store_output(agent, input, output, cache_variant)
+        return output
+
+    async def _run_with_retries(self, agent: Agent, input: str, max_attempts: int) -> Any:
+        try:
+            return (await self.runner.run(agent, input)).final_output
+        except ModelBehaviorError as e:
+            logger.error(f"Модель некорректно сформировала ответ: {e}")
+            if max_attempts > 0:
+                return await self._run_with_retries(agent, input, max_attempts - 1)
+            else:
+                raise e
+
+    def _load_cached_output(self, agent: Agent, input: str, variant: int = 0) -> Any:
+        if self.cache is None:
+            return None
+        output = self.cache.get(agent, input, variant)
+        if output is not None:
+            logger.debug(f"Ответ агента {agent.name} взят из кэша")
+        return output
+
+    def _store_output(self, agent: Agent, input: str, output: Any, variant: int = 0) -> None:
+        if self.cache is None or not isinstance(output, BaseModel):
+            return
+        try:
+            self.cache.set(agent, input, output, variant)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить ответ агента {agent.name} в кэш: {e}")
+
+    def review_bioinf_agent(self, page: Page, result: BioinfAgentResults):
+        """Синхронная обертка над areview_bioinf_agent"""
+        return run_coroutine(self.areview_bioinf_agent(page, result))
+
+    async def areview_bioinf_agent(self, page: Page, result: BioinfAgentResults):
+        repeates = 2
+        for i in range(repeates):
+            logger.debug(f"Запуск агента-супервайзера (проход {i + 1}/{repeates})")
+            # Каждый проход - отдельный запрос к модели, а не ответ предыдущего прохода из кэша
+            supervisor_decision: SupervisorAgentResults = await self.ause_runner_safely(
+                self.supervisor_agent, f"{page.text}\n\n{result}", cache_variant=i
+            )
+            logger.debug(
+                f"Агент-супервайзер завершил обработку страницы. Результат: {supervisor_decision}"
+            )
+
+            if not supervisor_decision.is_correct:
+                logger.debug(
+                    f"Результат некорректен: {supervisor_decision.explanation}\n\nInteractions: {result}"
+                )
+
+                if supervisor_decision.fixable:
+                    logger.debug("Запуск агента-исправления")
+                    fix_result = await self.ause_runner_safely(
+                        self.fix_agent,
+                        f"{page.text}\n\n{result}\n\n{supervisor_decision.explanation}",
+                    )
+                    logger.debug("Агент-исправления завершил обработку страницы")
+                    return await self.areview_bioinf_agent(page, fix_result)
+                else:
+                    return None
+
+        return result
+
+    def search_interactions(self, page: Page) -> BioinfAgentResults:
+        """Синхронная обертка над asearch_interactions"""
+        return run_coroutine(self.asearch_interactions(page))
+
+    async def asearch_interactions(self, page: Page) -> BioinfAgentResults:
+        logger.debug("Запуск агента-биоинформатика")
+        result: BioinfAgentResults = await self.ause_runner_safely(self.bioinf_agent, page.text)
+        logger.debug(
+            f"Агент-биоинформатик завершил обработку страницы. Найдено {len(result.interactions)} взаимодействий"
+        )
+        return result
+
+    def should_search_interactions(self, page: Page) -> bool:
+        """Синхронная обертка над ashould_search_interactions"""
+        return run_coroutine(self.ashould_search_interactions(page))
+
+    async def ashould_search_interactions(self, page: Page) -> bool:
+        logger.debug("Запуск агента-поиска")
+        decision = await self.ause_runner_safely(self.searcher_agent, page.text)
+        logger.debug("Агент-поиска завершил обработку страницы")
+        return self._check_searcher_decision(page, decision)
+
+    def should_search_interactions_batch(self, pages: list[Page]) -> list[bool]:
+        """Синхронная обертка над ashould_search_interactions_batch"""
+        return run_coroutine(self.ashould_search_interactions_batch(pages))
+
+    async def ashould_search_interactions_batch(self, pages: list[Page]) -> list[bool]:
+        """
+        Классифицирует несколько страниц одним запросом к агенту-поиска.
+        Если ответ агента не проходит проверку, страницы классифицируются по одной.
+
+        Args:
+            pages: Страницы для классификации
+
+        Returns:
+            list[bool]: Решения в порядке страниц
+        """
+        if len(pages) == 1:
+            return [await self.ashould_search_interactions(pages[0])]
+
+        logger.debug(f"Запуск пакетного агента-поиска для {len(pages)} страниц")
+        try:
+            # Некорректный ответ не повторяется: страницы классифицируются по одной.
+            # Неполный ответ не кэшируется, иначе повтор пакета всегда брал бы его из кэша
+            result = await self.ause_runner_safely(
+                self.batch_searcher_agent,
+                self._make_batch_input(pages),
+                max_attempts=0,
+                validate=lambda output: self._match_batch_decisions(pages, output) is not None,
+            )
+            decisions = self._match_batch_decisions(pages, result)
+        except ModelBehaviorError:
+            decisions = None
+
+        if decisions is None:
+            logger.debug("Ответ пакетного агента-поиска некорректен, классификация по одной странице")
+            return list(
+                await asyncio.gather(
+                    *(self.ashould_search_interactions(page) for page in pages)
+                )
+            )
+
+        logger.debug("Пакетный агент-поиска завершил обработку страниц")
+        return [
+            self._check_searcher_decision(page, decision)
+            for page, decision in zip(pages, decisions)
+        ]
+
+    @staticmethod
+    def _make_batch_input(pages: list[Page]) -> str:
+        return "\n\n".join(
+            f"=== PAGE {idx} ===\n{page.text}" for idx, page in enumerate(pages, 1)
+        )
+
+    @staticmethod
+    def _match_batch_decisions(
+        pages: list[Page], result: SearcherBatchResults
+    ) -> list[PageSearchDecision] | None:
+        """Сопоставляет решения пакетного агента страницам (None, если ответ неполный)"""
+        decisions = {decision.page_number: decision for decision in result.decisions}
+        if len(result.decisions) != len(pages) or set(decisions) != set(
+            range(1, len(pages) + 1)
+        ):
+            return None
+        return [decisions[idx] for idx in range(1, len(pages) + 1)]
+
+    def _check_searcher_decision(
+        self, page: Page, decision: SearcherAgentResults | PageSearchDecision
+    ) -> bool:
+        decision_text = (
+            "Содержит" if decision.does_contain_interactions else "Не содержит"
+        )
+        if not decision.does_contain_interactions or decision.accuracy < 0.5:
+            logger.debug(
+                f"Агент-поиска не обнаружил взаимодействий на странице {page.number}. Решение агента: {decision_text}, уверенность: {decision.accuracy * 100}%"
+            )
+            return False
+        
+        logger.debug(f"Агент-поиска обнаружил взаимодействия на странице {page.number}. Решение агента: {decision_text}, уверенность: {decision.accuracy * 100}%")
+        return True
+
+
+_default_suite: AgentSuite | None = None
+_default_suite_lock = threading.Lock()
+
+
+def get_default_agent_suite() -> AgentSuite:
+    """
+    Возвращает общий для процесса набор агентов
+
+    Returns:
+        AgentSuite: Набор агентов с настройками по умолчанию
+    """
+    global _default_suite
+    with _default_suite_lock:
+        if _default_suite is None:
+            _default_suite = AgentSuite()
+        return _default_suite
@@ -0,0 +1,124 @@
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncGenerator, Coroutine, Generator, TypeVar
+
+T = TypeVar("T")
+
+# Признак окончания асинхронного генератора в очереди результатов
+_DONE = object()
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Возвращает общий для процесса цикл событий, выполняемый в отдельном потоке.
+
+    Все асинхронные вызовы агентов выполняются в этом цикле, поэтому клиенты
+    моделей (AsyncOpenAI) всегда используются в одном цикле событий, а запросы
+    выполняются и пока синхронный вызывающий код занят своей работой.
+
+    Returns:
+        asyncio.AbstractEventLoop: Цикл событий фонового потока
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="llm-event-loop", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Выполняет корутину в общем цикле событий и ожидает результат
+
+    Args:
+        coroutine: Корутина
+
+    Returns:
+        T: Результат корутины
+    """
+    loop = get_background_loop()
+    _check_caller_thread(coroutine)
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+def iterate_async(
+    results: AsyncGenerator[T, None], queue_size: int = 1
+) -> Generator[T, None, None]:
+    """
+    Синхронно итерирует асинхронный генератор, выполняемый в общем цикле событий.
+
+    Генератор выполняется независимо от вызывающего кода и передает элементы
+    через ограниченную очередь: пока вызывающий код обрабатывает элемент,
+    генератор готовит следующие, пока очередь не заполнится. Если итерация
+    прерывается, генератор закрывается.
+
+    Args:
+        results: Асинхронный генератор
+        queue_size: Количество элементов, подготовленных заранее
+
+    Yields:
+        T: Элементы генератора
+    """
+    loop = get_background_loop()
+    _check_caller_thread(results)
+    output: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    async def put(item: Any) -> bool:
+        # Блокирующее ожидание места остановило бы цикл событий
+        while not stop.is_set():
+            try:
+                output.put_nowait(item)
+                return True
+            except queue.Full:
+                await asyncio.sleep(0.05)
+        return False
+
+    async def pump() -> None:
+        error = None
+        try:
+            async for item in results:
+                if not await put((item, None)):
+                    return
+        except Exception as e:
+            error = e
+        finally:
+            await results.aclose()
+        await put((_DONE, error))
+
+    async def start() -> asyncio.Task:
+        return asyncio.ensure_future(pump())
+
+    async def cancel(task: asyncio.Task) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    task = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    try:
+        while True:
+            item, error = output.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        asyncio.run_coroutine_threadsafe(cancel(task), loop).result()
+
+
+def _check_caller_thread(awaitable: Any) -> None:
+    if threading.current_thread() is _loop_thread:
+        close = getattr(awaitable, "close", None)
+        if close is not None:
+            close()
+        raise RuntimeError("Synchronous call from the background event loop would deadlock")
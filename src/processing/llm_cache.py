@@ -0,0 +1,299 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from agents import Agent, AgentOutputSchemaBase
+from pydantic import BaseModel
+
+from src.constants.general import LLM_CACHE_BYPASS, LLM_CACHE_FILE
+from src.constants.processing import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_SIZE_MB
+from src.utils import logger
+
+
+class LLMResponseCache:
+    """
+    Персистентный кэш структурированных ответов агентов.
+
+    Ключ ответа - SHA-256 от имени агента, его инструкций, имени модели,
+    JSON-схемы выходного типа и входного текста (и номера варианта, если
+    один и тот же запрос намеренно выполняется несколько раз). Ответы
+    хранятся в SQLite, при превышении лимитов по количеству или размеру
+    вытесняются записи, к которым дольше всего не обращались (LRU).
+    Количество и размер записей хранятся в файле кэша и обновляются в
+    транзакции записи, поэтому лимиты соблюдаются и при работе нескольких
+    процессов (шардов) с одним файлом. Время
+    обращения к записям при чтении обновляется пакетами, поэтому чтение
+    из кэша ничего не записывает в файл.
+
+    Args:
+        cache_file: Путь к файлу кэша
+        max_entries: Максимальное количество записей
+        max_size_bytes: Максимальный суммарный размер ответов в байтах
+        bypass: Не читать ответы из кэша (новые ответы при этом сохраняются)
+    """
+
+    # Доля лимита, до которой кэш очищается при переполнении
+    _EVICTION_TARGET = 0.9
+    # Количество прочитанных записей, после которого обновляется время обращения к ним
+    _TOUCH_BATCH = 100
+
+    def __init__(
+        self,
+        cache_file: Path = LLM_CACHE_FILE,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_size_bytes: int = LLM_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        bypass: bool = False,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.bypass = bypass
+
+        self._lock = threading.Lock()
+        self._fingerprints: dict[int, tuple[Agent, str]] = {}
+        # Время последнего обращения к прочитанным записям, еще не записанное в файл
+        self._touched: dict[str, float] = {}
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self.cache_file, check_same_thread=False, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        # Кэш, созданный до хранения количества и размера записей
+        self._connection.execute(
+            "INSERT OR IGNORE INTO totals (id, entries, size) "
+            "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        )
+        self._connection.commit()
+
+        entries, size = self._totals()
+        logger.debug(f"Кэш ответов LLM открыт: {self.cache_file} ({entries} записей, {size} байт)")
+
+    def _agent_fingerprint(self, agent: Agent) -> str:
+        """Возвращает неизменяемую часть ключа для агента (вычисляется один раз)"""
+        cached = self._fingerprints.get(id(agent))
+        if cached is not None and cached[0] is agent:
+            return cached[1]
+
+        model_name = getattr(agent.model, "model", agent.model)
+        output_type = agent.output_type
+        if isinstance(output_type, AgentOutputSchemaBase):
+            output_schema = output_type.json_schema()
+        elif isinstance(output_type, type) and issubclass(output_type, BaseModel):
+            output_schema = output_type.model_json_schema()
+        else:
+            output_schema = repr(output_type)
+
+        fingerprint = json.dumps(
+            {
+                "agent": agent.name,
+                "instructions": agent.instructions,
+                "model": str(model_name),
+                "output_schema": output_schema,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        self._fingerprints[id(agent)] = (agent, fingerprint)
+        return fingerprint
+
+    def make_key(self, agent: Agent, input: str, variant: int = 0) -> str:
+        """
+        Вычисляет ключ кэша для вызова агента
+
+        Args:
+            agent: Агент
+            input: Входной текст
+            variant: Номер повтора запроса (у повторов одного запроса разные ключи)
+
+        Returns:
+            str: Хэш запроса
+        """
+        digest = hashlib.sha256()
+        digest.update(self._agent_fingerprint(agent).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(input.encode("utf-8"))
+        if variant:
+            digest.update(f"\0{variant}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, agent: Agent, input: str, variant: int = 0) -> BaseModel | None:
+        """
+        Возвращает сохраненный ответ агента
+
+        Args:
+            agent: Агент
+            input: Входной текст
+            variant: Номер повтора запроса
+
+        Returns:
+            BaseModel | None: Ответ агента или None, если ответа нет в кэше
+        """
+        if self.bypass:
+            return None
+
+        key = self.make_key(agent, input, variant)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self._TOUCH_BATCH:
+                self._flush_touched()
+                self._connection.commit()
+
+        try:
+            if isinstance(agent.output_type, AgentOutputSchemaBase):
+                return agent.output_type.validate_json(row[0])
+            return agent.output_type.model_validate_json(row[0])  # type: ignore
+        except Exception as e:
+            logger.warning(f"Не удалось восстановить ответ {agent.name} из кэша: {e}")
+            return None
+
+    def set(self, agent: Agent, input: str, output: BaseModel, variant: int = 0) -> None:
+        """
+        Сохраняет ответ агента
+
+        Args:
+            agent: Агент
+            input: Входной текст
+            output: Структурированный ответ агента
+            variant: Номер повтора запроса
+        """
+        key = self.make_key(agent, input, variant)
+        payload = output.model_dump_json()
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            # Количество и размер записей читаются под блокировкой записи файла:
+            # другие процессы могли добавить записи после открытия кэша
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._flush_touched()
+                previous = self._connection.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, agent, payload, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, agent.name, payload, size, now, now),
+                )
+                self._connection.execute(
+                    "UPDATE totals SET entries = entries + ?, size = size + ? WHERE id = 0",
+                    (1, size) if previous is None else (0, size - previous[0]),
+                )
+
+                entries, total_size = self._totals()
+                if entries > self.max_entries or total_size > self.max_size_bytes:
+                    self._evict()
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+
+    def _flush_touched(self) -> None:
+        """Записывает время обращения к прочитанным записям (вызывается под блокировкой)"""
+        if not self._touched:
+            return
+        self._connection.executemany(
+            "UPDATE responses SET last_access = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        """Вытесняет давно не использованные записи (вызывается под блокировкой)"""
+        entries, size = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        target_entries = int(self.max_entries * self._EVICTION_TARGET)
+        target_size = int(self.max_size_bytes * self._EVICTION_TARGET)
+
+        to_delete = []
+        for key, entry_size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ):
+            if entries <= target_entries and size <= target_size:
+                break
+            to_delete.append((key,))
+            entries -= 1
+            size -= entry_size
+
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+        self._connection.execute(
+            "UPDATE totals SET entries = ?, size = ? WHERE id = 0", (entries, size)
+        )
+        logger.debug(f"Из кэша ответов LLM вытеснено {len(to_delete)} записей")
+
+    def _totals(self) -> tuple[int, int]:
+        """Возвращает количество и суммарный размер записей кэша"""
+        return self._connection.execute(
+            "SELECT entries, size FROM totals WHERE id = 0"
+        ).fetchone()
+
+    def clear(self) -> None:
+        """Удаляет все записи из кэша"""
+        with self._lock:
+            self._touched.clear()
+            self._connection.execute("DELETE FROM responses")
+            self._connection.execute("UPDATE totals SET entries = 0, size = 0 WHERE id = 0")
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Закрывает соединение с файлом кэша"""
+        with self._lock:
+            self._flush_touched()
+            self._connection.commit()
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._totals()[0]
+
+
+_default_cache: LLMResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_llm_cache() -> LLMResponseCache:
+    """
+    Возвращает общий для процесса кэш ответов LLM
+
+    Returns:
+        LLMResponseCache: Кэш с настройками по умолчанию
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache(bypass=LLM_CACHE_BYPASS)
+        return _default_cache
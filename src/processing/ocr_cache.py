@@ -0,0 +1,367 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import fitz
+
+from src.constants.general import OCR_CACHE_BYPASS, OCR_CACHE_FILE
+from src.constants.processing import OCR_CACHE_MAX_ENTRIES, OCR_CACHE_MAX_SIZE_MB
+from src.processing.ocr_words import OCRWords
+from src.processing.page_tables import PageTable
+from src.utils import logger
+
+if TYPE_CHECKING:
+    from src.processing.text_extraction import OCRConfig
+
+
+# Поля OCRConfig, не влияющие на текст страницы
+_CONFIG_FIELDS_IGNORED = ("max_workers", "chunk_size")
+
+
+@dataclasses.dataclass
+class CachedPage:
+    """
+    text       : текст страницы без разделителя PAGE_DIVIDER
+    source     : способ получения текста (PageSource)
+    words      : слова страницы (если сохранялись при распознавании)
+    tables     : таблицы страницы (если искались при распознавании)
+    dpi        : DPI, с которым распознана страница (None, если OCR не выполнялся)
+    confidence : средняя уверенность Tesseract по словам (только в адаптивном режиме)
+    """
+
+    text: str
+    source: str
+    words: OCRWords | None = None
+    tables: list[PageTable] | None = None
+    dpi: int | None = None
+    confidence: float | None = None
+
+
+class OCRPageCache:
+    """
+    Персистентный кэш текста страниц PDF.
+
+    Ключ страницы - SHA-256 от ее потока содержимого, потоков изображений,
+    размеров и поворота страницы, а также полей OCRConfig, влияющих на
+    распознавание. Одинаковые страницы разных документов (титульные листы,
+    повторяющиеся чертежи) распознаются один раз, а при смене конфигурации
+    или после сбоя заново обрабатываются только отсутствующие в кэше страницы.
+
+    Текст хранится в SQLite в сжатом zlib виде, при превышении лимитов
+    вытесняются записи, к которым дольше всего не обращались (LRU).
+    Количество и размер записей хранятся в файле кэша и обновляются в
+    транзакции записи, поэтому лимиты соблюдаются и при работе нескольких
+    процессов (шардов) с одним файлом. Слова
+    (OCRConfig.save_words) и таблицы (OCRConfig.extract_tables) страницы
+    хранятся в той же записи, поэтому кэш работает и при их извлечении.
+
+    Args:
+        cache_file: Путь к файлу кэша
+        max_entries: Максимальное количество записей
+        max_size_bytes: Максимальный суммарный размер сжатого текста в байтах
+        bypass: Не читать результаты из кэша (новые результаты при этом сохраняются)
+    """
+
+    # Доля лимита, до которой кэш очищается при переполнении
+    _EVICTION_TARGET = 0.9
+
+    def __init__(
+        self,
+        cache_file: Path = OCR_CACHE_FILE,
+        max_entries: int = OCR_CACHE_MAX_ENTRIES,
+        max_size_bytes: int = OCR_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        bypass: bool = False,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.bypass = bypass
+
+        self._lock = threading.Lock()
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self.cache_file, check_same_thread=False, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                words BLOB,
+                tables BLOB,
+                dpi INTEGER,
+                confidence REAL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(pages)")}
+        # Кэш, созданный до сохранения слов и таблиц
+        if "words" not in columns:
+            self._connection.execute("ALTER TABLE pages ADD COLUMN words BLOB")
+        if "tables" not in columns:
+            self._connection.execute("ALTER TABLE pages ADD COLUMN tables BLOB")
+        # Кэш, созданный до сохранения DPI и уверенности распознавания
+        if "dpi" not in columns:
+            self._connection.execute("ALTER TABLE pages ADD COLUMN dpi INTEGER")
+        if "confidence" not in columns:
+            self._connection.execute("ALTER TABLE pages ADD COLUMN confidence REAL")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        # Кэш, созданный до хранения количества и размера записей
+        self._connection.execute(
+            "INSERT OR IGNORE INTO totals (id, entries, size) "
+            "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+        )
+        self._connection.commit()
+
+        entries, size = self._totals()
+        logger.debug(f"Кэш OCR страниц открыт: {self.cache_file} ({entries} записей, {size} байт)")
+
+    @staticmethod
+    def config_fingerprint(config: "OCRConfig") -> str:
+        """
+        Возвращает часть ключа, зависящую от конфигурации OCR
+
+        Args:
+            config: Конфигурация OCR
+
+        Returns:
+            str: JSON полей конфигурации, влияющих на текст страницы
+        """
+        fields = {
+            name: value
+            for name, value in dataclasses.asdict(config).items()
+            if name not in _CONFIG_FIELDS_IGNORED
+        }
+        return json.dumps(fields, sort_keys=True)
+
+    def page_keys(self, document_path: Path, config: "OCRConfig") -> list[str]:
+        """
+        Вычисляет ключи кэша для всех страниц документа
+
+        Args:
+            document_path: Путь к PDF файлу
+            config: Конфигурация OCR
+
+        Returns:
+            list[str]: Ключи страниц в порядке страниц
+        """
+        fingerprint = self.config_fingerprint(config).encode("utf-8")
+        image_digests: dict[int, bytes] = {}
+        keys = []
+
+        with fitz.open(document_path) as pdf:
+            for page in pdf:
+                digest = hashlib.sha256(fingerprint)
+                digest.update(b"\0")
+                digest.update(f"{tuple(page.rect)}:{page.rotation}".encode("utf-8"))
+                digest.update(b"\0")
+                digest.update(page.read_contents())
+                for image in page.get_images(full=True):
+                    xref = image[0]
+                    # Одно изображение может использоваться на нескольких страницах
+                    if xref not in image_digests:
+                        image_digests[xref] = hashlib.sha256(
+                            pdf.xref_stream_raw(xref) or b""
+                        ).digest()
+                    digest.update(b"\0")
+                    digest.update(image_digests[xref])
+                keys.append(digest.hexdigest())
+
+        return keys
+
+    def get_many(self, keys: list[str]) -> dict[str, CachedPage]:
+        """
+        Возвращает сохраненные страницы
+
+        Args:
+            keys: Ключи страниц
+
+        Returns:
+            dict[str, CachedPage]: Страницы для найденных ключей
+        """
+        if self.bypass or not keys:
+            return {}
+
+        unique_keys = list(set(keys))
+        found: dict[str, CachedPage] = {}
+        with self._lock:
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i : i + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, source, payload, words, tables, dpi, confidence FROM pages "
+                    f"WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for key, source, payload, words, tables, dpi, confidence in rows:
+                    found[key] = CachedPage(
+                        text=zlib.decompress(payload).decode("utf-8"),
+                        source=source,
+                        words=OCRWords.from_bytes(words) if words is not None else None,
+                        tables=[
+                            PageTable(**table)
+                            for table in json.loads(zlib.decompress(tables).decode("utf-8"))
+                        ]
+                        if tables is not None
+                        else None,
+                        dpi=dpi,
+                        confidence=confidence,
+                    )
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE pages SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._connection.commit()
+
+        return found
+
+    def set_many(self, items: list[tuple[str, CachedPage]]) -> None:
+        """
+        Сохраняет страницы
+
+        Args:
+            items: Пары (ключ, страница)
+        """
+        if not items:
+            return
+
+        rows = []
+        for key, page in items:
+            payload = zlib.compress(page.text.encode("utf-8"))
+            words = page.words.to_bytes() if page.words is not None else None
+            tables = (
+                zlib.compress(
+                    json.dumps(
+                        [dataclasses.asdict(table) for table in page.tables], ensure_ascii=False
+                    ).encode("utf-8")
+                )
+                if page.tables is not None
+                else None
+            )
+            size = len(payload) + len(words or b"") + len(tables or b"")
+            rows.append(
+                (key, page.source, payload, words, tables, page.dpi, page.confidence, size)
+            )
+
+        now = time.time()
+        with self._lock:
+            # Количество и размер записей читаются под блокировкой записи файла:
+            # другие процессы могли добавить записи после открытия кэша
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                added_entries, added_size = 0, 0
+                for key, source, payload, words, tables, dpi, confidence, size in rows:
+                    previous = self._connection.execute(
+                        "SELECT size FROM pages WHERE key = ?", (key,)
+                    ).fetchone()
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO pages (key, source, payload, words, tables, "
+                        "dpi, confidence, size, created_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, source, payload, words, tables, dpi, confidence, size, now, now),
+                    )
+                    if previous is None:
+                        added_entries += 1
+                        added_size += size
+                    else:
+                        added_size += size - previous[0]
+                self._connection.execute(
+                    "UPDATE totals SET entries = entries + ?, size = size + ? WHERE id = 0",
+                    (added_entries, added_size),
+                )
+
+                entries, total_size = self._totals()
+                if entries > self.max_entries or total_size > self.max_size_bytes:
+                    self._evict()
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+
+    def _evict(self) -> None:
+        """Вытесняет давно не использованные записи (вызывается под блокировкой)"""
+        entries, size = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+        target_entries = int(self.max_entries * self._EVICTION_TARGET)
+        target_size = int(self.max_size_bytes * self._EVICTION_TARGET)
+
+        to_delete = []
+        for key, entry_size in self._connection.execute(
+            "SELECT key, size FROM pages ORDER BY last_access"
+        ):
+            if entries <= target_entries and size <= target_size:
+                break
+            to_delete.append((key,))
+            entries -= 1
+            size -= entry_size
+
+        self._connection.executemany("DELETE FROM pages WHERE key = ?", to_delete)
+        self._connection.execute(
+            "UPDATE totals SET entries = ?, size = ? WHERE id = 0", (entries, size)
+        )
+        logger.debug(f"Из кэша OCR страниц вытеснено {len(to_delete)} записей")
+
+    def _totals(self) -> tuple[int, int]:
+        """Возвращает количество и суммарный размер записей кэша"""
+        return self._connection.execute(
+            "SELECT entries, size FROM totals WHERE id = 0"
+        ).fetchone()
+
+    def clear(self) -> None:
+        """Удаляет все записи из кэша"""
+        with self._lock:
+            self._connection.execute("DELETE FROM pages")
+            self._connection.execute("UPDATE totals SET entries = 0, size = 0 WHERE id = 0")
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Закрывает соединение с файлом кэша"""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._totals()[0]
+
+
+_default_cache: OCRPageCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_ocr_cache() -> OCRPageCache:
+    """
+    Возвращает общий для процесса кэш OCR страниц
+
+    Returns:
+        OCRPageCache: Кэш с настройками по умолчанию
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = OCRPageCache(bypass=OCR_CACHE_BYPASS)
+        return _default_cache
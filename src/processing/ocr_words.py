@@ -0,0 +1,225 @@
+import csv
+import io
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import numpy as np
+
+
+# Целочисленные колонки TSV Tesseract, сохраняемые в файле слов
+_INT_COLUMNS = ("block", "par", "line", "word", "left", "top", "width", "height")
+
+
+def words_sidecar_path(text_path: Path) -> Path:
+    """
+    Возвращает путь к файлу слов для текстового файла документа
+
+    Args:
+        text_path: Путь к .txt файлу документа
+
+    Returns:
+        Path: Путь к файлу <stem>.words.npz рядом с .txt
+    """
+    return text_path.with_suffix(".words.npz")
+
+
+@dataclass
+class OCRWords:
+    """
+    Слова распознанного текста в колоночном виде (аналог TSV Tesseract).
+
+    Все массивы имеют одинаковую длину (по одному элементу на слово). Тексты
+    слов хранятся одним UTF-8 буфером со смещениями, поэтому файл загружается
+    без pickle и без разбора текста.
+
+    page   : номер страницы (начиная с 1)
+    dpi    : разрешение, в котором заданы координаты слова (72 - точки PDF
+             для слов из текстового слоя)
+    block, par, line, word : номера блока, абзаца, строки и слова по Tesseract
+    left, top, width, height : ограничивающий прямоугольник слова в пикселях
+    conf   : уверенность Tesseract (0-100, 100 для текстового слоя)
+    text_data    : UTF-8 буфер текстов всех слов
+    text_offsets : границы слов в text_data (длина на 1 больше числа слов)
+    """
+
+    page: np.ndarray
+    dpi: np.ndarray
+    block: np.ndarray
+    par: np.ndarray
+    line: np.ndarray
+    word: np.ndarray
+    left: np.ndarray
+    top: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    conf: np.ndarray
+    text_data: np.ndarray
+    text_offsets: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "OCRWords":
+        return cls.from_records([], page=0, dpi=0)
+
+    @classmethod
+    def from_records(
+        cls, records: list[tuple[int, int, int, int, int, int, int, int, float, str]], page: int, dpi: int
+    ) -> "OCRWords":
+        """
+        Создает таблицу слов одной страницы
+
+        Args:
+            records: Кортежи (block, par, line, word, left, top, width, height, conf, text)
+            page: Номер страницы (начиная с 1)
+            dpi: Разрешение, в котором заданы координаты
+
+        Returns:
+            OCRWords: Слова страницы
+        """
+        count = len(records)
+        columns = list(zip(*records)) if records else [()] * 10
+        encoded = [text.encode("utf-8") for text in columns[9]]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+        return cls(
+            page=np.full(count, page, dtype=np.int32),
+            dpi=np.full(count, dpi, dtype=np.int16),
+            **{
+                name: np.asarray(column, dtype=np.int32)
+                for name, column in zip(_INT_COLUMNS, columns[:8])
+            },
+            conf=np.asarray(columns[8], dtype=np.float32),
+            text_data=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            text_offsets=offsets,
+        )
+
+    @classmethod
+    def from_tsv(cls, tsv: str, page: int, dpi: int) -> "OCRWords":
+        """
+        Создает таблицу слов страницы из TSV Tesseract (строки без слов пропускаются)
+
+        Args:
+            tsv: Вывод Tesseract в формате TSV
+            page: Номер страницы (начиная с 1)
+            dpi: Разрешение изображения, переданного Tesseract
+
+        Returns:
+            OCRWords: Слова страницы
+        """
+        records = []
+        reader = csv.DictReader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            text = (row.get("text") or "").strip()
+            conf = float(row.get("conf") or -1)
+            if not text or conf < 0:
+                continue
+            records.append(
+                (
+                    int(row["block_num"]),
+                    int(row["par_num"]),
+                    int(row["line_num"]),
+                    int(row["word_num"]),
+                    int(row["left"]),
+                    int(row["top"]),
+                    int(row["width"]),
+                    int(row["height"]),
+                    conf,
+                    text,
+                )
+            )
+        return cls.from_records(records, page=page, dpi=dpi)
+
+    @classmethod
+    def concat(cls, tables: list["OCRWords"]) -> "OCRWords":
+        """Объединяет таблицы слов (например, страниц документа) в одну"""
+        if not tables:
+            return cls.empty()
+
+        offsets = [tables[0].text_offsets]
+        shift = tables[0].text_offsets[-1]
+        for table in tables[1:]:
+            offsets.append(table.text_offsets[1:] + shift)
+            shift += table.text_offsets[-1]
+
+        columns = {
+            field.name: np.concatenate([getattr(table, field.name) for table in tables])
+            for field in fields(cls)
+            if field.name != "text_offsets"
+        }
+        return cls(**columns, text_offsets=np.concatenate(offsets))
+
+    @property
+    def words(self) -> list[str]:
+        """Тексты слов"""
+        data = self.text_data.tobytes()
+        offsets = self.text_offsets.tolist()
+        return [
+            data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])
+        ]
+
+    def for_page(self, page: int) -> "OCRWords":
+        """
+        Возвращает слова одной страницы
+
+        Args:
+            page: Номер страницы (начиная с 1)
+
+        Returns:
+            OCRWords: Слова страницы
+        """
+        indices = np.flatnonzero(self.page == page)
+        if not len(indices):
+            return self.empty()
+
+        # Слова страницы идут подряд, поэтому достаточно среза
+        start, stop = int(indices[0]), int(indices[-1]) + 1
+        text_start = self.text_offsets[start]
+        return OCRWords(
+            **{
+                field.name: getattr(self, field.name)[start:stop]
+                for field in fields(self)
+                if field.name not in ("text_data", "text_offsets")
+            },
+            text_data=self.text_data[text_start : self.text_offsets[stop]],
+            text_offsets=self.text_offsets[start : stop + 1] - text_start,
+        )
+
+    def to_bytes(self) -> bytes:
+        """Возвращает таблицу слов в формате сжатого .npz файла"""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer, **{field.name: getattr(self, field.name) for field in fields(self)}
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OCRWords":
+        """Восстанавливает таблицу слов, сохраненную to_bytes"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(**{field.name: arrays[field.name] for field in fields(cls)})
+
+    def save(self, path: Path) -> None:
+        """
+        Сохраняет таблицу слов в сжатый .npz файл
+
+        Args:
+            path: Путь к файлу
+        """
+        path.write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Path) -> "OCRWords":
+        """
+        Загружает таблицу слов из .npz файла
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            OCRWords: Таблица слов
+        """
+        return cls.from_bytes(path.read_bytes())
+
+    def __len__(self):
+        return len(self.page)
@@ -0,0 +1,251 @@
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from src.processing.prefilter import PARAMETER_UNITS
+from src.processing.schemas import (
+    BioinfAgentResults,
+    InteractionParameters,
+    LigandProteinInteraction,
+)
+
+
+def tables_sidecar_path(text_path: Path) -> Path:
+    """
+    Возвращает путь к файлу таблиц для текстового файла документа
+
+    Args:
+        text_path: Путь к .txt файлу документа
+
+    Returns:
+        Path: Путь к файлу <stem>.tables.json рядом с .txt
+    """
+    return text_path.with_suffix(".tables.json")
+
+
+@dataclass
+class PageTable:
+    """
+    page   : номер страницы (начиная с 1)
+    header : заголовки столбцов
+    rows   : строки таблицы (по одной ячейке на столбец, пустая строка - пустая ячейка)
+    source : способ получения текста таблицы (PageSource)
+    """
+
+    page: int
+    header: list[str]
+    rows: list[list[str]]
+    source: str
+
+    @property
+    def records(self) -> list[dict[str, str]]:
+        """Строки таблицы в виде словарей {заголовок столбца: значение ячейки}"""
+        return [dict(zip(self.header, row)) for row in self.rows]
+
+
+def save_tables(tables: list[PageTable], path: Path) -> None:
+    """
+    Сохраняет таблицы документа в JSON файл
+
+    Args:
+        tables: Таблицы документа
+        path: Путь к файлу
+    """
+    tables = sorted(tables, key=lambda table: table.page)
+    path.write_text(
+        json.dumps([asdict(table) for table in tables], ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+def load_tables(path: Path) -> list[PageTable]:
+    """
+    Загружает таблицы документа из JSON файла
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        list[PageTable]: Таблицы документа в порядке страниц
+    """
+    return [PageTable(**table) for table in json.loads(path.read_text(encoding="utf-8"))]
+
+
+# Параметр взаимодействия в заголовке столбца и тип взаимодействия для него
+_PARAMETER_HEADERS = {
+    "Ki": (re.compile(r"\bK\s?i\b"), "inhibition"),
+    "IC50": (re.compile(r"\bIC\s?50\b", re.IGNORECASE), "inhibition"),
+    "Kd": (re.compile(r"\bK\s?[dD]\b"), "binding"),
+    "EC50": (re.compile(r"\bEC\s?50\b", re.IGNORECASE), "activity"),
+}
+_COMPOUND_HEADER = re.compile(
+    r"^(?:compound|cpd|example|ex|entry|ligand|inhibitor|no)\b", re.IGNORECASE
+)
+_TARGET_HEADER = re.compile(r"^(?:target|protein|enzyme|kinase|receptor)\b", re.IGNORECASE)
+# Обозначение белка в заголовке столбца параметра: одно слово, в котором не меньше
+# двух заглавных букв или цифр (JAK1, EGFR, hERG, CDK4/6, 5-HT2A). Остаток заголовка
+# из обычных слов ("Kinase inhibition IC50") белком не считается
+_PROTEIN_SYMBOL = re.compile(r"^(?=(?:[^A-Z0-9]*[A-Z0-9]){2})[\w/\-]+$")
+_UNIT_PATTERN = re.compile(rf"({PARAMETER_UNITS})")
+# Точное значение ячейки: число (запятая - разделитель тысяч), за которым может
+# следовать единица измерения. Значения с неравенствами (<1, >10000) и диапазоны
+# не являются точными
+_VALUE_PATTERN = re.compile(
+    rf"^((?:\d{{1,3}}(?:,\d{{3}})+|\d+)(?:\.\d+)?)\s*({PARAMETER_UNITS})?$"
+)
+# Множители для приведения концентраций к нМ (единица таблиц BindingDB)
+_UNIT_TO_NM = {"pM": 1e-3, "nM": 1.0, "μM": 1e3, "µM": 1e3, "uM": 1e3, "mM": 1e6}
+
+
+@dataclass
+class _ParameterColumn:
+    """
+    index     : индекс столбца
+    parameter : имя параметра (поле InteractionParameters)
+    protein   : белок из заголовка столбца (пустая строка, если не указан
+                или остаток заголовка не похож на обозначение белка)
+    unit      : единица измерения из заголовка столбца
+    """
+
+    index: int
+    parameter: str
+    protein: str
+    unit: str | None
+
+
+class AffinityTableReader:
+    """
+    Чтение взаимодействий из таблиц аффинности без обращения к LLM.
+
+    Таблица считается таблицей аффинности, если в ней есть столбец соединений
+    и хотя бы один столбец с параметром (Ki, IC50, Kd, EC50) в заголовке.
+    Белок берется из обозначения белка в заголовке столбца параметра
+    ("JAK1 IC50 (nM)") или из столбца мишени. Значения приводятся к нМ,
+    неточные значения (<1, >10000, буквенные диапазоны активности)
+    пропускаются. Если белок определить не удалось (например, в заголовке
+    "Kinase inhibition IC50" белок не указан), таблица не читается,
+    и страница обрабатывается агентами.
+    """
+
+    def read(self, table: PageTable) -> list[LigandProteinInteraction]:
+        """
+        Извлекает взаимодействия из таблицы
+
+        Args:
+            table: Таблица страницы
+
+        Returns:
+            list[LigandProteinInteraction]: Взаимодействия (пустой список,
+            если таблица не является таблицей аффинности)
+        """
+        header = [" ".join(cell.split()) for cell in table.header]
+        compound_idx = next(
+            (idx for idx, name in enumerate(header) if _COMPOUND_HEADER.match(name)), None
+        )
+        target_idx = next(
+            (idx for idx, name in enumerate(header) if _TARGET_HEADER.match(name)), None
+        )
+        columns = [
+            column
+            for idx, name in enumerate(header)
+            if idx not in (compound_idx, target_idx)
+            and (column := self._parameter_column(idx, name)) is not None
+        ]
+        if compound_idx is None or not columns:
+            return []
+        if target_idx is None and not all(column.protein for column in columns):
+            return []
+
+        interactions = []
+        for row in table.rows:
+            ligand = self._ligand_name(header[compound_idx], row[compound_idx])
+            if not ligand:
+                continue
+
+            # Параметры одного соединения и белка объединяются в одно взаимодействие
+            by_protein: dict[str, dict[str, float]] = {}
+            for column in columns:
+                value = self._parse_value(row[column.index], column.unit)
+                protein = column.protein or row[target_idx].strip()  # type: ignore[index]
+                if value is not None and protein:
+                    by_protein.setdefault(protein, {})[column.parameter] = value
+
+            context = "; ".join(
+                f"{name}: {cell}" for name, cell in zip(header, row) if cell.strip()
+            )
+            for protein, values in by_protein.items():
+                interaction_type = _PARAMETER_HEADERS[next(iter(values))][1]
+                interactions.append(
+                    LigandProteinInteraction(
+                        ligand=ligand,
+                        protein=protein,
+                        interaction_type=interaction_type,
+                        context=context,
+                        parameters=InteractionParameters(
+                            Ki=values.get("Ki"),
+                            IC50=values.get("IC50"),
+                            Kd=values.get("Kd"),
+                            EC50=values.get("EC50"),
+                        ),
+                    )
+                )
+        return interactions
+
+    def read_pages(self, tables: list[PageTable]) -> dict[int, BioinfAgentResults]:
+        """
+        Извлекает взаимодействия из таблиц по страницам
+
+        Args:
+            tables: Таблицы документа
+
+        Returns:
+            dict[int, BioinfAgentResults]: Взаимодействия страниц, на которых
+            прочитана хотя бы одна таблица аффинности
+        """
+        results: dict[int, BioinfAgentResults] = {}
+        for table in tables:
+            interactions = self.read(table)
+            if interactions:
+                results.setdefault(table.page, BioinfAgentResults(interactions=[]))
+                results[table.page].interactions.extend(interactions)
+        return results
+
+    @staticmethod
+    def _parameter_column(index: int, name: str) -> _ParameterColumn | None:
+        """Разбирает заголовок столбца параметра (None, если параметра в заголовке нет)"""
+        for parameter, (pattern, _) in _PARAMETER_HEADERS.items():
+            match = pattern.search(name)
+            if match is None:
+                continue
+            unit = _UNIT_PATTERN.search(name)
+            protein = name[: match.start()] + " " + name[match.end() :]
+            if unit is not None:
+                protein = protein.replace(unit.group(1), " ")
+            protein = " ".join(re.sub(r"[()\[\],:]", " ", protein).split())
+            return _ParameterColumn(
+                index=index,
+                parameter=parameter,
+                protein=protein if _PROTEIN_SYMBOL.match(protein) else "",
+                unit=unit.group(1) if unit is not None else None,
+            )
+        return None
+
+    @staticmethod
+    def _ligand_name(header: str, cell: str) -> str:
+        """Возвращает имя лиганда: номера соединений дополняются заголовком столбца"""
+        cell = " ".join(cell.split())
+        if cell and cell[0].isdigit() and header:
+            return f"{header.split()[0].capitalize()} {cell}"
+        return cell
+
+    @staticmethod
+    def _parse_value(cell: str, unit: str | None) -> float | None:
+        """Разбирает точное значение ячейки и приводит его к нМ"""
+        match = _VALUE_PATTERN.match(cell.strip())
+        if match is None:
+            return None
+        unit = match.group(2) or unit
+        if unit is None:
+            return None
+        return float(match.group(1).replace(",", "")) * _UNIT_TO_NM[unit]
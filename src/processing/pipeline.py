@@ -1,73 +1,40 @@
+import asyncio
+import json
+import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-
-from pydantic import BaseModel
-from agents import Agent, RunResult, Runner, ModelBehaviorError
-from src.processing.llm_models import DEFAULT_MODEL
+from typing import Generator, Iterable
+
+from src.constants.processing import (
+    LLM_MAX_CONCURRENCY,
+    PAGES_FSYNC_BATCH,
+    SEARCHER_BATCH_MAX_SYMBOLS,
+    SEARCHER_BATCH_SIZE,
+)
+from src.processing.agent_suite import AgentSuite, get_default_agent_suite
+from src.processing.page_tables import (
+    AffinityTableReader,
+    PageTable,
+    load_tables,
+    tables_sidecar_path,
+)
+from src.processing.prefilter import ParametersPrefilter, PrefilterStats
+from src.processing.schemas import (  # noqa: F401 - реэкспорт для совместимости с pickle
+    BioinfAgentResults,
+    InteractionParameters,
+    LigandProteinInteraction,
+    SearcherAgentResults,
+    SupervisorAgentResults,
+)
 from src.processing.txt_reader import Page, TxtDocument
+from src.storage import CorpusStore, document_name, get_default_corpus_store
 from src.utils import logger
 from openai import OpenAI
 
 llama_client = OpenAI(base_url="http://80.209.242.40:8000/", api_key="dummy-key")
 
 
-class SearcherAgentResults(BaseModel):
-    """
-    does_contain_interactions : содержит ли текст взаимодействия
-    accuracy                  : уверенность в ответе
-    """
-    
-    does_contain_interactions: bool
-    accuracy: float
-
-
-class InteractionParameters(BaseModel):
-    """
-    Ki   : константа ингибирования
-    IC50 : концентрация вещества, при которой наблюдается 50% ингибирование активности
-    Kd   : константа диссоциации комплекса лиганда и белка
-    EC50 : концентрация, вызывающая 50% максимального эффекта
-    """
-
-    Ki: float | None
-    IC50: float | None
-    Kd: float | None
-    EC50: float | None
-
-
-class LigandProteinInteraction(BaseModel):
-    """
-    ligand            : название лиганда
-    protein           : название белка
-    interaction_type  : тип взаимодействия
-    context           : контекст взаимодействия
-    parameters        : параметры взаимодействия
-    """
-    ligand: str
-    protein: str
-    interaction_type: str
-    context: str
-    parameters: InteractionParameters
-
-
-class BioinfAgentResults(BaseModel):
-    """
-    interactions : список взаимодействий
-    """
-    interactions: list[LigandProteinInteraction]
-
-
-class SupervisorAgentResults(BaseModel):
-    """
-    is_correct   : корректность результата
-    fixable      : можно ли исправить результат
-    explanation  : объяснение
-    """
-    is_correct: bool
-    fixable: bool
-    explanation: str | None
-
-
 @dataclass
 class Pagedata:
     """
@@ -81,14 +48,25 @@ class Pagedata:
 @dataclass
 class PipelineResult:
     """
-    interactions : список страниц с результатами обработки
+    interactions   : список страниц с результатами обработки
+    prefilter_stats: статистика префильтра страниц
     """
     interactions: list[Pagedata]
+    prefilter_stats: PrefilterStats | None = None
 
 
 class Pipeline:
     def __init__(
-        self, txt_document: TxtDocument, output_dir: Path
+        self,
+        txt_document: TxtDocument,
+        output_dir: Path,
+        use_prefilter: bool = True,
+        agent_suite: AgentSuite | None = None,
+        searcher_batch_size: int = SEARCHER_BATCH_SIZE,
+        use_tables: bool = True,
+        store: CorpusStore | None = None,
+        page_query: str | None = None,
+        resume: bool = True,
     ):
         """
         Инициализация Pipeline
@@ -96,6 +74,21 @@ class Pipeline:
         Args:
             txt_document: Текстовый документ
             output_dir: Директория для сохранения результатов
+            use_prefilter: Отсеивать страницы без параметров взаимодействий до вызова агента-поиска
+            agent_suite: Набор агентов (по умолчанию общий набор процесса)
+            searcher_batch_size: Количество коротких страниц в одном запросе к агенту-поиска
+            use_tables: Брать взаимодействия страниц с таблицами аффинности из файла
+                таблиц документа (<stem>.tables.json) без вызова агентов
+            store: Хранилище корпуса, в которое записываются взаимодействия
+                документа после обработки (None - не записывать)
+            page_query: Поисковая строка для отбора страниц по полнотекстовому
+                индексу корпуса (например, "CDK9 IC50"). Страницы, не содержащие
+                всех слов запроса, не передаются агентам. Если страниц документа
+                нет в индексе, обрабатываются все страницы
+            resume: Продолжить обработку документа с необработанных страниц.
+                Результаты страниц записываются по мере получения в файл
+                <output_dir>/<имя документа>.pages.jsonl, который удаляется
+                после сборки результата документа
         """
         if not isinstance(txt_document, TxtDocument):
             logger.error("txt_document must be an instance of TxtDocument")
@@ -104,143 +97,302 @@ class Pipeline:
         logger.info(f"Инициализация Pipeline для документа: {txt_document}")
         self.txt_document = txt_document
         self.output_dir = output_dir
+        self.prefilter = ParametersPrefilter() if use_prefilter else None
+        self.prefilter_stats = PrefilterStats()
+        self.agent_suite = agent_suite or get_default_agent_suite()
+        self.searcher_batch_size = max(1, searcher_batch_size)
+        self.table_reader = AffinityTableReader() if use_tables else None
+        # Взаимодействия, прочитанные из таблиц, по номерам страниц
+        self.table_results: dict[int, BioinfAgentResults] = {}
+        self.store = store
+        self.progress_path = output_dir / f"{txt_document.name}.pages.jsonl"
+        # Сохраненные результаты страниц: номер страницы -> (число символов
+        # страницы, результат или None, если взаимодействий на странице нет)
+        self.saved_pages: dict[int, tuple[int, BioinfAgentResults | None]] = {}
+        # Файл результатов страниц открыт до сборки результата документа,
+        # на диск он сбрасывается пакетами по PAGES_FSYNC_BATCH страниц
+        self._progress_file = None
+        self._unsynced_pages = 0
+        self._progress_lock = threading.Lock()
+        if resume:
+            self.saved_pages = self._load_progress()
+        elif self.progress_path.exists():
+            self.progress_path.unlink()
+        # Номера страниц, отобранных по индексу (None - отбор не выполняется)
+        self.candidate_pages: set[int] | None = None
+        if page_query:
+            index = store or get_default_corpus_store()
+            self.candidate_pages = index.candidate_pages(
+                document_name(txt_document.path), page_query
+            )
+            if self.candidate_pages is None:
+                logger.warning(
+                    f"Документа {txt_document.name} нет в индексе корпуса, "
+                    f"страницы не отбираются по запросу \"{page_query}\""
+                )
+            else:
+                logger.info(
+                    f"По запросу \"{page_query}\" в документе {txt_document.name} "
+                    f"отобрано страниц: {len(self.candidate_pages)}"
+                )
 
-        self.runner = Runner()
-
-        self.searcher_agent = Agent(
-            name="SearcherAgent",
-            instructions="""
-            You are an expert in the field of bioinformatics.
-            You are given a text and you need to determine if it contains any ligand-protein interactions.
-            One of the most important things is to determine if there are any parameters of the interactions like Ki, IC50, Kd, EC50.
-            If there are, you need to return True.
-            You need to return a boolean value and a confidence score.
-            Confidence score is a number between 0 and 1, where 1 means 100% confidence that the text contains ligand-protein interactions.
-            If you are not sure, return 0.5.
-            """,
-            model=DEFAULT_MODEL,
-            output_type=SearcherAgentResults,
-        )
+        tables_path = tables_sidecar_path(txt_document.path)
+        if self.table_reader is not None and tables_path.exists():
+            try:
+                self.add_tables(load_tables(tables_path))
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать таблицы {tables_path}: {e}")
 
-        self.bioinf_agent = Agent(
-            name="BioinfAgent",
-            instructions="""
-            You are a bioinformatics expert.
-            You are given a text and you need to extract all mentions of ligand-protein interactions.
-            For each interaction, you need to specify:
-            - The parameters of the interaction (Ki, IC50, Kd, EC50) (some could be missing)
-            - The name or identifier of the ligand
-            - The name or identifier of the protein
-            - A description of the type of interaction (e.g., binding, inhibition, etc.)
-            - The context or a quote from the text where this interaction is described
-            Note that parameters HAVE TO BE taken from the text, and not calculated or imagined!
-            """,
-            model=DEFAULT_MODEL,
-            output_type=BioinfAgentResults,
-        )
+    def add_tables(self, tables: list[PageTable]) -> None:
+        """
+        Читает взаимодействия из таблиц страниц.
 
-        self.supervisor_agent = Agent(
-            name="SupervisorAgent",
-            instructions="""
-            You are a very strict supervisor of the BioinfAgent.
-            You are given a text and structured output of the BioinfAgent, which is a list of ligand-protein interactions.
-            You need to check the output correctness and provide an explanation for your decision.
-            If output could be easily fixed, note that in the fixable field.
-            Correctness means:
-            - No mentions of patent numbers, dates, etc., and other non-biological information
-            - All ligands and proteins are mentioned are correct.
-            - No usage of don't know, unknown, etc.
-            - Note that some parameters could be missing, but not all of them
-            """,
-            model=DEFAULT_MODEL,
-            output_type=SupervisorAgentResults,
-        )
+        Страницы, на которых прочитана хотя бы одна таблица аффинности,
+        не передаются агентам: их результат берется из таблиц.
 
-        self.fix_agent = Agent(
-            name="FixAgent",
-            instructions="""
-            You are a fixer of the BioinfAgent.
-            You are given a text and structured output of the BioinfAgent and a decision of the SupervisorAgent.
-            You need to fix the output based on the explanation of the SupervisorAgent.
-            """,
-            model=DEFAULT_MODEL,
-            output_type=BioinfAgentResults,
-        )
-        
-    def use_runner_safely(self, agent: Agent, input: str, max_attempts: int = 3) -> RunResult:
-        try:
-            return self.runner.run_sync(agent, input)
-        except ModelBehaviorError as e:
-            logger.error(f"Модель некорректно сформировала ответ: {e}")
-            if max_attempts > 0:
-                return self.use_runner_safely(agent, input, max_attempts - 1)
-            else:
-                raise e
-
-    def review_bioinf_agent(self, page: Page, result: BioinfAgentResults):
-        repeates = 2
-        for i in range(repeates):
-            logger.debug(f"Запуск агента-супервайзера (проход {i + 1}/{repeates})")
-            supervisor_result = self.use_runner_safely(
-                self.supervisor_agent, f"{page.text}\n\n{result}"
-            )
+        Args:
+            tables: Таблицы страниц документа
+        """
+        if self.table_reader is None or not tables:
+            return
+
+        for number, result in self.table_reader.read_pages(tables).items():
+            self.table_results[number] = result
             logger.debug(
-                f"Агент-супервайзер завершил обработку страницы. Результат: {supervisor_result.final_output}"
+                f"На странице {number} из таблиц прочитано {len(result.interactions)} "
+                f"взаимодействий. Агенты не запускаются"
             )
 
-            supervisor_decision: SupervisorAgentResults = supervisor_result.final_output
+    def _load_progress(self) -> dict[int, tuple[int, BioinfAgentResults | None]]:
+        """Загружает результаты страниц, сохраненные до прерывания обработки"""
+        if not self.progress_path.exists():
+            return {}
+
+        saved = {}
+        with open(self.progress_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    result = record["result"]
+                    saved[record["page"]] = (
+                        record["symbols"],
+                        BioinfAgentResults.model_validate(result) if result is not None else None,
+                    )
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    # Неполная запись в конце файла (процесс завершился во время записи)
+                    continue
 
-            if not supervisor_decision.is_correct:
-                logger.debug(
-                    f"Результат некорректен: {supervisor_decision.explanation}\n\nInteractions: {result}"
-                )
+        if saved:
+            logger.info(
+                f"Обработка документа {self.txt_document.name} продолжается: "
+                f"сохранены результаты {len(saved)} страниц"
+            )
+        return saved
 
-                if supervisor_decision.fixable:
-                    logger.debug("Запуск агента-исправления")
-                    fix_result = self.use_runner_safely(
-                        self.fix_agent,
-                        f"{page.text}\n\n{result}\n\n{supervisor_decision.explanation}",
-                    )
-                    logger.debug("Агент-исправления завершил обработку страницы")
-                    return self.review_bioinf_agent(page, fix_result.final_output)
-                else:
-                    return None
+    def is_page_saved(self, page: Page) -> bool:
+        """Проверяет, что результат страницы сохранен (и текст страницы не изменился)"""
+        saved = self.saved_pages.get(page.number)
+        return saved is not None and saved[0] == page.symbols_count
 
-        return result
+    def record_page(self, page: Page, result: BioinfAgentResults | None) -> None:
+        """
+        Сохраняет результат страницы, чтобы не обрабатывать ее повторно
+        после прерывания обработки.
+
+        Запись передается ОС сразу, а fsync выполняется пакетами
+        по PAGES_FSYNC_BATCH страниц и при закрытии файла (close_progress).
+
+        Args:
+            page: Обработанная страница
+            result: Взаимодействия страницы (None, если взаимодействий нет)
+        """
+        record = {
+            "page": page.number,
+            "symbols": page.symbols_count,
+            "result": result.model_dump() if result is not None else None,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._progress_lock:
+            if self._progress_file is None:
+                self.progress_path.parent.mkdir(parents=True, exist_ok=True)
+                self._progress_file = open(self.progress_path, "a", encoding="utf-8")
+            self._progress_file.write(line)
+            self._progress_file.flush()
+            self._unsynced_pages += 1
+            if self._unsynced_pages >= PAGES_FSYNC_BATCH:
+                os.fsync(self._progress_file.fileno())
+                self._unsynced_pages = 0
+            self.saved_pages[page.number] = (page.symbols_count, result)
+
+    async def arecord_page(self, page: Page, result: BioinfAgentResults | None) -> None:
+        """Асинхронный вариант record_page (запись выполняется вне цикла событий)"""
+        await asyncio.to_thread(self.record_page, page, result)
+
+    def close_progress(self, sync: bool = True) -> None:
+        """
+        Закрывает файл результатов страниц
+
+        Args:
+            sync: Сбросить на диск результаты страниц, записанные после последнего fsync
+        """
+        with self._progress_lock:
+            if self._progress_file is None:
+                return
+            if sync and self._unsynced_pages:
+                os.fsync(self._progress_file.fileno())
+            self._progress_file.close()
+            self._progress_file = None
+            self._unsynced_pages = 0
+
+    def passes_prefilter(self, page: Page) -> bool:
+        """
+        Проверяет страницу префильтром без обращения к LLM
+
+        Args:
+            page: Страница для проверки
+
+        Returns:
+            bool: True, если страницу нужно передать агенту-поиска
+        """
+        if self.prefilter is None:
+            return True
+
+        if self.prefilter.check_page(page, self.prefilter_stats):
+            return True
 
-    def search_interactions(self, page: Page) -> BioinfAgentResults:
-        logger.debug("Запуск агента-биоинформатика")
-        result = self.use_runner_safely(self.bioinf_agent, page.text)
         logger.debug(
-            f"Агент-биоинформатик завершил обработку страницы. Найдено {len(result.final_output.interactions)} взаимодействий"
+            f"Префильтр не обнаружил параметров взаимодействий на странице {page.number}. Агент-поиска не запускается"
         )
-        return result.final_output
+        return False
 
     def should_search_interactions(self, page: Page) -> bool:
-        logger.debug("Запуск агента-поиска")
-        result = self.use_runner_safely(self.searcher_agent, page.text)
-        logger.debug("Агент-поиска завершил обработку страницы")
+        if not self.passes_prefilter(page):
+            return False
 
-        decision: SearcherAgentResults = result.final_output
-        decision_text = (
-            "Содержит" if decision.does_contain_interactions else "Не содержит"
-        )
-        if not decision.does_contain_interactions or decision.accuracy < 0.5:
-            logger.debug(
-                f"Агент-поиска не обнаружил взаимодействий на странице {page.number}. Решение агента: {decision_text}, уверенность: {decision.accuracy * 100}%"
-            )
+        return self.agent_suite.should_search_interactions(page)
+
+    async def ashould_search_interactions(self, page: Page) -> bool:
+        """Асинхронный вариант should_search_interactions"""
+        if not self.passes_prefilter(page):
             return False
-        
-        logger.debug(f"Агент-поиска обнаружил взаимодействия на странице {page.number}. Решение агента: {decision_text}, уверенность: {decision.accuracy * 100}%")
-        return True
+
+        return await self.agent_suite.ashould_search_interactions(page)
+
+    def iter_batches(self, pages: Iterable[Page]) -> Generator[list[Page], None, None]:
+        """
+        Разбивает поток страниц на пакеты для агента-поиска.
+
+        Страницы, не отобранные по индексу (page_query), уже обработанные до
+        прерывания, отсеянные префильтром или прочитанные из таблиц, в пакеты
+        не попадают. Короткие страницы
+        объединяются в пакеты по searcher_batch_size, длинные классифицируются по одной.
+        Пакет отдается, как только он заполнен, поэтому страницы могут поступать
+        по мере извлечения текста.
+
+        Args:
+            pages: Страницы в порядке поступления
+
+        Yields:
+            list[Page]: Пакеты страниц
+        """
+        current: list[Page] = []
+        for page in pages:
+            if self.candidate_pages is not None and page.number not in self.candidate_pages:
+                continue
+            if self.is_page_saved(page):
+                continue
+            if page.number in self.table_results or not self.passes_prefilter(page):
+                continue
+
+            if page.symbols_count > SEARCHER_BATCH_MAX_SYMBOLS:
+                yield [page]
+                continue
+
+            current.append(page)
+            if len(current) >= self.searcher_batch_size:
+                yield current
+                current = []
+
+        if current:
+            yield current
+
+    def plan_batches(self) -> list[list[int]]:
+        """
+        Разбивает страницы документа на пакеты для агента-поиска (см. iter_batches)
+
+        Returns:
+            list[list[int]]: Пакеты индексов страниц документа
+        """
+        # Страницы ленивого документа создаются при каждом обращении,
+        # поэтому позиции определяются по номерам страниц
+        positions = {page.number: idx for idx, page in enumerate(self.txt_document.pages)}
+        return [
+            [positions[page.number] for page in batch]
+            for batch in self.iter_batches(self.txt_document.pages)
+        ]
+
+    def classify_batch(self, batch: list[int]) -> list[bool]:
+        """
+        Определяет, какие страницы пакета нужно передать агенту-биоинформатику
+
+        Args:
+            batch: Индексы страниц документа
+
+        Returns:
+            list[bool]: Решения агента-поиска в порядке страниц пакета
+        """
+        return self.classify_pages([self.txt_document.pages[idx] for idx in batch])
+
+    async def aclassify_batch(self, batch: list[int]) -> list[bool]:
+        """Асинхронный вариант classify_batch"""
+        return await self.aclassify_pages([self.txt_document.pages[idx] for idx in batch])
+
+    def classify_pages(self, pages: list[Page]) -> list[bool]:
+        """
+        Определяет, какие страницы пакета нужно передать агенту-биоинформатику
+
+        Args:
+            pages: Страницы пакета
+
+        Returns:
+            list[bool]: Решения агента-поиска в порядке страниц пакета
+        """
+        return self.agent_suite.should_search_interactions_batch(pages)
+
+    async def aclassify_pages(self, pages: list[Page]) -> list[bool]:
+        """Асинхронный вариант classify_pages"""
+        return await self.agent_suite.ashould_search_interactions_batch(pages)
+
+    def extract_page(self, page: Page) -> BioinfAgentResults | None:
+        """
+        Извлекает и проверяет взаимодействия на странице
+
+        Args:
+            page: Страница, отобранная агентом-поиска
+
+        Returns:
+            BioinfAgentResults | None: Взаимодействия или None, если результат некорректен
+        """
+        interactions = self.agent_suite.search_interactions(page)
+        return self.agent_suite.review_bioinf_agent(page, interactions)
+
+    async def aextract_page(self, page: Page) -> BioinfAgentResults | None:
+        """Асинхронный вариант extract_page"""
+        interactions = await self.agent_suite.asearch_interactions(page)
+        return await self.agent_suite.areview_bioinf_agent(page, interactions)
 
     def process_page(self, page: Page):
         if not self.should_search_interactions(page):
             return None
 
-        interactions = self.search_interactions(page)
-        result = self.review_bioinf_agent(page, interactions)
-        return result
+        return self.extract_page(page)
+
+    async def aprocess_page(self, page: Page):
+        """Асинхронный вариант process_page"""
+        if not await self.ashould_search_interactions(page):
+            return None
+
+        return await self.aextract_page(page)
 
     def run(self) -> PipelineResult:
         """
@@ -250,10 +402,86 @@ class Pipeline:
             PipelineResult: Результат обработки документа
         """
         
+        self.prefilter_stats = PrefilterStats()
+        total = len(self.txt_document)
+        page_results: list[BioinfAgentResults | None] = [None] * total
+        try:
+            for batch in self.plan_batches():
+                for idx, should_search in zip(batch, self.classify_batch(batch)):
+                    page = self.txt_document.pages[idx]
+                    if should_search:
+                        logger.info(f"Обработка страницы {idx + 1}/{total}")
+                        page_results[idx] = self.extract_page(page)
+                    self.record_page(page, page_results[idx])
+        except BaseException:
+            self.close_progress()
+            raise
+
+        return self.build_result(page_results)
+
+    async def arun(self, max_concurrency: int = LLM_MAX_CONCURRENCY) -> PipelineResult:
+        """
+        Асинхронный запуск обработки документа с параллельной обработкой страниц.
+
+        Пакеты страниц и отобранные страницы обрабатываются конкурентно, но не
+        более max_concurrency запросов одновременно. Порядок страниц в результате
+        совпадает с порядком страниц в документе.
+
+        Args:
+            max_concurrency: Максимальное число одновременных запросов к LLM
+
+        Returns:
+            PipelineResult: Результат обработки документа
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+
+        self.prefilter_stats = PrefilterStats()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        total = len(self.txt_document)
+        page_results: list[BioinfAgentResults | None] = [None] * total
+
+        async def extract(idx: int) -> None:
+            async with semaphore:
+                logger.info(f"Обработка страницы {idx + 1}/{total}")
+                page = self.txt_document.pages[idx]
+                page_results[idx] = await self.aextract_page(page)
+            await self.arecord_page(page, page_results[idx])
+
+        async def process(batch: list[int], group: asyncio.TaskGroup) -> None:
+            async with semaphore:
+                decisions = await self.aclassify_batch(batch)
+            for idx, should_search in zip(batch, decisions):
+                if should_search:
+                    group.create_task(extract(idx))
+                else:
+                    await self.arecord_page(self.txt_document.pages[idx], None)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for batch in self.plan_batches():
+                    group.create_task(process(batch, group))
+        except BaseException:
+            await asyncio.to_thread(self.close_progress)
+            raise
+
+        return self.build_result(page_results)
+
+    def build_result(
+        self, page_results: list[BioinfAgentResults | None]
+    ) -> PipelineResult:
+        """
+        Собирает результат документа из результатов страниц (в порядке страниц).
+
+        Для страниц без результата используются результаты, сохраненные
+        до прерывания обработки, и взаимодействия, прочитанные из таблиц.
+        """
         interactions = []
-        for idx, page in enumerate(self.txt_document.pages):
-            logger.info(f"Обработка страницы {idx + 1}/{len(self.txt_document)}")
-            result = self.process_page(page)
+        for idx, (page, result) in enumerate(zip(self.txt_document.pages, page_results)):
+            if result is None and self.is_page_saved(page):
+                result = self.saved_pages[page.number][1]
+            if result is None:
+                result = self.table_results.get(page.number)
             if result is None:
                 logger.info(
                     f"Страница {idx + 1} не содержит взаимодействий либо некорректно обработана. Пропуск страницы."
@@ -264,5 +492,24 @@ class Pipeline:
             )
             interactions.append(Pagedata(page=page, interactions=result))
 
+        if self.prefilter is not None:
+            logger.info(f"Префильтр для документа {self.txt_document.name}: {self.prefilter_stats}")
+        if self.table_results:
+            logger.info(
+                f"Страниц документа {self.txt_document.name}, прочитанных из таблиц "
+                f"без вызова LLM: {len(self.table_results)}"
+            )
+
         logger.info(f"Обработка завершена для документа: {self.txt_document.name}")
-        return PipelineResult(interactions=interactions)
+        result = PipelineResult(
+            interactions=interactions,
+            prefilter_stats=self.prefilter_stats if self.prefilter is not None else None,
+        )
+        if self.store is not None:
+            self.store.save_results(document_name(self.txt_document.path), result)
+        # Результат документа собран, сохраненные результаты страниц больше не нужны
+        self.saved_pages = {}
+        self.close_progress(sync=False)
+        if self.progress_path.exists():
+            self.progress_path.unlink()
+        return result
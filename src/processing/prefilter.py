@@ -0,0 +1,90 @@
+import re
+from dataclasses import dataclass
+
+from src.processing.txt_reader import Page
+
+PARAMETER_NAMES = r"Kd|IC50|Ki|C50"
+PARAMETER_UNITS = r"nM|μM|µM|uM|mM|pM"
+
+params_patterns = [
+    # Kd = 10 nM / Kd < 10 nM / Kd > 10 nM
+    ("classic", rf"(?P<param>{PARAMETER_NAMES})\s*[=<>]?\s*(?P<value>\d+\.?\d*)\s*(?P<unit>{PARAMETER_UNITS})"),
+    # Kd (10 nM)
+    ("brackets", rf"(?P<param>{PARAMETER_NAMES})\s*\(\s*(?P<value>\d+\.?\d*)\s*(?P<unit>{PARAMETER_UNITS})\s*\)"),
+    # Kd: 10 nM / Kd, 10 nM
+    ("colon_or_comma", rf"(?P<param>{PARAMETER_NAMES})\s*[:|,]\s*(?P<value>\d+\.?\d*)\s*(?P<unit>{PARAMETER_UNITS})"),
+    # 10 nM
+    ("value_only", rf"(?P<value>\d+\.?\d*)\s*(?P<unit>{PARAMETER_UNITS})"),
+]
+
+# Любое совпадение из params_patterns содержит значение с единицей измерения,
+# поэтому для префильтра достаточно одного прохода по объединенному выражению:
+# упоминание параметра (Ki, Kd, IC50, EC50) либо значение с единицей измерения
+PREFILTER_PATTERN = re.compile(
+    rf"\b(?:Kd|Ki|I?C\s?50|EC\s?50)\b|\d+\.?\d*\s*(?:{PARAMETER_UNITS})\b"
+)
+
+
+@dataclass
+class PrefilterStats:
+    """
+    pages_total   : количество страниц, проверенных префильтром
+    pages_passed  : количество страниц, переданных агенту-поиска
+    pages_skipped : количество страниц, отсеянных без вызова LLM
+    """
+
+    pages_total: int = 0
+    pages_passed: int = 0
+    pages_skipped: int = 0
+
+    def __str__(self):
+        return (
+            f"проверено страниц: {self.pages_total}, "
+            f"передано агенту-поиска: {self.pages_passed}, "
+            f"отсеяно без вызова LLM: {self.pages_skipped}"
+        )
+
+
+class ParametersPrefilter:
+    """
+    Детерминированный префильтр страниц перед агентом-поиска.
+
+    Отсеивает страницы, на которых нет ни упоминаний параметров
+    взаимодействий (Ki, Kd, IC50, EC50), ни значений с единицами
+    концентрации. Такие страницы не требуют вызова SearcherAgent.
+    """
+
+    def __init__(self, pattern: re.Pattern[str] = PREFILTER_PATTERN):
+        self._pattern = pattern
+
+    def has_parameters(self, text: str) -> bool:
+        """
+        Проверяет, есть ли в тексте параметры взаимодействий
+
+        Args:
+            text: Текст для проверки
+
+        Returns:
+            bool: True, если найден хотя бы один параметр или значение с единицей
+        """
+        return self._pattern.search(text) is not None
+
+    def check_page(self, page: Page, stats: PrefilterStats | None = None) -> bool:
+        """
+        Проверяет страницу и обновляет статистику
+
+        Args:
+            page: Страница для проверки
+            stats: Статистика префильтра, которую нужно обновить
+
+        Returns:
+            bool: True, если страницу нужно передать агенту-поиска
+        """
+        passed = not page.is_empty and self.has_parameters(page.text)
+        if stats is not None:
+            stats.pages_total += 1
+            if passed:
+                stats.pages_passed += 1
+            else:
+                stats.pages_skipped += 1
+        return passed
@@ -0,0 +1,589 @@
+import asyncio
+import concurrent.futures
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncGenerator, Coroutine, Generator, Iterable
+
+from src.constants.general import RESULTS_INTERMEDIATE_DIR, RESULTS_RAW_DIR
+from src.constants.processing import (
+    LLM_MAX_CONCURRENCY,
+    PAGES_LIMIT,
+    SEARCHER_BATCH_SIZE,
+)
+from src.processing.agent_suite import AgentSuite, get_default_agent_suite
+from src.processing.event_loop import iterate_async
+from src.processing.pipeline import Pipeline, PipelineResult
+from src.processing.schemas import BioinfAgentResults
+from src.processing.text_extraction import PageSource, PDFTextExtractor, record_extraction
+from src.processing.txt_reader import Page, TxtDocument
+from src.storage import CorpusStore, document_name
+from src.utils import cut_str, logger
+
+
+@dataclass
+class _DocumentState:
+    """
+    pipeline     : Pipeline документа (хранит состояние документа)
+    page_results : результаты страниц по номерам страниц
+    remaining    : количество поставленных в очередь, но еще не обработанных страниц
+    planned      : все пакеты страниц документа поставлены в очередь
+    failed       : признак ошибки при обработке документа
+    """
+
+    pipeline: Pipeline
+    page_results: dict[int, BioinfAgentResults | None] = field(default_factory=dict)
+    remaining: int = 0
+    planned: bool = False
+    failed: bool = False
+
+
+class CorpusScheduler:
+    """
+    Планировщик LLM-обработки страниц всего корпуса.
+
+    Пакеты страниц всех документов попадают в одну ограниченную очередь, которую
+    разбирает пул из max_concurrency воркеров. Воркеры не ждут окончания
+    документа, поэтому число запросов к LLM остается постоянным и на границах
+    документов; отобранные страницы пакета обрабатываются одновременно, но не
+    более max_concurrency запросов к LLM за весь запуск. Результаты собираются
+    по документам и отдаются, как только обработана последняя страница
+    документа. Ошибка при планировании страниц документа завершает только
+    этот документ (он отдается с результатом None), ошибка производителя
+    документов передается вызывающему коду.
+    """
+
+    def __init__(
+        self,
+        agent_suite: AgentSuite | None = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_size: int | None = None,
+        use_prefilter: bool = True,
+        searcher_batch_size: int = SEARCHER_BATCH_SIZE,
+        output_dir: Path = RESULTS_INTERMEDIATE_DIR,
+        store: CorpusStore | None = None,
+        page_query: str | None = None,
+    ):
+        """
+        Инициализация CorpusScheduler
+
+        Args:
+            agent_suite: Набор агентов (по умолчанию общий набор процесса)
+            max_concurrency: Количество воркеров (одновременных запросов к LLM)
+            queue_size: Размер очереди пакетов страниц (по умолчанию 2 * max_concurrency)
+            use_prefilter: Отсеивать страницы без параметров взаимодействий до вызова агента-поиска
+            searcher_batch_size: Количество коротких страниц в одном запросе к агенту-поиска
+            output_dir: Директория для сохранения результатов
+            store: Хранилище корпуса, в которое записываются страницы
+                извлеченных PDF (None - не записывать)
+            page_query: Поисковая строка для отбора страниц уже извлеченных
+                документов по полнотекстовому индексу корпуса (см. Pipeline)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+
+        self.agent_suite = agent_suite or get_default_agent_suite()
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size or max_concurrency * 2
+        self.use_prefilter = use_prefilter
+        self.searcher_batch_size = searcher_batch_size
+        self.output_dir = output_dir
+        self.store = store
+        self.page_query = page_query
+
+    def _make_pipeline(self, document: TxtDocument) -> Pipeline:
+        return Pipeline(
+            txt_document=document,
+            output_dir=self.output_dir,
+            use_prefilter=self.use_prefilter,
+            agent_suite=self.agent_suite,
+            searcher_batch_size=self.searcher_batch_size,
+            page_query=self.page_query,
+        )
+
+    async def aprocess(
+        self, documents: list[TxtDocument]
+    ) -> AsyncGenerator[tuple[TxtDocument, PipelineResult | None], None]:
+        """
+        Обрабатывает документы корпуса общей очередью страниц
+
+        Args:
+            documents: Документы для обработки
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его
+            обработки (None, если при обработке документа произошла ошибка)
+            в порядке завершения документов
+        """
+        run = _SchedulerRun(self)
+        logger.info(
+            f"Обработка {len(documents)} документов "
+            f"({sum(len(document) for document in documents)} страниц), "
+            f"воркеров: {self.max_concurrency}"
+        )
+        async for item in run.results([run.plan_documents(documents)]):
+            yield item
+
+    async def aprocess_iter(
+        self, documents: Iterable[TxtDocument]
+    ) -> AsyncGenerator[tuple[TxtDocument, PipelineResult | None], None]:
+        """
+        Обрабатывает документы общей очередью страниц по мере их поступления.
+
+        Следующий документ запрашивается у documents в отдельном потоке, поэтому
+        итератор может ожидать появления документа (например, читать очередь
+        предыдущей стадии обработки), не останавливая обработку уже
+        поставленных в очередь страниц.
+
+        Args:
+            documents: Итератор документов для обработки
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его
+            обработки в порядке завершения документов
+        """
+        run = _SchedulerRun(self)
+        logger.info(f"Обработка документов по мере поступления, воркеров: {self.max_concurrency}")
+        async for item in run.results([run.plan_iter(documents)]):
+            yield item
+
+    async def aprocess_pdfs(
+        self,
+        pdf_files: list[Path],
+        extractor: PDFTextExtractor | None = None,
+        export_path: Path = RESULTS_RAW_DIR,
+        documents: list[TxtDocument] | None = None,
+    ) -> AsyncGenerator[tuple[TxtDocument, PipelineResult | None], None]:
+        """
+        Извлекает текст PDF и обрабатывает его LLM одновременно.
+
+        Страницы ставятся в очередь LLM по мере распознавания
+        (PDFTextExtractor.iter_page_extractions), поэтому агенты начинают работу
+        с первыми страницами документа, пока остальные страницы еще распознаются.
+        Страницы с таблицами аффинности (OCRConfig.extract_tables) читаются
+        из таблиц без вызова агентов. Текст каждого PDF после распознавания
+        сохраняется в export_path так же, как в extract_texts, уже извлеченные
+        документы не распознаются повторно. PDF длиннее
+        PAGES_LIMIT страниц извлекаются окнами (extract_windowed) и ставятся
+        в очередь после извлечения. Уже извлеченные документы documents
+        обрабатываются параллельно с распознаванием.
+
+        Args:
+            pdf_files: PDF файлы для извлечения и обработки
+            extractor: Экстрактор текста (по умолчанию с настройками по умолчанию)
+            export_path: Директория для сохранения текстов
+            documents: Уже извлеченные документы для обработки
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его
+            обработки в порядке завершения документов (None, если извлечь
+            текст или обработать документ не удалось)
+        """
+        extractor = extractor or PDFTextExtractor()
+        documents = documents or []
+        export_path.mkdir(parents=True, exist_ok=True)
+
+        run = _SchedulerRun(self)
+        logger.info(
+            f"Потоковая обработка {len(pdf_files)} PDF и {len(documents)} извлеченных документов, "
+            f"воркеров: {self.max_concurrency}"
+        )
+        producers = [run.plan_pdfs(pdf_files, extractor, export_path)]
+        if documents:
+            producers.append(run.plan_documents(documents))
+        async for item in run.results(producers):
+            yield item
+
+    async def aprocess_pdf_iter(
+        self,
+        pdf_files: Iterable[Path],
+        extractor: PDFTextExtractor | None = None,
+        export_path: Path = RESULTS_RAW_DIR,
+        workers: int = 1,
+    ) -> AsyncGenerator[tuple[TxtDocument, PipelineResult | None], None]:
+        """
+        Извлекает текст PDF и обрабатывает его LLM одновременно (см. aprocess_pdfs)
+        по мере поступления PDF.
+
+        Следующий PDF запрашивается у pdf_files в отдельном потоке (например,
+        из очереди стадии скачивания). Одновременно распознаются до workers
+        документов, страницы каждого ставятся в очередь LLM по мере
+        распознавания. Уже извлеченные документы не распознаются повторно.
+
+        Args:
+            pdf_files: Итератор PDF файлов для извлечения и обработки
+            extractor: Экстрактор текста (по умолчанию с настройками по умолчанию)
+            export_path: Директория для сохранения текстов
+            workers: Количество одновременно распознаваемых документов
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его
+            обработки в порядке завершения документов
+        """
+        if workers < 1:
+            raise ValueError("workers must be greater than 0")
+
+        extractor = extractor or PDFTextExtractor()
+        export_path.mkdir(parents=True, exist_ok=True)
+
+        run = _SchedulerRun(self)
+        logger.info(
+            f"Потоковая обработка PDF по мере поступления, воркеров: {self.max_concurrency}"
+        )
+        async for item in run.results([run.plan_pdf_iter(pdf_files, extractor, export_path, workers)]):
+            yield item
+
+    def process(
+        self, documents: list[TxtDocument]
+    ) -> Generator[tuple[TxtDocument, PipelineResult | None], None, None]:
+        """
+        Синхронная обертка над aprocess.
+
+        Обработка выполняется в общем цикле событий фонового потока
+        (iterate_async), поэтому запросы к LLM продолжаются, пока вызывающий
+        код обрабатывает очередной документ.
+
+        Args:
+            documents: Документы для обработки
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его обработки
+        """
+        return iterate_async(self.aprocess(documents))
+
+    def process_iter(
+        self, documents: Iterable[TxtDocument]
+    ) -> Generator[tuple[TxtDocument, PipelineResult | None], None, None]:
+        """
+        Синхронная обертка над aprocess_iter
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его обработки
+        """
+        return iterate_async(self.aprocess_iter(documents))
+
+    def process_pdfs(
+        self,
+        pdf_files: list[Path],
+        extractor: PDFTextExtractor | None = None,
+        export_path: Path = RESULTS_RAW_DIR,
+        documents: list[TxtDocument] | None = None,
+    ) -> Generator[tuple[TxtDocument, PipelineResult | None], None, None]:
+        """
+        Синхронная обертка над aprocess_pdfs
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его обработки
+        """
+        return iterate_async(self.aprocess_pdfs(pdf_files, extractor, export_path, documents))
+
+    def process_pdf_iter(
+        self,
+        pdf_files: Iterable[Path],
+        extractor: PDFTextExtractor | None = None,
+        export_path: Path = RESULTS_RAW_DIR,
+        workers: int = 1,
+    ) -> Generator[tuple[TxtDocument, PipelineResult | None], None, None]:
+        """
+        Синхронная обертка над aprocess_pdf_iter
+
+        Yields:
+            tuple[TxtDocument, PipelineResult | None]: Документ и результат его обработки
+        """
+        return iterate_async(self.aprocess_pdf_iter(pdf_files, extractor, export_path, workers))
+
+
+class _SchedulerRun:
+    """Состояние одного запуска CorpusScheduler: документы, очередь пакетов и воркеры"""
+
+    def __init__(self, scheduler: CorpusScheduler):
+        self.scheduler = scheduler
+        # Состояния еще не отданных документов по ключам документов: состояние
+        # удаляется, как только документ отдан, поэтому память не растет
+        # с количеством обработанных документов
+        self.states: dict[int, _DocumentState] = {}
+        self.next_key = 0
+        self.batches: asyncio.Queue[tuple[int, list[Page]] | None] = asyncio.Queue(
+            maxsize=scheduler.queue_size
+        )
+        # Индексы завершенных документов; None - все производители завершили работу
+        self.finished: asyncio.Queue[int | None] = asyncio.Queue()
+        # Передачи пакетов из потока распознавания, ожидающие места в очереди
+        self.handoffs: set[concurrent.futures.Future] = set()
+        # Ограничивает число одновременных запросов к LLM всех воркеров
+        self.semaphore = asyncio.Semaphore(scheduler.max_concurrency)
+        # Ошибка производителя документов (передается в results)
+        self.error: BaseException | None = None
+        self.closed = False
+
+    def add_document(self, document: TxtDocument) -> int:
+        doc_idx = self.next_key
+        self.states[doc_idx] = _DocumentState(pipeline=self.scheduler._make_pipeline(document))
+        self.next_key += 1
+        return doc_idx
+
+    async def put_batch(self, doc_idx: int, batch: list[Page]) -> None:
+        self.states[doc_idx].remaining += len(batch)
+        await self.batches.put((doc_idx, batch))
+
+    def mark_planned(self, doc_idx: int) -> None:
+        self.states[doc_idx].planned = True
+        self._check_finished(doc_idx)
+
+    def _check_finished(self, doc_idx: int) -> None:
+        state = self.states[doc_idx]
+        if state.planned and state.remaining == 0:
+            self.finished.put_nowait(doc_idx)
+
+    async def plan_documents(self, documents: list[TxtDocument]) -> None:
+        """Ставит в очередь пакеты страниц уже извлеченных документов"""
+        for document in documents:
+            doc_idx = self.add_document(document)
+            state = self.states[doc_idx]
+            try:
+                for batch in state.pipeline.iter_batches(document.pages):
+                    await self.put_batch(doc_idx, batch)
+            except Exception as e:
+                logger.error(
+                    f"Ошибка при планировании страниц документа {cut_str(document.name)}: {e}"
+                )
+                state.failed = True
+            finally:
+                # Документ завершается и при ошибке, иначе results ожидал бы его бесконечно
+                self.mark_planned(doc_idx)
+
+    async def plan_iter(self, documents: Iterable[TxtDocument]) -> None:
+        """Ставит в очередь пакеты страниц документов по мере их поступления"""
+        iterator = iter(documents)
+        while (document := await asyncio.to_thread(next, iterator, None)) is not None:
+            if self.closed:
+                return
+            await self.plan_documents([document])
+
+    async def plan_pdfs(
+        self, pdf_files: list[Path], extractor: PDFTextExtractor, export_path: Path
+    ) -> None:
+        """Распознает PDF и ставит страницы в очередь по мере распознавания"""
+        with extractor:
+            for pdf_file in pdf_files:
+                await self.plan_pdf(pdf_file, extractor, export_path)
+
+    async def plan_pdf_iter(
+        self,
+        pdf_files: Iterable[Path],
+        extractor: PDFTextExtractor,
+        export_path: Path,
+        workers: int,
+    ) -> None:
+        """Распознает PDF по мере их поступления, workers документов одновременно"""
+        iterator = iter(pdf_files)
+        lock = threading.Lock()
+
+        def take() -> Path | None:
+            # Итератор может быть генератором, который нельзя читать из нескольких потоков
+            with lock:
+                return next(iterator, None)
+
+        async def work() -> None:
+            while (pdf_file := await asyncio.to_thread(take)) is not None:
+                if self.closed:
+                    return
+                await self.plan_pdf(pdf_file, extractor, export_path)
+
+        with extractor:
+            await asyncio.gather(*(work() for _ in range(workers)))
+
+    async def plan_pdf(
+        self, pdf_file: Path, extractor: PDFTextExtractor, export_path: Path
+    ) -> None:
+        """
+        Распознает PDF и ставит его страницы в очередь по мере распознавания.
+
+        Уже извлеченный документ не распознается повторно, PDF длиннее
+        PAGES_LIMIT страниц извлекается окнами и ставится в очередь после
+        извлечения.
+        """
+        store = self.scheduler.store
+        output_path = export_path / f"{pdf_file.stem}.txt"
+        try:
+            if output_path.exists():
+                logger.info(f"Файл {cut_str(output_path)} уже существует, пропускаем извлечение")
+                if store is not None and (
+                    await asyncio.to_thread(store.get_status, document_name(output_path))
+                ) is None:
+                    await asyncio.to_thread(record_extraction, store, output_path, pdf_file)
+                await self.plan_documents([TxtDocument(output_path, lazy=True)])
+                return
+
+            page_count = await asyncio.to_thread(extractor.get_pages_count, pdf_file)
+            if page_count > PAGES_LIMIT:
+                await asyncio.to_thread(
+                    extractor.extract_windowed, pdf_file, output_path, PAGES_LIMIT
+                )
+                if store is not None:
+                    await asyncio.to_thread(record_extraction, store, output_path, pdf_file)
+                await self.plan_documents([TxtDocument(output_path, lazy=True)])
+                return
+
+            doc_idx = self.add_document(TxtDocument.from_pages(output_path, []))
+        except Exception as e:
+            logger.error(f"Ошибка при извлечении текста {cut_str(pdf_file.name)}: {e}")
+            return
+
+        state = self.states[doc_idx]
+        try:
+            await asyncio.to_thread(
+                self._stream_pages, pdf_file, doc_idx, extractor, asyncio.get_running_loop()
+            )
+            if not state.pipeline.txt_document.pages:
+                logger.warning(f"Из файла {cut_str(pdf_file.name)} не удалось извлечь текст")
+                state.failed = True
+        except Exception as e:
+            logger.error(f"Ошибка при извлечении текста {cut_str(pdf_file.name)}: {e}")
+            state.failed = True
+        finally:
+            self.mark_planned(doc_idx)
+
+    def _stream_pages(
+        self,
+        pdf_file: Path,
+        doc_idx: int,
+        extractor: PDFTextExtractor,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        # Выполняется в отдельном потоке: OCR не блокирует цикл событий,
+        # а заполненная очередь пакетов приостанавливает распознавание
+        pipeline = self.states[doc_idx].pipeline
+        pages = pipeline.txt_document.pages
+
+        def recognized_pages() -> Generator[Page, None, None]:
+            text_path = pipeline.txt_document.path
+            for extraction in extractor.iter_page_extractions(pdf_file, text_path):
+                if extraction.source == PageSource.ERROR:
+                    continue
+                text = extraction.body
+                if not text:
+                    continue
+                number = extraction.page_num + 1
+                # Таблицы страницы читаются до планирования пакетов, чтобы
+                # страницы с таблицами аффинности не передавались агентам
+                pipeline.add_tables(extraction.tables or [])
+                page = Page(number=number, text=text)
+                pages.append(page)
+                yield page
+
+        for batch in pipeline.iter_batches(recognized_pages()):
+            if self.closed:
+                raise asyncio.CancelledError()
+            handoff = asyncio.run_coroutine_threadsafe(self.put_batch(doc_idx, batch), loop)
+            self.handoffs.add(handoff)
+            try:
+                handoff.result()
+            finally:
+                self.handoffs.discard(handoff)
+
+        pages.sort(key=lambda page: page.number)
+        text = extractor.format_text((page.number, page.text) for page in pages)
+        if text:
+            with open(pipeline.txt_document.path, "w", encoding="utf-8") as f:
+                f.write(text)
+            if self.scheduler.store is not None:
+                record_extraction(self.scheduler.store, pipeline.txt_document.path, pdf_file)
+
+    async def _process_batch(self, state: _DocumentState, batch: list[Page]) -> None:
+        pipeline = state.pipeline
+        async with self.semaphore:
+            decisions = await pipeline.aclassify_pages(batch)
+
+        async def extract(page: Page) -> None:
+            async with self.semaphore:
+                if state.failed:
+                    return
+                state.page_results[page.number] = await pipeline.aextract_page(page)
+            await pipeline.arecord_page(page, state.page_results[page.number])
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for page, should_search in zip(batch, decisions):
+                    if should_search:
+                        group.create_task(extract(page))
+                    else:
+                        await pipeline.arecord_page(page, None)
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+    async def _work(self) -> None:
+        while (item := await self.batches.get()) is not None:
+            doc_idx, batch = item
+            state = self.states[doc_idx]
+            if not state.failed:
+                try:
+                    await self._process_batch(state, batch)
+                except Exception as e:
+                    logger.error(
+                        f"Ошибка при обработке страниц {[page.number for page in batch]} документа "
+                        f"{cut_str(state.pipeline.txt_document.name)}: {e}"
+                    )
+                    state.failed = True
+
+            state.remaining -= len(batch)
+            self._check_finished(doc_idx)
+
+    async def _produce(self, producers: list[Coroutine]) -> None:
+        tasks = [asyncio.ensure_future(producer) for producer in producers]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            self.error = e
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.finished.put_nowait(None)
+            # После закрытия воркеры отменены и не разбирают очередь пакетов
+            if not self.closed:
+                for _ in range(self.scheduler.max_concurrency):
+                    await self.batches.put(None)
+
+    async def results(
+        self, producers: list[Coroutine]
+    ) -> AsyncGenerator[tuple[TxtDocument, PipelineResult | None], None]:
+        """Запускает производителей и воркеров и отдает документы по мере завершения"""
+        tasks = [asyncio.create_task(self._produce(producers))]
+        tasks += [
+            asyncio.create_task(self._work()) for _ in range(self.scheduler.max_concurrency)
+        ]
+        try:
+            produced = False
+            while not produced or self.states:
+                doc_idx = await self.finished.get()
+                if doc_idx is None:
+                    if self.error is not None:
+                        raise self.error
+                    produced = True
+                    continue
+
+                # Состояние отданного документа (Pipeline, документ и результаты страниц) освобождается
+                state = self.states.pop(doc_idx)
+                document = state.pipeline.txt_document
+                if state.failed:
+                    # Сохраненные результаты страниц нужны для продолжения обработки документа
+                    await asyncio.to_thread(state.pipeline.close_progress)
+                    yield document, None
+                else:
+                    yield document, state.pipeline.build_result(
+                        [state.page_results.get(page.number) for page in document.pages]
+                    )
+            await asyncio.gather(*tasks)
+        finally:
+            # Поток распознавания может ждать места в очереди - отменяем ожидание
+            self.closed = True
+            for handoff in list(self.handoffs):
+                handoff.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Файлы результатов страниц незавершенных документов закрываются
+            # с fsync, чтобы обработку можно было продолжить
+            for state in self.states.values():
+                await asyncio.to_thread(state.pipeline.close_progress)
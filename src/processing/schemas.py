@@ -0,0 +1,78 @@
+from pydantic import BaseModel
+
+
+class SearcherAgentResults(BaseModel):
+    """
+    does_contain_interactions : содержит ли текст взаимодействия
+    accuracy                  : уверенность в ответе
+    """
+    
+    does_contain_interactions: bool
+    accuracy: float
+
+
+class PageSearchDecision(BaseModel):
+    """
+    page_number               : номер страницы в пакете
+    does_contain_interactions : содержит ли текст страницы взаимодействия
+    accuracy                  : уверенность в ответе
+    """
+
+    page_number: int
+    does_contain_interactions: bool
+    accuracy: float
+
+
+class SearcherBatchResults(BaseModel):
+    """
+    decisions : решения агента-поиска для каждой страницы пакета
+    """
+
+    decisions: list[PageSearchDecision]
+
+
+class InteractionParameters(BaseModel):
+    """
+    Ki   : константа ингибирования
+    IC50 : концентрация вещества, при которой наблюдается 50% ингибирование активности
+    Kd   : константа диссоциации комплекса лиганда и белка
+    EC50 : концентрация, вызывающая 50% максимального эффекта
+    """
+
+    Ki: float | None
+    IC50: float | None
+    Kd: float | None
+    EC50: float | None
+
+
+class LigandProteinInteraction(BaseModel):
+    """
+    ligand            : название лиганда
+    protein           : название белка
+    interaction_type  : тип взаимодействия
+    context           : контекст взаимодействия
+    parameters        : параметры взаимодействия
+    """
+    ligand: str
+    protein: str
+    interaction_type: str
+    context: str
+    parameters: InteractionParameters
+
+
+class BioinfAgentResults(BaseModel):
+    """
+    interactions : список взаимодействий
+    """
+    interactions: list[LigandProteinInteraction]
+
+
+class SupervisorAgentResults(BaseModel):
+    """
+    is_correct   : корректность результата
+    fixable      : можно ли исправить результат
+    explanation  : объяснение
+    """
+    is_correct: bool
+    fixable: bool
+    explanation: str | None
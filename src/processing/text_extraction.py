@@ -1,9 +1,13 @@
-import io
+import json
+import os
+import re
+import tempfile
 import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Generator, Iterable, Iterator
 
 import cv2
 import fitz
@@ -14,8 +18,18 @@ from PIL import Image, ImageEnhance, ImageFilter
 from loguru import logger
 
 from src.utils import cut_str
-from src.constants.processing import PAGE_DIVIDER
+from src.constants.processing import PAGE_DIVIDER, PAGES_LIMIT
 from src.constants.general import RESULTS_RAW_DIR
+from src.processing.ocr_cache import CachedPage, OCRPageCache, get_default_ocr_cache
+from src.processing.ocr_words import OCRWords, words_sidecar_path
+from src.processing.page_tables import (
+    PageTable,
+    load_tables,
+    save_tables,
+    tables_sidecar_path,
+)
+from src.processing.txt_reader import TxtDocument
+from src.storage import CorpusStore, document_name, get_default_corpus_store
 
 
 @dataclass
@@ -39,6 +53,71 @@ class OCRConfig:
     enable_preprocessing: bool = True
     max_workers: int | None = None
     chunk_size: int = 4
+    # Гибридный режим: сначала текстовый слой PDF, OCR только для страниц без него
+    use_text_layer: bool = False
+    text_layer_min_chars: int = 200
+    text_layer_min_word_ratio: float = 0.6
+    # Адаптивный режим: сначала OCR с adaptive_low_dpi без предобработки, повтор
+    # с dpi и enable_preprocessing только для страниц с низкой уверенностью Tesseract
+    adaptive: bool = False
+    adaptive_low_dpi: int = 150
+    adaptive_min_confidence: float = 80.0
+    # Классификация страниц перед OCR: пустые страницы не распознаются, страницы
+    # с рисунками не распознаются при skip_figure_pages
+    classify_pages: bool = False
+    classifier_dpi: int = 100
+    skip_figure_pages: bool = True
+    # Сохранять слова с координатами и уверенностью в <stem>.words.npz рядом с .txt
+    save_words: bool = False
+    # Искать таблицы на страницах и сохранять их строки в <stem>.tables.json рядом с .txt
+    extract_tables: bool = False
+
+
+class PageSource:
+    """Способ получения текста страницы"""
+
+    TEXT_LAYER = "text_layer"
+    OCR = "ocr"
+    ERROR = "error"
+    # Страницы, пропущенные классификатором страниц
+    BLANK = "blank"
+    FIGURE = "figure"
+
+    SKIPPED = (BLANK, FIGURE)
+
+
+class PageKind:
+    """Тип страницы по растровому изображению"""
+
+    BLANK = "blank"
+    FIGURE = "figure"
+    TEXT = "text"
+
+
+@dataclass
+class PageExtraction:
+    """
+    page_num   : номер страницы (начиная с 0)
+    text       : текст страницы с разделителем PAGE_DIVIDER (пустой, если текста нет)
+    source     : способ получения текста (PageSource)
+    dpi        : DPI, с которым распознана страница (None, если OCR не выполнялся)
+    confidence : средняя уверенность Tesseract по словам (только в адаптивном режиме)
+    words      : слова страницы с координатами и уверенностью (только при save_words)
+    tables     : таблицы страницы (только при extract_tables)
+    """
+
+    page_num: int
+    text: str
+    source: str
+    dpi: int | None = None
+    confidence: float | None = None
+    words: OCRWords | None = None
+    tables: list[PageTable] | None = None
+
+    @property
+    def body(self) -> str:
+        """Текст страницы без разделителя PAGE_DIVIDER"""
+        return _page_body(self.text)
 
 
 class OCRConfigEnum:
@@ -62,39 +141,68 @@ class OCRConfigEnum:
         enable_preprocessing=False,
         max_workers=4,
         chunk_size=6,
+        classify_pages=True,
+    )
+
+    # Гибридная конфигурация: текстовый слой PDF, OCR с высокой точностью для остальных страниц
+    HYBRID = OCRConfig(
+        language="eng",
+        dpi=300,
+        psm=6,
+        oem=3,
+        enable_preprocessing=True,
+        max_workers=3,
+        chunk_size=2,
+        use_text_layer=True,
+        classify_pages=True,
     )
 
+    # Адаптивная конфигурация: OCR со 150 DPI, повтор с 300 DPI и предобработкой
+    # только для страниц с низкой уверенностью распознавания
+    ADAPTIVE = OCRConfig(
+        language="eng",
+        dpi=300,
+        psm=6,
+        oem=3,
+        enable_preprocessing=True,
+        max_workers=3,
+        chunk_size=2,
+        adaptive=True,
+        adaptive_low_dpi=150,
+        adaptive_min_confidence=80.0,
+        classify_pages=True,
+    )
 
-PAGES_LIMIT = 50
 
 
 class ImagePreprocessor:
     """Класс для предобработки изображений перед OCR"""
 
     @staticmethod
-    def enhance_image(image: Image.Image) -> Image.Image:
-        """Улучшает изображение для лучшего распознавания текста"""
-        try:
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            img_array = np.array(image)
-            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    def enhance_array(gray: np.ndarray) -> np.ndarray:
+        """
+        Бинаризует полутоновое изображение на месте (порог Оцу)
 
-            blurred = cv2.GaussianBlur(gray, (1, 1), 0)
+        Args:
+            gray: Полутоновое изображение (uint8, один канал), изменяется на месте
 
-            _, thresh = cv2.threshold(
-                blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
+        Returns:
+            np.ndarray: Тот же массив после бинаризации
+        """
+        cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+        return gray
 
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-            processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    @staticmethod
+    def enhance_image(image: Image.Image) -> Image.Image:
+        """Улучшает изображение для лучшего распознавания текста"""
+        try:
+            if image.mode != "L":
+                image = image.convert("L")
 
-            processed_pil = Image.fromarray(processed)
+            gray = np.array(image)
+            processed = ImagePreprocessor.enhance_array(gray)
 
-            return processed_pil
+            return Image.fromarray(processed)
 
         except Exception as e:
             logger.warning(f"Ошибка при обработке изображения: {e}")
@@ -122,9 +230,578 @@ class ImagePreprocessor:
             return image
 
 
+class PageClassifier:
+    """
+    Дешевая классификация растра страницы на пустые страницы, рисунки и текст.
+
+    Страница бинаризуется, после чего оценивается доля "чернил" и статистика
+    связных компонент: текст дает много мелких компонент размером с символ,
+    а чертежи и химические формулы - крупные компоненты линий с редкими подписями.
+    """
+
+    # Доля пикселей с чернилами, ниже которой страница считается пустой
+    BLANK_INK_RATIO = 0.002
+    # Размеры компоненты-символа в миллиметрах
+    CHAR_MIN_HEIGHT_MM = 0.8
+    CHAR_MAX_HEIGHT_MM = 8.0
+    CHAR_MAX_WIDTH_MM = 10.0
+    # Минимальное число компонент-символов и их минимальная доля в чернилах страницы
+    TEXT_MIN_COMPONENTS = 60
+    TEXT_MIN_INK_SHARE = 0.4
+
+    @classmethod
+    def classify(cls, gray: np.ndarray, dpi: int) -> str:
+        """
+        Определяет тип страницы
+
+        Args:
+            gray: Полутоновое изображение страницы (не изменяется)
+            dpi: Разрешение изображения
+
+        Returns:
+            str: Тип страницы (PageKind)
+        """
+        _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        ink_pixels = int(ink.sum())
+        # Для почти пустой страницы порог Оцу делит шум, поэтому также
+        # проверяем, что "чернила" действительно темные
+        if ink_pixels < cls.BLANK_INK_RATIO * ink.size or gray.min() > 160:
+            return PageKind.BLANK
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        stats = stats[1:]
+        px_per_mm = dpi / 25.4
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        widths = stats[:, cv2.CC_STAT_WIDTH]
+        is_char = (
+            (heights >= cls.CHAR_MIN_HEIGHT_MM * px_per_mm)
+            & (heights <= cls.CHAR_MAX_HEIGHT_MM * px_per_mm)
+            & (widths <= cls.CHAR_MAX_WIDTH_MM * px_per_mm)
+        )
+        char_components = int(is_char.sum())
+        char_ink_share = stats[is_char, cv2.CC_STAT_AREA].sum() / ink_pixels
+
+        if (
+            char_components >= cls.TEXT_MIN_COMPONENTS
+            and char_ink_share >= cls.TEXT_MIN_INK_SHARE
+        ):
+            return PageKind.TEXT
+        return PageKind.FIGURE
+
+
+@dataclass
+class _Rule:
+    """
+    Отрезок линии разметки
+
+    pos   : координата линии (y для горизонтальной, x для вертикальной)
+    start : начало отрезка вдоль линии
+    end   : конец отрезка вдоль линии
+    """
+
+    pos: float
+    start: float
+    end: float
+
+
+class TableDetector:
+    """
+    Поиск таблиц на странице по линиям разметки и расположению слов.
+
+    Таблица - группа горизонтальных линий одинаковой ширины. Если ее пересекают
+    вертикальные линии, ячейки задаются сеткой линий. Иначе (таблицы только
+    с горизонтальными линиями) столбцы определяются по промежуткам между
+    словами, строки - по строкам текста, а заголовок - по второй линии.
+    Линии берутся из векторной графики страницы (текстовый слой) или
+    выделяются морфологическим открытием растра (OCR). Таблицы совсем
+    без линий не ищутся.
+    """
+
+    # Минимальная длина линий таблицы в дюймах
+    MIN_RULE_LENGTH_IN = 0.75
+    MIN_SEPARATOR_LENGTH_IN = 0.25
+    # Максимальная толщина линии в дюймах (более толстые прямоугольники - ячейки)
+    MAX_RULE_THICKNESS_IN = 0.04
+    # Допуск при сравнении координат линий в дюймах
+    TOLERANCE_IN = 0.06
+    # Максимальное расстояние между соседними горизонтальными линиями одной таблицы
+    MAX_RULE_GAP_IN = 4.0
+    # Минимальная ширина промежутка между столбцами таблицы без вертикальных линий
+    MIN_COLUMN_GAP_IN = 0.12
+
+    @classmethod
+    def from_text_layer(cls, page: fitz.Page, words: OCRWords) -> list[PageTable]:
+        """
+        Находит таблицы по векторным линиям и словам текстового слоя
+
+        Args:
+            page: Страница PDF
+            words: Слова текстового слоя страницы (координаты в точках PDF)
+
+        Returns:
+            list[PageTable]: Таблицы страницы
+        """
+        horizontal, vertical = [], []
+        max_thickness = cls.MAX_RULE_THICKNESS_IN * 72
+        for drawing in page.get_drawings():
+            for item in drawing["items"]:
+                if item[0] == "l":
+                    rect = fitz.Rect(item[1], item[2]).normalize()
+                elif item[0] == "re":
+                    rect = fitz.Rect(item[1]).normalize()
+                else:
+                    continue
+
+                if rect.height <= max_thickness:
+                    horizontal.append(_Rule((rect.y0 + rect.y1) / 2, rect.x0, rect.x1))
+                elif rect.width <= max_thickness:
+                    vertical.append(_Rule((rect.x0 + rect.x1) / 2, rect.y0, rect.y1))
+                else:
+                    # Рамка ячейки или заливка - используем ее стороны
+                    horizontal += [_Rule(rect.y0, rect.x0, rect.x1), _Rule(rect.y1, rect.x0, rect.x1)]
+                    vertical += [_Rule(rect.x0, rect.y0, rect.y1), _Rule(rect.x1, rect.y0, rect.y1)]
+
+        return cls.detect(
+            horizontal, vertical, words, 72, page.number + 1, PageSource.TEXT_LAYER
+        )
+
+    @classmethod
+    def from_raster(
+        cls, gray: np.ndarray, words: OCRWords, dpi: int, page_number: int
+    ) -> list[PageTable]:
+        """
+        Находит таблицы по линиям растра и распознанным словам
+
+        Args:
+            gray: Полутоновое изображение страницы (не изменяется)
+            words: Распознанные слова страницы (координаты в пикселях изображения)
+            dpi: Разрешение изображения
+            page_number: Номер страницы (начиная с 1)
+
+        Returns:
+            list[PageTable]: Таблицы страницы
+        """
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        horizontal_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (int(cls.MIN_RULE_LENGTH_IN * dpi), 1)
+        )
+        vertical_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (1, int(cls.MIN_SEPARATOR_LENGTH_IN * dpi))
+        )
+
+        def rules(kernel: np.ndarray, is_horizontal: bool) -> list[_Rule]:
+            mask = cv2.morphologyEx(ink, cv2.MORPH_OPEN, kernel)
+            _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            result = []
+            for x, y, width, height, _ in stats[1:].tolist():
+                if is_horizontal:
+                    result.append(_Rule(y + height / 2, x, x + width))
+                else:
+                    result.append(_Rule(x + width / 2, y, y + height))
+            return result
+
+        return cls.detect(
+            rules(horizontal_kernel, True),
+            rules(vertical_kernel, False),
+            words,
+            dpi,
+            page_number,
+            PageSource.OCR,
+        )
+
+    @classmethod
+    def detect(
+        cls,
+        horizontal: list[_Rule],
+        vertical: list[_Rule],
+        words: OCRWords,
+        dpi: int,
+        page_number: int,
+        source: str,
+    ) -> list[PageTable]:
+        """
+        Находит таблицы по линиям разметки и словам страницы
+
+        Args:
+            horizontal: Горизонтальные линии
+            vertical: Вертикальные линии
+            words: Слова страницы в тех же координатах, что и линии
+            dpi: Разрешение координат
+            page_number: Номер страницы (начиная с 1)
+            source: Способ получения текста страницы (PageSource)
+
+        Returns:
+            list[PageTable]: Таблицы страницы
+        """
+        if not len(words):
+            return []
+
+        tolerance = cls.TOLERANCE_IN * dpi
+        horizontal = cls._merge_rules(horizontal, tolerance, cls.MIN_RULE_LENGTH_IN * dpi)
+        vertical = cls._merge_rules(vertical, tolerance, cls.MIN_SEPARATOR_LENGTH_IN * dpi)
+
+        # Соседние горизонтальные линии одинаковой ширины относятся к одной таблице
+        groups: list[list[_Rule]] = []
+        for rule in sorted(horizontal, key=lambda rule: rule.pos):
+            for group in groups:
+                last = group[-1]
+                if (
+                    abs(rule.start - last.start) <= 4 * tolerance
+                    and abs(rule.end - last.end) <= 4 * tolerance
+                    and rule.pos - last.pos <= cls.MAX_RULE_GAP_IN * dpi
+                ):
+                    group.append(rule)
+                    break
+            else:
+                groups.append([rule])
+
+        centers_x = words.left + words.width / 2
+        centers_y = words.top + words.height / 2
+        texts = words.words
+        line_height = float(np.median(words.height))
+
+        tables = []
+        for rules in groups:
+            if len(rules) < 2:
+                continue
+            x0, x1 = min(rule.start for rule in rules), max(rule.end for rule in rules)
+            y0, y1 = rules[0].pos, rules[-1].pos
+
+            inside = np.flatnonzero(
+                (centers_x >= x0 - tolerance)
+                & (centers_x <= x1 + tolerance)
+                & (centers_y > y0)
+                & (centers_y < y1)
+            )
+            if not len(inside):
+                continue
+
+            # Номер строки текста для каждого слова таблицы
+            line_of: dict[int, int] = {}
+            line, line_y = -1, None
+            for idx in inside[np.argsort(centers_y[inside], kind="stable")].tolist():
+                if line_y is None or centers_y[idx] - line_y > line_height / 2:
+                    line, line_y = line + 1, centers_y[idx]
+                line_of[idx] = line
+            separators = sorted(
+                rule.pos
+                for rule in vertical
+                if x0 + tolerance < rule.pos < x1 - tolerance
+                and min(rule.end, y1) - max(rule.start, y0) >= (y1 - y0) / 2
+            )
+
+            if separators:
+                column_bounds = cls._merge_positions(separators, tolerance)
+                row_bounds = [rule.pos for rule in rules[1:-1]]
+                row_of = {
+                    idx: int(np.searchsorted(row_bounds, centers_y[idx]))
+                    for idx in inside.tolist()
+                }
+                header_rows = 1
+            else:
+                header_bottom = rules[1].pos if len(rules) >= 3 else None
+                body = [
+                    idx for idx in inside.tolist()
+                    if header_bottom is None or centers_y[idx] > header_bottom
+                ]
+                column_bounds = cls._column_gaps(
+                    words, body, x0, x1, cls.MIN_COLUMN_GAP_IN * dpi
+                )
+                row_of = line_of
+                header_rows = 1
+                if header_bottom is not None:
+                    header_rows = len(
+                        {line_of[idx] for idx in inside.tolist() if centers_y[idx] < header_bottom}
+                    )
+            if not column_bounds:
+                continue
+
+            cells: dict[tuple[int, int], list[int]] = {}
+            for idx in sorted(inside.tolist(), key=lambda idx: (line_of[idx], words.left[idx])):
+                column = int(np.searchsorted(column_bounds, centers_x[idx]))
+                cells.setdefault((row_of[idx], column), []).append(idx)
+
+            columns_count = len(column_bounds) + 1
+            rows = [
+                [
+                    " ".join(texts[idx] for idx in cells.get((row, column), []))
+                    for column in range(columns_count)
+                ]
+                for row in sorted({row for row, _ in cells})
+            ]
+            header = [
+                " ".join(part for part in parts if part)
+                for parts in zip(*rows[: max(header_rows, 1)])
+            ]
+            body_rows = rows[max(header_rows, 1) :]
+            # Промежутки между словами обычного текста не образуют столбцов,
+            # поэтому большинство строк настоящей таблицы заполнено хотя бы в двух ячейках
+            filled = sum(1 for row in body_rows if sum(1 for cell in row if cell) >= 2)
+            if not body_rows or filled * 2 < len(body_rows):
+                continue
+
+            tables.append(PageTable(page=page_number, header=header, rows=body_rows, source=source))
+
+        return tables
+
+    @staticmethod
+    def _merge_rules(rules: list[_Rule], tolerance: float, min_length: float) -> list[_Rule]:
+        """Объединяет отрезки одной линии и отбрасывает короткие линии"""
+        merged: list[_Rule] = []
+        for rule in sorted(rules, key=lambda rule: (round(rule.pos / tolerance), rule.start)):
+            last = merged[-1] if merged else None
+            if (
+                last is not None
+                and abs(rule.pos - last.pos) <= tolerance
+                and rule.start <= last.end + tolerance
+            ):
+                last.end = max(last.end, rule.end)
+                continue
+            merged.append(_Rule(rule.pos, rule.start, rule.end))
+        return [rule for rule in merged if rule.end - rule.start >= min_length]
+
+    @staticmethod
+    def _merge_positions(positions: list[float], tolerance: float) -> list[float]:
+        """Объединяет близкие координаты (например, двойные линии)"""
+        merged: list[float] = []
+        for position in positions:
+            if not merged or position - merged[-1] > tolerance:
+                merged.append(position)
+        return merged
+
+    @staticmethod
+    def _column_gaps(
+        words: OCRWords, indices: list[int], x0: float, x1: float, min_gap: float
+    ) -> list[float]:
+        """Возвращает границы столбцов - середины широких промежутков между словами"""
+        start = int(x0)
+        occupied = np.zeros(int(x1) - start + 1, dtype=bool)
+        for idx in indices:
+            left = max(int(words.left[idx]) - start, 0)
+            occupied[left : left + int(words.width[idx])] = True
+
+        filled = np.flatnonzero(occupied)
+        if not len(filled):
+            return []
+        bounds = []
+        gap_start = None
+        for position in range(int(filled[0]), int(filled[-1]) + 1):
+            if not occupied[position]:
+                if gap_start is None:
+                    gap_start = position
+                continue
+            if gap_start is not None and position - gap_start >= min_gap:
+                bounds.append(start + (gap_start + position) / 2)
+            gap_start = None
+        return bounds
+
+
+_TOKEN_PATTERN = re.compile(r"\S+")
+_WORD_PATTERN = re.compile(r"^[(\[\"']?[A-Za-z]*[AEIOUYaeiouy][A-Za-z]*[)\]\"'.,;:!?]*$")
+
+
+def _text_layer_quality(text: str) -> tuple[int, float]:
+    """
+    Оценивает качество текстового слоя страницы
+
+    Returns:
+        tuple[int, float]: Количество непробельных символов и доля токенов,
+        похожих на слова естественного языка
+    """
+    tokens = _TOKEN_PATTERN.findall(text)
+    if not tokens:
+        return 0, 0.0
+    chars = sum(len(token) for token in tokens)
+    words = sum(1 for token in tokens if _WORD_PATTERN.match(token))
+    return chars, words / len(tokens)
+
+
+def _is_text_layer_usable(text: str, config: OCRConfig) -> bool:
+    """Проверяет, можно ли использовать текстовый слой страницы вместо OCR"""
+    chars, word_ratio = _text_layer_quality(text)
+    return (
+        chars >= config.text_layer_min_chars
+        and word_ratio >= config.text_layer_min_word_ratio
+    )
+
+
+def _format_page_text(page_num: int, page_text: str) -> str:
+    """Оформляет текст страницы с разделителем PAGE_DIVIDER"""
+    if not page_text.strip():
+        return ""
+    return (
+        PAGE_DIVIDER.replace("%NUM%", str(page_num + 1)) + "\n"
+        + page_text.strip()
+        + "\n\n"
+    )
+
+
+def _page_body(page_text: str) -> str:
+    """Возвращает текст страницы без разделителя PAGE_DIVIDER"""
+    if not page_text:
+        return ""
+    return page_text.split("\n", 1)[1].strip()
+
+
+class _PixmapArray(np.ndarray):
+    """
+    Массив NumPy над памятью Pixmap: хранит ссылку на pixmap, поэтому память
+    не освобождается, пока существует массив или полученные из него представления
+    """
+
+    pixmap: fitz.Pixmap | None
+
+    def __array_finalize__(self, obj) -> None:
+        self.pixmap = getattr(obj, "pixmap", None)
+
+
+def _pixmap_as_array(pix: fitz.Pixmap) -> np.ndarray:
+    """
+    Возвращает полутоновый pixmap как массив NumPy без копирования буфера
+
+    Args:
+        pix: Pixmap в пространстве csGRAY без альфа-канала
+
+    Returns:
+        np.ndarray: Представление (height, width) над памятью pixmap,
+        которое владеет pixmap
+    """
+    buffer = np.frombuffer(pix.samples_mv, dtype=np.uint8).view(_PixmapArray)
+    buffer.pixmap = pix
+    return buffer.reshape(pix.height, pix.stride)[:, : pix.width]
+
+
+def _render_page(page: fitz.Page, dpi: int) -> np.ndarray:
+    """
+    Растеризует страницу в полутоновое изображение
+
+    Returns:
+        np.ndarray: Изображение страницы (height, width) над памятью pixmap
+    """
+    matrix = fitz.Matrix(dpi / 72, dpi / 72)
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)  # type: ignore
+    return _pixmap_as_array(pix)
+
+
+def _ocr_page(
+    page: fitz.Page,
+    dpi: int,
+    enable_preprocessing: bool,
+    tesseract_config: str,
+    config: OCRConfig,
+) -> tuple[str, OCRWords | None, list[PageTable]]:
+    """
+    Распознает страницу с заданным DPI
+
+    Returns:
+        tuple[str, OCRWords | None, list[PageTable]]: Текст страницы, слова (только
+        при config.save_words или config.extract_tables) и таблицы (только при
+        config.extract_tables)
+    """
+    gray = _render_page(page, dpi)
+    image: np.ndarray | Image.Image = gray
+
+    if enable_preprocessing:
+        logger.debug(f"Выполняется предобработка изображения для страницы {page.number + 1}")
+        try:
+            image = ImagePreprocessor.enhance_array(gray)
+        except Exception:
+            logger.debug(
+                f"OpenCV обработка не удалась, fallback на PIL для страницы {page.number + 1}"
+            )
+            image = ImagePreprocessor.pil_enhance_image(Image.fromarray(gray))
+
+    logger.debug(f"Запуск OCR для страницы {page.number + 1} ({dpi} DPI)")
+    if not config.save_words and not config.extract_tables:
+        text = pytesseract.image_to_string(image, lang=config.language, config=tesseract_config)
+        return text, None, []
+
+    # Текст и TSV за один запуск Tesseract, чтобы текст совпадал с image_to_string
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = Path(tmp_dir) / "page.png"
+        output_base = Path(tmp_dir) / "page"
+        if isinstance(image, np.ndarray):
+            cv2.imwrite(str(input_path), image)
+        else:
+            image.save(input_path)
+
+        pytesseract.pytesseract.run_tesseract(
+            str(input_path),
+            str(output_base),
+            extension="txt",
+            lang=config.language,
+            config=f"{tesseract_config} -c tessedit_create_tsv=1",
+        )
+        text = output_base.with_suffix(".txt").read_text(encoding="utf-8")
+        tsv = output_base.with_suffix(".tsv").read_text(encoding="utf-8")
+
+    words = OCRWords.from_tsv(tsv, page=page.number + 1, dpi=dpi)
+    tables = _raster_tables(gray, words, dpi, page, config)
+    return text, words, tables
+
+
+def _raster_tables(
+    gray: np.ndarray, words: OCRWords, dpi: int, page: fitz.Page, config: OCRConfig
+) -> list[PageTable]:
+    """Находит таблицы на растре распознанной страницы (только при config.extract_tables)"""
+    if not config.extract_tables:
+        return []
+    try:
+        return TableDetector.from_raster(gray, words, dpi, page.number + 1)
+    except Exception as e:
+        logger.warning(f"Ошибка при поиске таблиц на странице {page.number + 1}: {e}")
+        return []
+
+
+def _ocr_page_with_confidence(
+    page: fitz.Page, dpi: int, tesseract_config: str, config: OCRConfig
+) -> tuple[str, float, OCRWords, list[PageTable]]:
+    """
+    Распознает страницу без предобработки и оценивает уверенность распознавания
+
+    Returns:
+        tuple[str, float, OCRWords, list[PageTable]]: Текст страницы, средняя
+        уверенность Tesseract по словам (0, если слов не найдено), слова страницы
+        и таблицы (только при config.extract_tables)
+    """
+    gray = _render_page(page, dpi)
+    logger.debug(f"Запуск OCR для страницы {page.number + 1} ({dpi} DPI)")
+    tsv = pytesseract.image_to_data(gray, lang=config.language, config=tesseract_config)
+
+    words = OCRWords.from_tsv(tsv, page=page.number + 1, dpi=dpi)
+    tables = _raster_tables(gray, words, dpi, page, config)
+
+    # Восстанавливаем текст в формате image_to_string: строки через перевод
+    # строки, абзацы через пустую строку
+    parts = []
+    previous_line = previous_paragraph = None
+    for block, par, line, word in zip(
+        words.block.tolist(), words.par.tolist(), words.line.tolist(), words.words
+    ):
+        if (block, par, line) == previous_line:
+            parts[-1] += " " + word
+            continue
+        if previous_paragraph is not None and previous_paragraph != (block, par):
+            parts.append("")
+        parts.append(word)
+        previous_line, previous_paragraph = (block, par, line), (block, par)
+
+    confidence = float(words.conf.mean()) if len(words) else 0.0
+    return "\n".join(parts), confidence, words, tables
+
+
+def _text_layer_words(page: fitz.Page) -> OCRWords:
+    """Возвращает слова текстового слоя страницы (координаты в точках PDF)"""
+    records = [
+        (block, 0, line, word, round(x0), round(y0), round(x1 - x0), round(y1 - y0), 100.0, text)
+        for x0, y0, x1, y1, text, block, line, word in page.get_text("words")  # type: ignore
+    ]
+    return OCRWords.from_records(records, page=page.number + 1, dpi=72)
+
+
 def _process_page_chunk(
     args: tuple[Path, list[int], OCRConfig],
-) -> list[tuple[int, str]]:
+) -> list[PageExtraction]:
     """Обрабатывает chunk страниц PDF"""
     document_path, page_nums, config = args
     results = []
@@ -134,7 +811,6 @@ def _process_page_chunk(
             f"Открываем документ {document_path} для чанка страниц: {page_nums}"
         )
         pdf_document = fitz.open(document_path)
-        matrix = fitz.Matrix(config.dpi / 72, config.dpi / 72)
 
         tesseract_config = f"--psm {config.psm} --oem {config.oem}"
         logger.debug(f"Tesseract config: {tesseract_config}")
@@ -143,43 +819,88 @@ def _process_page_chunk(
             try:
                 logger.debug(f"Загружаем страницу {page_num + 1}")
                 page = pdf_document.load_page(page_num)
-                pix = page.get_pixmap(matrix=matrix) # type: ignore
-                img_data = pix.tobytes("ppm")
-                image = Image.open(io.BytesIO(img_data))
 
-                if config.enable_preprocessing:
-                    logger.debug(
-                        f"Выполняется предобработка изображения для страницы {page_num + 1}"
+                if config.use_text_layer:
+                    layer_text = page.get_text()  # type: ignore
+                    if _is_text_layer_usable(layer_text, config):
+                        logger.debug(
+                            f"Для страницы {page_num + 1} используется текстовый слой PDF"
+                        )
+                        words = None
+                        tables = None
+                        if config.save_words or config.extract_tables:
+                            words = _text_layer_words(page)
+                        if config.extract_tables:
+                            tables = TableDetector.from_text_layer(page, words)  # type: ignore[arg-type]
+                        results.append(
+                            PageExtraction(
+                                page_num,
+                                _format_page_text(page_num, layer_text),
+                                PageSource.TEXT_LAYER,
+                                words=words if config.save_words else None,
+                                tables=tables,
+                            )
+                        )
+                        continue
+
+                if config.classify_pages:
+                    gray = _render_page(page, config.classifier_dpi)
+                    kind = PageClassifier.classify(gray, config.classifier_dpi)
+                    if kind == PageKind.BLANK or (
+                        kind == PageKind.FIGURE and config.skip_figure_pages
+                    ):
+                        logger.debug(f"Страница {page_num + 1} ({kind}) пропущена без OCR")
+                        results.append(
+                            PageExtraction(
+                                page_num, "", kind, tables=[] if config.extract_tables else None
+                            )
+                        )
+                        continue
+
+                dpi = config.dpi
+                confidence = None
+                page_text = None
+                words = None
+                tables = []
+                if config.adaptive:
+                    page_text, confidence, words, tables = _ocr_page_with_confidence(
+                        page, config.adaptive_low_dpi, tesseract_config, config
                     )
-                    try:
-                        image = ImagePreprocessor.enhance_image(image)
-                    except Exception:
+                    if confidence >= config.adaptive_min_confidence:
+                        dpi = config.adaptive_low_dpi
+                    else:
                         logger.debug(
-                            f"OpenCV обработка не удалась, fallback на PIL для страницы {page_num + 1}"
+                            f"Уверенность OCR страницы {page_num + 1} при {config.adaptive_low_dpi} DPI "
+                            f"{confidence:.1f} < {config.adaptive_min_confidence}, повтор с {config.dpi} DPI"
                         )
-                        image = ImagePreprocessor.pil_enhance_image(image)
-
-                logger.debug(f"Запуск OCR для страницы {page_num + 1}")
-                page_text = pytesseract.image_to_string(
-                    image, lang=config.language, config=tesseract_config
-                )
+                        page_text = None
 
-                if page_text.strip():
-                    result = (
-                        PAGE_DIVIDER.replace("%NUM%", str(page_num + 1)) + "\n"
-                        + page_text.strip()
-                        + "\n\n"
+                if page_text is None:
+                    page_text, words, tables = _ocr_page(
+                        page, config.dpi, config.enable_preprocessing, tesseract_config, config
                     )
-                else:
-                    result = ""
 
-                results.append((page_num, result))
+                results.append(
+                    PageExtraction(
+                        page_num,
+                        _format_page_text(page_num, page_text),
+                        PageSource.OCR,
+                        dpi=dpi,
+                        confidence=confidence,
+                        words=words if config.save_words else None,
+                        tables=tables if config.extract_tables else None,
+                    )
+                )
                 logger.debug(f"Обработана страница {page_num + 1}")
 
             except Exception as e:
                 logger.warning(f"Ошибка при обработке страницы {page_num + 1}: {e}")
                 results.append(
-                    (page_num, f"=== ОШИБКА НА СТРАНИЦЕ {page_num + 1} ===\n")
+                    PageExtraction(
+                        page_num,
+                        f"=== ОШИБКА НА СТРАНИЦЕ {page_num + 1} ===\n",
+                        PageSource.ERROR,
+                    )
                 )
 
         pdf_document.close()
@@ -191,7 +912,11 @@ def _process_page_chunk(
         logger.error(f"Критическая ошибка при обработке чанка: {e}")
         for page_num in page_nums:
             results.append(
-                (page_num, f"=== КРИТИЧЕСКАЯ ОШИБКА НА СТРАНИЦЕ {page_num + 1} ===\n")
+                PageExtraction(
+                    page_num,
+                    f"=== КРИТИЧЕСКАЯ ОШИБКА НА СТРАНИЦЕ {page_num + 1} ===\n",
+                    PageSource.ERROR,
+                )
             )
 
     return results
@@ -206,14 +931,62 @@ def _create_chunks(page_nums: list[int], chunk_size: int) -> list[list[int]]:
 class PDFTextExtractor:
     """Основной класс для извлечения текста из PDF"""
 
-    def __init__(self, config: OCRConfig | None = None):
+    def __init__(
+        self,
+        config: OCRConfig | None = None,
+        use_cache: bool = True,
+        cache: OCRPageCache | None = None,
+    ):
+        """
+        Инициализация PDFTextExtractor
+
+        Args:
+            config: Конфигурация OCR
+            use_cache: Использовать кэш текста страниц
+            cache: Кэш текста страниц (по умолчанию общий кэш процесса)
+        """
         self.config = config or OCRConfig()
         if self.config.max_workers is None:
             self.config.max_workers = min(
                 mp.cpu_count(), 4
             )
+        if not use_cache:
+            self.cache = None
+        elif cache is not None:
+            self.cache = cache
+        else:
+            self.cache = get_default_ocr_cache()
+        self._executor: ProcessPoolExecutor | None = None
+        # Глубина вложенности блоков with (пул закрывается при выходе из внешнего)
+        self._depth = 0
         logger.debug(f"PDFTextExtractor инициализирован с config: {self.config}")
 
+    def __enter__(self) -> "PDFTextExtractor":
+        """
+        Открывает пул процессов, общий для всех вызовов внутри блока with.
+        Вложенные блоки with используют пул внешнего блока
+        """
+        if self._depth == 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.config.max_workers)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @contextmanager
+    def _pool(self) -> Iterator[ProcessPoolExecutor]:
+        """Возвращает общий пул процессов или создает пул на время вызова"""
+        if self._executor is not None:
+            yield self._executor
+            return
+
+        with ProcessPoolExecutor(max_workers=self.config.max_workers) as executor:
+            yield executor
+
     def extract_text(self, document_path: Path) -> str:
         """
         Извлекает текст из PDF документа
@@ -229,72 +1002,626 @@ class PDFTextExtractor:
             ValueError: Если файл не является PDF
             Exception: При других ошибках обработки
         """
-        start_time = time.time()
+        return self._join_pages(self.extract_pages(document_path))
 
-        if not document_path.exists():
-            raise FileNotFoundError(f"Файл не найден: {document_path}")
+    def extract_pages(self, document_path: Path) -> list[PageExtraction]:
+        """
+        Извлекает текст из PDF документа постранично
 
-        if not document_path.suffix.lower() == ".pdf":
-            raise ValueError("Файл должен быть в формате PDF")
+        Args:
+            document_path: Путь к PDF файлу
+
+        Returns:
+            Результаты извлечения страниц в порядке страниц
+
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл не является PDF
+            Exception: При других ошибках обработки
+        """
+        self._check_document(document_path)
 
         try:
-            logger.debug(f"Открываем PDF для подсчета страниц: {document_path}")
-            pdf_document = fitz.open(document_path)
-            num_pages = len(pdf_document)
-            pdf_document.close()
+            for _, pages, _ in self.extract_many([document_path]):
+                return pages
+            return []
+        except Exception as e:
+            logger.error(f"Критическая ошибка при обработке PDF: {e}")
+            raise Exception(f"Ошибка при обработке PDF: {e}")
 
-            if num_pages == 0:
-                logger.warning("PDF документ пуст")
-                return ""
+    def extract_many(
+        self, document_paths: list[Path]
+    ) -> Generator[tuple[Path, list[PageExtraction], float], None, None]:
+        """
+        Извлекает текст из нескольких PDF документов в одном пуле процессов.
 
-            logger.info(
-                f"Начинаем обработку PDF: {cut_str(document_path.name)} ({num_pages} страниц)"
+        Чанки страниц всех документов ставятся в общий пул, поэтому короткие
+        документы не простаивают пул, а процессы создаются один раз на весь
+        запуск. Документ отдается, как только обработан его последний чанк.
+
+        Args:
+            document_paths: Пути к PDF файлам
+
+        Yields:
+            tuple[Path, list[PageExtraction], float]: Путь к документу, результаты
+            извлечения страниц в порядке страниц и время обработки документа
+            в порядке завершения документов. Документы, которые не удалось
+            открыть, пропускаются
+        """
+        with self._pool() as executor:
+            future_to_chunk = {}
+            pending_chunks: dict[Path, int] = {}
+            document_pages: dict[Path, list[PageExtraction]] = {}
+            start_times: dict[Path, float] = {}
+            document_keys: dict[Path, list[str]] = {}
+
+            for document_path in document_paths:
+                try:
+                    self._check_document(document_path)
+                    num_pages = self.get_pages_count(document_path)
+                except Exception as e:
+                    logger.error(
+                        f"Не удалось открыть {cut_str(document_path.name)}: {e}"
+                    )
+                    continue
+
+                if num_pages == 0:
+                    logger.warning(f"PDF документ {cut_str(document_path.name)} пуст")
+                    yield document_path, [], 0.0
+                    continue
+
+                logger.info(
+                    f"Начинаем обработку PDF: {cut_str(document_path.name)} ({num_pages} страниц)"
+                )
+
+                start_times[document_path] = time.time()
+                page_keys, cached_pages = self._load_cached_pages(document_path)
+                document_keys[document_path] = page_keys
+                document_pages[document_path] = cached_pages
+
+                cached_nums = {page.page_num for page in cached_pages}
+                missing_pages = [
+                    page_num for page_num in range(num_pages) if page_num not in cached_nums
+                ]
+                if not missing_pages:
+                    logger.info(
+                        f"Все страницы {cut_str(document_path.name)} найдены в кэше OCR"
+                    )
+                    yield self._finish_document(
+                        document_path,
+                        document_pages.pop(document_path),
+                        start_times.pop(document_path),
+                    )
+                    continue
+
+                chunks = _create_chunks(missing_pages, self.config.chunk_size)
+                logger.debug(f"Создано {len(chunks)} чанков для обработки")
+
+                pending_chunks[document_path] = len(chunks)
+                for chunk in chunks:
+                    future = executor.submit(
+                        _process_page_chunk, (document_path, chunk, self.config)
+                    )
+                    future_to_chunk[future] = (document_path, chunk)
+
+            logger.debug(f"Отправлено {len(future_to_chunk)} задач в пул процессов")
+
+            for future in as_completed(future_to_chunk):
+                document_path, chunk = future_to_chunk.pop(future)
+                try:
+                    chunk_results = future.result()
+                    document_pages[document_path].extend(chunk_results)
+                    self._store_cached_pages(document_keys[document_path], chunk_results)
+                    logger.debug(
+                        f"Завершен чанк страниц {chunk[0] + 1}-{chunk[-1] + 1} "
+                        f"документа {cut_str(document_path.name)}"
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Ошибка в чанке страниц {chunk[0] + 1}-{chunk[-1] + 1} "
+                        f"документа {cut_str(document_path.name)}: {e}"
+                    )
+
+                pending_chunks[document_path] -= 1
+                if pending_chunks[document_path] > 0:
+                    continue
+
+                del pending_chunks[document_path], document_keys[document_path]
+                yield self._finish_document(
+                    document_path,
+                    document_pages.pop(document_path),
+                    start_times.pop(document_path),
+                )
+
+    def _finish_document(
+        self, document_path: Path, results: list[PageExtraction], start_time: float
+    ) -> tuple[Path, list[PageExtraction], float]:
+        """Упорядочивает страницы завершенного документа и логирует итог"""
+        results.sort(key=lambda x: x.page_num)
+        processing_time = time.time() - start_time
+
+        if not self._join_pages(results):
+            logger.warning(
+                f"Не удалось извлечь текст из документа {cut_str(document_path.name)}"
+            )
+        else:
+            text_layer_pages = sum(
+                1 for r in results if r.source == PageSource.TEXT_LAYER
+            )
+            logger.success(
+                f"Извлечение {cut_str(document_path.name)} завершено за {processing_time:.2f}с. "
+                f"Страниц из текстового слоя: {text_layer_pages}, "
+                f"распознано OCR: {len(results) - text_layer_pages}"
             )
 
-            page_nums = list(range(num_pages))
-            chunks = _create_chunks(page_nums, self.config.chunk_size)
-            logger.debug(f"Создано {len(chunks)} чанков для обработки")
+        return document_path, results, processing_time
 
-            args = [(document_path, chunk, self.config) for chunk in chunks]
+    def _load_cached_pages(
+        self,
+        document_path: Path,
+        page_nums: list[int] | None = None,
+        page_keys: list[str] | None = None,
+    ) -> tuple[list[str], list[PageExtraction]]:
+        """
+        Загружает из кэша текст страниц документа
 
-            results = []
-            with ProcessPoolExecutor(max_workers=self.config.max_workers) as executor:
-                future_to_chunk = {
-                    executor.submit(_process_page_chunk, arg): i
-                    for i, arg in enumerate(args)
-                }
-                logger.debug(f"Отправлено {len(future_to_chunk)} задач в пул процессов")
+        Args:
+            document_path: Путь к PDF файлу
+            page_nums: Номера страниц (по умолчанию все страницы документа)
+            page_keys: Уже вычисленные ключи всех страниц документа
+
+        Returns:
+            tuple[list[str], list[PageExtraction]]: Ключи всех страниц документа
+            и страницы, найденные в кэше
+        """
+        if self.cache is None:
+            return [], []
+
+        try:
+            if page_keys is None:
+                page_keys = self.cache.page_keys(document_path, self.config)
+            if page_nums is None:
+                page_nums = list(range(len(page_keys)))
+            found = self.cache.get_many([page_keys[page_num] for page_num in page_nums])
+        except Exception as e:
+            logger.warning(
+                f"Не удалось прочитать кэш OCR для {cut_str(document_path.name)}: {e}"
+            )
+            return page_keys or [], []
+
+        cached_pages = []
+        for page_num in page_nums:
+            cached = found.get(page_keys[page_num])
+            if cached is not None:
+                cached_pages.append(
+                    PageExtraction(
+                        page_num,
+                        _format_page_text(page_num, cached.text),
+                        cached.source,
+                        dpi=cached.dpi,
+                        confidence=cached.confidence,
+                        words=cached.words,
+                        tables=cached.tables,
+                    )
+                )
+        if cached_pages:
+            logger.debug(
+                f"Из кэша OCR загружено {len(cached_pages)}/{len(page_nums)} страниц "
+                f"{cut_str(document_path.name)}"
+            )
+        return page_keys, cached_pages
+
+    def _store_cached_pages(
+        self, page_keys: list[str], pages: list[PageExtraction]
+    ) -> None:
+        """Сохраняет в кэш успешно обработанные страницы"""
+        if self.cache is None or not page_keys:
+            return
+
+        try:
+            self.cache.set_many(
+                [
+                    (
+                        page_keys[page.page_num],
+                        CachedPage(
+                            _page_body(page.text),
+                            page.source,
+                            page.words,
+                            page.tables,
+                            page.dpi,
+                            page.confidence,
+                        ),
+                    )
+                    for page in pages
+                    if page.source != PageSource.ERROR
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить страницы в кэш OCR: {e}")
+
+    def iter_pages(
+        self, document_path: Path, text_path: Path | None = None
+    ) -> Generator[tuple[int, str], None, None]:
+        """
+        Извлекает текст PDF документа, отдавая страницы по мере готовности.
+
+        Страницы из кэша отдаются сразу, остальные - по завершении их чанка,
+        поэтому следующий этап может начинать работу до окончания OCR документа.
 
-                for future in as_completed(future_to_chunk):
-                    chunk_idx = future_to_chunk[future]
+        Args:
+            document_path: Путь к PDF файлу
+            text_path: Путь к .txt файлу документа, рядом с которым после обработки
+                документа сохраняются слова (config.save_words) и таблицы
+                (config.extract_tables) страниц
+
+        Yields:
+            tuple[int, str]: Номер страницы (начиная с 1) и ее текст без
+            разделителя в порядке готовности страниц. Для страниц с ошибкой
+            распознавания текст пустой
+
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл не является PDF
+        """
+        for page in self.iter_page_extractions(document_path, text_path):
+            yield page.page_num + 1, "" if page.source == PageSource.ERROR else page.body
+
+    def iter_page_extractions(
+        self, document_path: Path, text_path: Path | None = None
+    ) -> Generator[PageExtraction, None, None]:
+        """
+        Извлекает страницы PDF документа по мере готовности (см. iter_pages)
+
+        Args:
+            document_path: Путь к PDF файлу
+            text_path: Путь к .txt файлу документа для сохранения слов и таблиц
+
+        Yields:
+            PageExtraction: Результаты извлечения страниц в порядке готовности
+
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл не является PDF
+        """
+        self._check_document(document_path)
+        num_pages = self.get_pages_count(document_path)
+
+        page_keys, cached_pages = self._load_cached_pages(document_path)
+        # Слова и таблицы собираются и со страниц из кэша, иначе при повторном
+        # извлечении документа файлы слов и таблиц не записываются
+        page_words: list[OCRWords] = []
+        page_tables: list[PageTable] = []
+
+        def collect(page: PageExtraction) -> PageExtraction:
+            if page.words is not None:
+                page_words.append(page.words)
+            page_tables.extend(page.tables or [])
+            return page
+
+        for page in cached_pages:
+            yield collect(page)
+
+        cached_nums = {page.page_num for page in cached_pages}
+        missing_pages = [
+            page_num for page_num in range(num_pages) if page_num not in cached_nums
+        ]
+        if missing_pages:
+            with self._pool() as executor:
+                futures = {
+                    executor.submit(_process_page_chunk, (document_path, chunk, self.config)): chunk
+                    for chunk in _create_chunks(missing_pages, self.config.chunk_size)
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
                     try:
                         chunk_results = future.result()
-                        results.extend(chunk_results)
-                        logger.info(f"Завершен чанк {chunk_idx + 1}/{len(chunks)}")
                     except Exception as e:
-                        logger.error(f"Ошибка в чанке {chunk_idx + 1}: {e}")
+                        logger.error(
+                            f"Ошибка в чанке страниц {chunk[0] + 1}-{chunk[-1] + 1} "
+                            f"документа {cut_str(document_path.name)}: {e}"
+                        )
+                        continue
+
+                    self._store_cached_pages(page_keys, chunk_results)
+                    for page in chunk_results:
+                        yield collect(page)
 
-            results.sort(key=lambda x: x[0])
-            extracted_text = [r[1] for r in results]
+        if text_path is not None and self.config.save_words:
+            self._save_words(page_words, words_sidecar_path(text_path))
+        if text_path is not None and self.config.extract_tables:
+            self._save_tables(page_tables, tables_sidecar_path(text_path))
 
-            result_text = "".join(extracted_text).strip()
+    @staticmethod
+    def format_text(pages: Iterable[tuple[int, str]]) -> str:
+        """
+        Собирает текст документа из страниц iter_pages в формате extract_text
 
-            processing_time = time.time() - start_time
+        Args:
+            pages: Номера страниц (начиная с 1) и их текст
 
-            if not result_text:
-                logger.warning("Не удалось извлечь текст из документа")
-                return ""
+        Returns:
+            str: Текст документа с разделителями PAGE_DIVIDER в порядке страниц
+        """
+        return "".join(
+            _format_page_text(number - 1, text) for number, text in sorted(pages)
+        ).strip()
 
-            logger.success(
-                f"Извлечение завершено за {processing_time:.2f}с. "
-                f"Извлечено {len(result_text)} символов"
+    def extract_windowed(
+        self, document_path: Path, output_path: Path, window_size: int = PAGES_LIMIT
+    ) -> dict[str, Any]:
+        """
+        Извлекает текст большого PDF окнами страниц с записью в файл.
+
+        Текст каждого окна дописывается в <output_path>.part, а после записи
+        окна обновляется файл прогресса <output_path>.progress (позиция и
+        статистика обработанных страниц). В памяти
+        находится только текущее окно, а прерванное извлечение продолжается
+        с последнего завершенного окна. После обработки всех страниц
+        .part переименовывается в output_path.
+
+        Args:
+            document_path: Путь к PDF файлу
+            output_path: Путь к итоговому текстовому файлу
+            window_size: Количество страниц в одном окне
+
+        Returns:
+            dict[str, Any]: Метаданные извлечения (те же ключи, что у
+            extract_with_confidence, кроме page_sources)
+
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл не является PDF или window_size < 1
+        """
+        self._check_document(document_path)
+        if window_size < 1:
+            raise ValueError("window_size must be greater than 0")
+
+        start_time = time.time()
+        num_pages = self.get_pages_count(document_path)
+        part_path = output_path.with_name(output_path.name + ".part")
+        progress_path = output_path.with_name(output_path.name + ".progress")
+        config_fingerprint = OCRPageCache.config_fingerprint(self.config)
+
+        pages_done, written, text_length = 0, 0, 0
+        # Статистика страниц накапливается по всем окнам, в том числе
+        # записанным до прерывания извлечения (хранится в файле прогресса)
+        stats = {PageSource.TEXT_LAYER: 0, PageSource.OCR: 0, PageSource.ERROR: 0}
+        low_dpi_pages = 0
+        skipped_pages: dict[int, str] = {}
+        if part_path.exists() and progress_path.exists():
+            try:
+                progress = json.loads(progress_path.read_text(encoding="utf-8"))
+                if (
+                    progress["num_pages"] == num_pages
+                    and progress["config"] == config_fingerprint
+                ):
+                    saved_stats = {**stats, **progress["stats"]}
+                    saved_skipped = {
+                        int(number): source for number, source in progress["skipped_pages"].items()
+                    }
+                    low_dpi_pages = progress["low_dpi_pages"]
+                    stats, skipped_pages = saved_stats, saved_skipped
+                    pages_done, written = progress["pages_done"], progress["bytes"]
+                    text_length = progress["text_length"]
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать прогресс {cut_str(progress_path)}: {e}")
+
+        if pages_done:
+            logger.info(
+                f"Продолжаем извлечение {cut_str(document_path.name)} со страницы "
+                f"{pages_done + 1}/{num_pages}"
+            )
+        else:
+            logger.info(
+                f"Начинаем извлечение {cut_str(document_path.name)} окнами по {window_size} "
+                f"страниц ({num_pages} страниц)"
             )
 
-            return result_text
+        page_keys, _ = self._load_cached_pages(document_path, page_nums=[])
+
+        part_path.touch(exist_ok=True)
+        # Слова и таблицы каждого окна сохраняются отдельно, чтобы продолжение не теряло их
+        words_part_dir = output_path.with_name(output_path.name + ".words")
+        if self.config.save_words:
+            words_part_dir.mkdir(exist_ok=True)
+            for path in words_part_dir.glob("*.npz"):
+                if int(path.stem) >= pages_done:
+                    path.unlink()
+        tables_part_dir = output_path.with_name(output_path.name + ".tables")
+        if self.config.extract_tables:
+            tables_part_dir.mkdir(exist_ok=True)
+            for path in tables_part_dir.glob("*.json"):
+                if int(path.stem) >= pages_done:
+                    path.unlink()
+        with (
+            self._pool() as executor,
+            open(part_path, "r+b") as part,
+        ):
+            # Отбрасываем хвост окна, запись которого могла прерваться
+            part.truncate(written)
+            part.seek(written)
+
+            for window_start in range(pages_done, num_pages, window_size):
+                window = list(range(window_start, min(window_start + window_size, num_pages)))
+                _, results = self._load_cached_pages(document_path, window, page_keys)
+
+                cached_nums = {page.page_num for page in results}
+                missing_pages = [page_num for page_num in window if page_num not in cached_nums]
+                futures = {
+                    executor.submit(_process_page_chunk, (document_path, chunk, self.config)): chunk
+                    for chunk in _create_chunks(missing_pages, self.config.chunk_size)
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        chunk_results = future.result()
+                    except Exception as e:
+                        logger.error(
+                            f"Ошибка в чанке страниц {chunk[0] + 1}-{chunk[-1] + 1} "
+                            f"документа {cut_str(document_path.name)}: {e}"
+                        )
+                        continue
+                    results.extend(chunk_results)
+                    self._store_cached_pages(page_keys, chunk_results)
+
+                results.sort(key=lambda x: x.page_num)
+                for page in results:
+                    stats[page.source] = stats.get(page.source, 0) + 1
+                    if page.dpi is not None and page.dpi < self.config.dpi:
+                        low_dpi_pages += 1
+                    if page.source in PageSource.SKIPPED:
+                        skipped_pages[page.page_num + 1] = page.source
+
+                if self.config.save_words:
+                    self._save_words(
+                        [page.words for page in results if page.words is not None],
+                        words_part_dir / f"{window[0]:06d}.npz",
+                    )
+                if self.config.extract_tables:
+                    save_tables(
+                        [table for page in results for table in page.tables or []],
+                        tables_part_dir / f"{window[0]:06d}.json",
+                    )
 
-        except Exception as e:
-            logger.error(f"Критическая ошибка при обработке PDF: {e}")
-            raise Exception(f"Ошибка при обработке PDF: {e}")
+                text = "".join(page.text for page in results)
+                data = text.encode("utf-8")
+                part.write(data)
+                part.flush()
+                os.fsync(part.fileno())
+                written += len(data)
+                text_length += len(text)
+                pages_done = window[-1] + 1
+
+                self._write_progress(
+                    progress_path,
+                    {
+                        "num_pages": num_pages,
+                        "pages_done": pages_done,
+                        "bytes": written,
+                        "text_length": text_length,
+                        "config": config_fingerprint,
+                        "stats": stats,
+                        "low_dpi_pages": low_dpi_pages,
+                        "skipped_pages": skipped_pages,
+                    },
+                )
+                logger.info(
+                    f"Окно страниц {window[0] + 1}-{window[-1] + 1}/{num_pages} "
+                    f"документа {cut_str(document_path.name)} записано"
+                )
+
+            # Итоговый текст, как и в extract_text, не заканчивается пустыми строками
+            while written and self._last_byte_is_space(part, written):
+                written -= 1
+                text_length -= 1
+            part.truncate(written)
+
+        if self.config.save_words:
+            window_parts = sorted(words_part_dir.glob("*.npz"))
+            self._save_words(
+                [OCRWords.load(path) for path in window_parts], words_sidecar_path(output_path)
+            )
+            for path in window_parts:
+                path.unlink()
+            words_part_dir.rmdir()
+
+        if self.config.extract_tables:
+            window_parts = sorted(tables_part_dir.glob("*.json"))
+            self._save_tables(
+                [table for path in window_parts for table in load_tables(path)],
+                tables_sidecar_path(output_path),
+            )
+            for path in window_parts:
+                path.unlink()
+            tables_part_dir.rmdir()
+
+        part_path.replace(output_path)
+        progress_path.unlink(missing_ok=True)
+
+        processing_time = time.time() - start_time
+        metadata = {
+            "processing_time": processing_time,
+            "text_length": text_length,
+            "config_used": self.config,
+            "pages_processed": stats[PageSource.TEXT_LAYER] + stats[PageSource.OCR],
+            "errors_count": stats[PageSource.ERROR],
+            "text_layer_pages": stats[PageSource.TEXT_LAYER],
+            "ocr_pages": stats[PageSource.OCR],
+            "low_dpi_pages": low_dpi_pages,
+            "skipped_pages": skipped_pages,
+        }
+        logger.debug(f"Метаданные извлечения: {metadata}")
+        return metadata
+
+    @staticmethod
+    def _save_words(page_words: list[OCRWords], words_path: Path) -> None:
+        """Сохраняет слова страниц документа в порядке страниц"""
+        page_words = sorted(page_words, key=lambda words: int(words.page[0]) if len(words) else 0)
+        OCRWords.concat(page_words).save(words_path)
+        logger.debug(f"Слова документа сохранены в {words_path}")
+
+    @staticmethod
+    def _save_tables(tables: list[PageTable], tables_path: Path) -> None:
+        """Сохраняет таблицы страниц документа в порядке страниц"""
+        save_tables(tables, tables_path)
+        logger.debug(f"Таблицы документа ({len(tables)}) сохранены в {tables_path}")
+
+    @staticmethod
+    def _last_byte_is_space(file, size: int) -> bool:
+        """Проверяет, является ли байт перед позицией size пробельным символом"""
+        file.seek(size - 1)
+        return file.read(1).isspace()
+
+    @staticmethod
+    def _write_progress(progress_path: Path, progress: dict[str, Any]) -> None:
+        """Атомарно записывает файл прогресса извлечения"""
+        tmp_path = progress_path.with_name(progress_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(progress), encoding="utf-8")
+        tmp_path.replace(progress_path)
+
+    @staticmethod
+    def _check_document(document_path: Path) -> None:
+        """Проверяет, что файл существует и является PDF"""
+        if not document_path.exists():
+            raise FileNotFoundError(f"Файл не найден: {document_path}")
+
+        if not document_path.suffix.lower() == ".pdf":
+            raise ValueError("Файл должен быть в формате PDF")
+
+    @staticmethod
+    def _join_pages(pages: list[PageExtraction]) -> str:
+        """Собирает текст документа из страниц"""
+        return "".join(page.text for page in pages).strip()
+
+    def write_document(self, pages: list[PageExtraction], output_path: Path) -> str:
+        """
+        Сохраняет текст документа и файлы слов и таблиц (если включены в конфигурации)
+
+        Args:
+            pages: Результаты извлечения страниц документа
+            output_path: Путь к .txt файлу
+
+        Returns:
+            str: Текст документа (пустая строка - текст не извлечен, файлы не записаны)
+        """
+        text = self._join_pages(pages)
+        if not text:
+            return text
+
+        logger.debug(f"Сохраняем результат в {output_path}")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if self.config.save_words:
+            self._save_words(
+                [page.words for page in pages if page.words is not None],
+                words_sidecar_path(output_path),
+            )
+        if self.config.extract_tables:
+            self._save_tables(
+                [table for page in pages for table in page.tables or []],
+                tables_sidecar_path(output_path),
+            )
+        return text
 
     def get_pages_count(self, document_path: Path) -> int:
         """
@@ -317,28 +1644,52 @@ class PDFTextExtractor:
         """
         start_time = time.time()
         logger.debug(f"Запуск extract_with_confidence для {document_path}")
-        text = self.extract_text(document_path)
-        processing_time = time.time() - start_time
+        pages = self.extract_pages(document_path)
+        text = self._join_pages(pages)
+        metadata = self._build_metadata(pages, text, time.time() - start_time)
+
+        return text, metadata
 
+    def _build_metadata(
+        self, pages: list[PageExtraction], text: str, processing_time: float
+    ) -> dict[str, Any]:
+        """Собирает метаданные извлечения документа"""
+        page_sources = {page.page_num + 1: page.source for page in pages}
         metadata = {
             "processing_time": processing_time,
             "text_length": len(text),
             "config_used": self.config,
             "pages_processed": text.count("=== СТРАНИЦА"),
             "errors_count": text.count("=== ОШИБКА"),
+            "page_sources": page_sources,
+            "text_layer_pages": sum(
+                1 for source in page_sources.values() if source == PageSource.TEXT_LAYER
+            ),
+            "ocr_pages": sum(
+                1 for source in page_sources.values() if source == PageSource.OCR
+            ),
+            "low_dpi_pages": sum(
+                1 for page in pages if page.dpi is not None and page.dpi < self.config.dpi
+            ),
+            "skipped_pages": {
+                number: source
+                for number, source in page_sources.items()
+                if source in PageSource.SKIPPED
+            },
         }
         logger.debug(f"Метаданные извлечения: {metadata}")
-
-        return text, metadata
+        return metadata
 
 
 def extract_texts(
     documents_path: Path,
     config: OCRConfig = OCRConfigEnum.HIGH_ACCURACY,
     export_path: Path = RESULTS_RAW_DIR,
+    store: CorpusStore | None = None,
 ) -> ExtractionResults:
     start_time = time.time()
     extractor = PDFTextExtractor(config)
+    store = store or get_default_corpus_store()
     pdf_files = list(documents_path.glob("*.pdf"))
 
     if not pdf_files:
@@ -357,50 +1708,76 @@ def extract_texts(
 
     new_txts = []
     old_txts = []
+    to_extract = []
+    to_extract_windowed = []
     for pdf_file in pdf_files:
         try:
-            logger.info(f"Обрабатываем: {cut_str(pdf_file.name)}")
             output_path = export_path / f"{pdf_file.stem}.txt"
 
             if output_path.exists():
                 logger.info(f"Файл {cut_str(output_path)} уже существует, пропускаем")
                 old_txts.append(output_path)
+                if store.get_status(document_name(output_path)) is None:
+                    record_extraction(store, output_path, pdf_file)
                 continue
 
             page_count = extractor.get_pages_count(pdf_file)
             logger.debug(f"В файле {pdf_file.name} {page_count} страниц")
             if page_count > PAGES_LIMIT:
                 logger.info(
-                    f"Файл {cut_str(pdf_file.name)} содержит больше {PAGES_LIMIT} страниц, пропускаем"
+                    f"Файл {cut_str(pdf_file.name)} содержит больше {PAGES_LIMIT} страниц, "
+                    f"будет обработан окнами по {PAGES_LIMIT} страниц"
                 )
+                to_extract_windowed.append(pdf_file)
                 continue
 
-            logger.debug(f"Запуск извлечения текста с метаданными для {pdf_file.name}")
-            text, metadata = extractor.extract_with_confidence(pdf_file)
-
-            if text:
-                logger.debug(f"Сохраняем результат в {output_path}")
-
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(text)
-
-                logger.success(
-                    f"Файл {cut_str(pdf_file.name)} обработан успешно. "
-                    f"Время: {metadata['processing_time']:.2f}с, "
-                    f"Символов: {metadata['text_length']}, "
-                    f"Страниц: {metadata['pages_processed']}, "
-                    f"Ошибок: {metadata['errors_count']}"
-                )
-                new_txts.append(output_path)
-            else:
-                logger.warning(
-                    f"Из файла {cut_str(pdf_file.name)} не удалось извлечь текст"
-                )
+            to_extract.append(pdf_file)
 
         except Exception as e:
             logger.error(f"Ошибка при обработке {cut_str(pdf_file.name)}: {e}")
             continue
 
+    # Один пул процессов на весь запуск: и для extract_many, и для каждого extract_windowed
+    with extractor:
+        logger.info(f"Запуск извлечения текста для {len(to_extract)} файлов")
+        for pdf_file, pages, processing_time in extractor.extract_many(to_extract):
+            try:
+                output_path = export_path / f"{pdf_file.stem}.txt"
+                text = extractor.write_document(pages, output_path)
+                metadata = extractor._build_metadata(pages, text, processing_time)
+
+                if text:
+                    _log_extraction(pdf_file, metadata, config)
+                    record_extraction(store, output_path, pdf_file, metadata)
+                    new_txts.append(output_path)
+                else:
+                    logger.warning(
+                        f"Из файла {cut_str(pdf_file.name)} не удалось извлечь текст"
+                    )
+
+            except Exception as e:
+                logger.error(f"Ошибка при обработке {cut_str(pdf_file.name)}: {e}")
+                continue
+
+        for pdf_file in to_extract_windowed:
+            try:
+                output_path = export_path / f"{pdf_file.stem}.txt"
+                metadata = extractor.extract_windowed(pdf_file, output_path, PAGES_LIMIT)
+
+                if metadata["text_length"]:
+                    _log_extraction(pdf_file, metadata, config)
+                    record_extraction(store, output_path, pdf_file, metadata)
+                    new_txts.append(output_path)
+                else:
+                    output_path.unlink(missing_ok=True)
+                    logger.warning(
+                        f"Из файла {cut_str(pdf_file.name)} не удалось извлечь текст"
+                    )
+
+            except Exception as e:
+                logger.error(f"Ошибка при обработке {cut_str(pdf_file.name)}: {e}")
+                continue
+
     return ExtractionResults(
         new_txts=new_txts,
         old_txts=old_txts,
@@ -409,3 +1786,44 @@ def extract_texts(
         count_total=len(new_txts) + len(old_txts),
         time_taken=time.time() - start_time,
     )
+
+
+def _log_extraction(pdf_file: Path, metadata: dict[str, Any], config: OCRConfig) -> None:
+    logger.success(
+        f"Файл {cut_str(pdf_file.name)} обработан успешно. "
+        f"Время: {metadata['processing_time']:.2f}с, "
+        f"Символов: {metadata['text_length']}, "
+        f"Страниц: {metadata['pages_processed']} "
+        f"(текстовый слой: {metadata['text_layer_pages']}, OCR: {metadata['ocr_pages']}"
+        + (f", из них с низким DPI: {metadata['low_dpi_pages']}" if config.adaptive else "")
+        + (f", пропущено: {len(metadata['skipped_pages'])}" if config.classify_pages else "")
+        + f"), Ошибок: {metadata['errors_count']}"
+    )
+
+
+def record_extraction(
+    store: CorpusStore,
+    text_path: Path,
+    pdf_path: Path | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> None:
+    """
+    Сохраняет страницы извлеченного документа в хранилище корпуса
+
+    Страницы читаются из записанного .txt, поэтому в хранилище попадает тот же
+    текст страниц, что и в TxtDocument. Ошибка записи не прерывает извлечение.
+
+    Args:
+        store: Хранилище корпуса
+        text_path: Путь к .txt файлу документа
+        pdf_path: Путь к PDF файлу документа
+        metadata: Метаданные извлечения
+    """
+    try:
+        document = TxtDocument(text_path, lazy=True)
+        store.save_extraction(text_path, document.pages, pdf_path, metadata)
+        document.close()
+    except Exception as e:
+        logger.warning(
+            f"Не удалось сохранить {cut_str(text_path.name)} в хранилище корпуса: {e}"
+        )
@@ -1,89 +1,294 @@
+import mmap
+import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Sequence, overload
+
+import numpy as np
+
 from src.constants.processing import PAGE_DIVIDER
+from src.utils import logger
+
+# Строка-разделитель страницы с номером страницы в группе
+_DIVIDER_PATTERN = re.compile(
+    b"^"
+    + re.escape(PAGE_DIVIDER.split("%NUM%")[0].encode("utf-8"))
+    + rb"(\d+)"
+    + re.escape(PAGE_DIVIDER.split("%NUM%")[1].encode("utf-8"))
+    + rb"\r?$",
+    re.MULTILINE,
+)
+# Версия формата файла индекса страниц
+_PAGE_INDEX_VERSION = 2
+
+
+def page_index_path(text_path: Path) -> Path:
+    """
+    Возвращает путь к файлу индекса страниц для текстового файла документа
 
-@dataclass
+    Args:
+        text_path: Путь к .txt файлу документа
+
+    Returns:
+        Path: Путь к файлу <stem>.pages.npy рядом с .txt
+    """
+    return text_path.with_suffix(".pages.npy")
+
+@dataclass(frozen=True, slots=True)
 class Page:
     """
     Класс, представляющий одну страницу текста.
 
+    Неизменяемый объект со слотами: производные поля не хранятся, а вычисляются
+    по тексту при обращении, поэтому страница занимает в памяти только номер
+    и ссылку на текст.
+
     Attributes:
         number (int): Номер страницы.
-        text (str): Текст страницы.
+        text (str): Текст страницы (без начальных и конечных пробельных символов).
         is_empty (bool): Признак пустой страницы.
         symbols_count (int): Количество символов на странице.
     """
     number: int
     text: str
-    is_empty: bool
-    symbols_count: int
-    
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.text
+
+    @property
+    def symbols_count(self) -> int:
+        return len(self.text)
+
+    def __getstate__(self):
+        return (self.number, self.text)
+
+    def __setstate__(self, state):
+        # Страницы из старых результатов сериализованы как обычный dataclass
+        # со словарем полей, включая вычисляемые поля
+        if isinstance(state, dict):
+            state = (state["number"], state["text"])
+        object.__setattr__(self, "number", state[0])
+        object.__setattr__(self, "text", state[1])
+
     def __str__(self):
-        return f"Page(number={self.number}, is_empty={self.is_empty}, symbols_count={self.symbols_count})"
+        return _page_summary(self.number, self.is_empty, self.symbols_count)
+
+
+def _decode_page(data: bytes) -> str:
+    """Декодирует текст страницы с переводами строк \\n, как при чтении файла в текстовом режиме"""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def _page_summary(number: int, is_empty: bool, symbols_count: int) -> str:
+    return f"Page(number={number}, is_empty={is_empty}, symbols_count={symbols_count})"
+
+
+@dataclass
+class _PageSpan:
+    """
+    Положение страницы в файле документа
+
+    number        : номер страницы
+    start         : смещение начала текста страницы в байтах (после разделителя)
+    end           : смещение конца текста страницы в байтах (до следующего разделителя)
+    symbols_count : количество символов на странице
+    """
+
+    number: int
+    start: int
+    end: int
+    symbols_count: int
+
+
+class _LazyPages(Sequence[Page]):
+    """
+    Страницы документа, текст которых читается из файла при обращении
+
+    spans : индекс страниц, строка (номер, начало, конец, количество символов) на страницу
+    """
+
+    def __init__(self, document: "TxtDocument", spans: np.ndarray):
+        self._document = document
+        self._spans = spans
+
+    def span(self, index: int) -> _PageSpan:
+        return _PageSpan(*self._spans[index].tolist())
+
+    @overload
+    def __getitem__(self, index: int) -> Page: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Page]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+        return self._document._read_page(self.span(index))
+
+    def __len__(self):
+        return len(self._spans)
 
 class TxtDocument:
     """
     Класс для чтения и разбора текстовых файлов, разбитых на страницы.
+
+    В ленивом режиме (lazy=True) файл отображается в память (mmap), а в памяти
+    хранится только индекс страниц: смещения разделителей PAGE_DIVIDER в байтах
+    и количество символов страниц. Индекс кэшируется в файле <stem>.pages.npy
+    рядом с .txt, поэтому повторное открытие документа не читает его текст.
+    Текст страницы декодируется при каждом обращении к ней и не сохраняется.
     """
 
-    def __init__(self, text_file: Path):
+    def __init__(self, text_file: Path, lazy: bool = False):
         """
         Инициализация TxtReader.
 
         Args:
             text_file (Path): Путь к текстовому файлу.
+            lazy (bool): Читать текст страниц из файла только при обращении к ним.
         """
         self._file = text_file
-        self._pages = self._parse_pages()
+        self._mmap: mmap.mmap | None = None
+        if lazy:
+            self._pages: Sequence[Page] = _LazyPages(self, self._load_index())
+        else:
+            self._pages = self._parse_pages()
         self._current_page_idx = 0
         self._iter_page_idx = 0  # Индекс для итератора
 
+    @classmethod
+    def from_pages(cls, text_file: Path, pages: list[Page]) -> "TxtDocument":
+        """
+        Создает документ из уже разобранных страниц без чтения файла.
+
+        Args:
+            text_file (Path): Путь к текстовому файлу документа (может еще не существовать).
+            pages (list[Page]): Страницы документа.
+
+        Returns:
+            TxtDocument: Документ со страницами pages.
+        """
+        document = cls.__new__(cls)
+        document._file = text_file
+        document._mmap = None
+        document._pages = pages
+        document._current_page_idx = 0
+        document._iter_page_idx = 0
+        return document
+
     def _parse_pages(self) -> list[Page]:
-        with open(self._file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with open(self._file, "rb") as f:
+            data = f.read()
 
         pages = []
-        page_lines = []
-        current_page_number = None
-
-        # Предварительно вычисляем возможные разделители страниц
-        dividers = {PAGE_DIVIDER.replace("%NUM%", str(i)): i for i in range(1, 1000)}
-
-        for line in lines:
-            line_stripped = line.rstrip('\n')
-            page_num = dividers.get(line_stripped)
-            if page_num is not None:
-                # Сохраняем предыдущую страницу, если есть
-                if page_lines and current_page_number is not None:
-                    page_text = "\n".join(page_lines).strip()
-                    is_empty = not page_text
-                    pages.append(Page(
-                        number=current_page_number,
-                        text=page_text,
-                        is_empty=is_empty,
-                        symbols_count=len(page_text)
-                    ))
-                    page_lines = []
-                current_page_number = page_num
-            else:
-                page_lines.append(line_stripped)
-
-        # Добавляем последнюю страницу, если есть
-        if page_lines and current_page_number is not None:
-            page_text = "\n".join(page_lines).strip()
-            is_empty = not page_text
-            pages.append(Page(
-                number=current_page_number,
-                text=page_text,
-                is_empty=is_empty,
-                symbols_count=len(page_text)
-            ))
-
+        for span in self._scan_pages(data, count_symbols=False):
+            page_text = _decode_page(data[span.start : span.end])
+            pages.append(Page(number=span.number, text=page_text))
         return pages
-    
+
+    @staticmethod
+    def _scan_pages(data: bytes | mmap.mmap, count_symbols: bool = True) -> list[_PageSpan]:
+        """
+        Находит страницы по строкам-разделителям PAGE_DIVIDER.
+
+        Текст до первого разделителя не относится ни к одной странице, страницы
+        без строк между разделителями пропускаются.
+
+        Args:
+            data: Содержимое файла в UTF-8
+            count_symbols: Подсчитать символы страниц (требует декодирования текста)
+
+        Returns:
+            list[_PageSpan]: Положения страниц в порядке следования в файле
+        """
+        dividers = list(_DIVIDER_PATTERN.finditer(data))
+        spans = []
+        for divider, next_divider in zip(dividers, dividers[1:] + [None]):
+            # Текст страницы начинается после перевода строки разделителя
+            start = min(divider.end() + 1, len(data))
+            end = next_divider.start() if next_divider is not None else len(data)
+            if end <= start:
+                continue
+            symbols_count = 0
+            if count_symbols:
+                symbols_count = len(_decode_page(data[start:end]))
+            spans.append(_PageSpan(int(divider.group(1)), start, end, symbols_count))
+        return spans
+
+    def _open_mmap(self) -> mmap.mmap | None:
+        """Отображает файл документа в память (None для пустого файла)"""
+        if self._mmap is None:
+            with open(self._file, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _load_index(self) -> np.ndarray:
+        """
+        Загружает индекс страниц из файла индекса или строит его по файлу документа
+
+        Returns:
+            np.ndarray: Массив (страниц, 4) с номером, смещениями начала и конца
+            и количеством символов каждой страницы
+        """
+        stat = self._file.stat()
+        # Первая строка файла индекса - версия формата, размер и время изменения .txt
+        header = [_PAGE_INDEX_VERSION, stat.st_size, stat.st_mtime_ns, 0]
+        index_path = page_index_path(self._file)
+        try:
+            index = np.load(index_path, allow_pickle=False)
+            if index.ndim == 2 and len(index) and index[0].tolist() == header:
+                return index[1:]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Индекс страниц {index_path} поврежден и будет построен заново: {e}")
+
+        data = self._open_mmap()
+        spans = self._scan_pages(data) if data is not None else []
+        index = np.array(
+            [header]
+            + [[span.number, span.start, span.end, span.symbols_count] for span in spans],
+            dtype=np.int64,
+        )
+
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, index)
+            tmp_path.replace(index_path)
+        except OSError as e:
+            logger.debug(f"Не удалось сохранить индекс страниц {index_path}: {e}")
+        return index[1:]
+
+    def _read_page(self, span: _PageSpan) -> Page:
+        """Декодирует страницу из отображенного в память файла"""
+        data = self._open_mmap()
+        page_text = _decode_page(data[span.start : span.end]) if data is not None else ""
+        return Page(number=span.number, text=page_text)
+
+    def close(self) -> None:
+        """Закрывает отображение файла в память (оно откроется снова при обращении к странице)"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __getstate__(self):
+        # Отображение файла не сериализуется и открывается заново после загрузки
+        state = self.__dict__.copy()
+        state["_mmap"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Документы из старых результатов сериализованы без отображения файла
+        self.__dict__.update(state)
+        self._mmap = None
 
     @property
-    def pages(self) -> list[Page]:
+    def pages(self) -> Sequence[Page]:
         return self._pages
     
     
@@ -147,12 +352,12 @@ class TxtDocument:
             return self._pages[number - 1]
         return None
 
-    def get_all_pages(self) -> list[Page]:
+    def get_all_pages(self) -> Sequence[Page]:
         """
         Возвращает список всех страниц.
 
         Returns:
-            list[Page]: Список всех страниц.
+            Sequence[Page]: Список всех страниц.
         """
         return self._pages
 
@@ -225,4 +430,12 @@ class TxtDocument:
         return len(self._pages)
     
     def __str__(self):
-        return f"TxtDocument(file={self._file}, pages={[str(i) for i in self._pages]})"
\ No newline at end of file
+        if isinstance(self._pages, _LazyPages):
+            # Описание ленивого документа строится по индексу без чтения текста
+            pages = [
+                _page_summary(number, symbols_count == 0, symbols_count)
+                for number, _, _, symbols_count in self._pages._spans.tolist()
+            ]
+        else:
+            pages = [str(i) for i in self._pages]
+        return f"TxtDocument(file={self._file}, pages={pages})"
\ No newline at end of file
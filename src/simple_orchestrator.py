@@ -1,7 +1,8 @@
 from pathlib import Path
 import pickle
 from src.processing.txt_reader import TxtDocument
-from src.processing.pipeline import Pipeline, PipelineResult
+from src.processing.pipeline import PipelineResult
+from src.processing.scheduler import CorpusScheduler
 from src.constants.general import (
     PATENTS_DIR,
     RESULTS_INTERMEDIATE_DIR,
@@ -11,6 +12,7 @@ from src.constants.general import (
 from src.processing.text_extraction import ExtractionResults, extract_texts
 from src.utils import cut_str, logger, patent_id_to_uspto_id
 from src.filtering import PatentsRegistry
+from src.storage import document_name, get_default_corpus_store
 import pandas as pd
 
 
@@ -41,6 +43,8 @@ class Orchestrator:
         else:
             logger.info(f"Патентов найдено: {patents_amount}, скачивание не требуется")
 
+        get_default_corpus_store().add_patents(documents_path.glob("*.pdf"))
+
     def _download_patents(self, amount: int, to_dir: Path) -> None:
         assert USPT_API_KEY, "USPT_API_KEY is not set"
         patents_registry = PatentsRegistry(api_key=USPT_API_KEY)
@@ -64,23 +68,19 @@ class Orchestrator:
     def _collect_documents(self, results: ExtractionResults) -> list[TxtDocument]:
         all_docs: list[TxtDocument] = []
         for new_text in results.new_txts:
-            doc = TxtDocument(new_text)
+            doc = TxtDocument(new_text, lazy=True)
             logger.success(f"+ {cut_str(doc.name)} ({len(doc)} страниц)")
             all_docs.append(doc)
         for old_text in results.old_txts:
-            doc = TxtDocument(old_text)
+            doc = TxtDocument(old_text, lazy=True)
             logger.info(f"  {cut_str(doc.name)} ({len(doc)} страниц)")
             all_docs.append(doc)
         return all_docs
 
     def _process_documents(self, docs: list[TxtDocument]):
-        for text_file in docs:
-            logger.info(f"Обработка документа: {text_file.name}")
-            pipeline = Pipeline(
-                txt_document=text_file,
-                output_dir=RESULTS_INTERMEDIATE_DIR,
-            )
-            results = pipeline.run()
+        scheduler = CorpusScheduler(output_dir=RESULTS_INTERMEDIATE_DIR)
+        for text_file, results in scheduler.process(docs):
+            logger.info(f"Обработан документ: {text_file.name}")
 
             if not results:
                 logger.warning(f"Не удалось обработать документ: {text_file.name}")
@@ -153,3 +153,5 @@ class Orchestrator:
             ],
         )
         df.to_csv(RESULTS_FINAL_DIR / f"{filename}.csv", index=False, encoding="utf-8")
+
+        get_default_corpus_store().save_results(document_name(filename), results)
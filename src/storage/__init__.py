@@ -0,0 +1,28 @@
+"""
+Модуль для хранения состояния корпуса патентов
+
+Публичные классы:
+- CorpusStore: Хранилище патентов, страниц, метаданных извлечения и взаимодействий
+- PatentStatus: Стадия обработки патента
+
+Публичные функции:
+- get_default_corpus_store: Общее для процесса хранилище корпуса
+- document_name: Имя патента в хранилище по пути к файлу документа
+- fts_query: Преобразование поисковой строки в запрос полнотекстового индекса
+"""
+
+from .corpus_store import (
+    CorpusStore,
+    PatentStatus,
+    document_name,
+    fts_query,
+    get_default_corpus_store,
+)
+
+__all__ = [
+    "CorpusStore",
+    "PatentStatus",
+    "document_name",
+    "fts_query",
+    "get_default_corpus_store",
+]
@@ -0,0 +1,605 @@
+import dataclasses
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from src.constants.general import CORPUS_DB_FILE, RESULTS_INTERMEDIATE_DIR
+from src.utils import logger
+
+if TYPE_CHECKING:
+    from src.processing.pipeline import PipelineResult
+    from src.processing.txt_reader import Page
+
+
+class PatentStatus:
+    """Стадия обработки патента в хранилище корпуса"""
+
+    DOWNLOADED = "downloaded"
+    EXTRACTED = "extracted"
+    PROCESSED = "processed"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    pdf_path TEXT,
+    text_path TEXT,
+    status TEXT NOT NULL,
+    num_pages INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patents_status ON patents(status);
+
+CREATE TABLE IF NOT EXISTS pages (
+    patent_id INTEGER NOT NULL REFERENCES patents(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    symbols_count INTEGER NOT NULL,
+    PRIMARY KEY (patent_id, number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS extractions (
+    patent_id INTEGER PRIMARY KEY REFERENCES patents(id) ON DELETE CASCADE,
+    processing_time REAL,
+    text_length INTEGER,
+    pages_processed INTEGER,
+    errors_count INTEGER,
+    text_layer_pages INTEGER,
+    ocr_pages INTEGER,
+    low_dpi_pages INTEGER,
+    skipped_pages INTEGER,
+    config TEXT,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY,
+    patent_id INTEGER NOT NULL REFERENCES patents(id) ON DELETE CASCADE,
+    page_number INTEGER,
+    ligand TEXT NOT NULL,
+    protein TEXT NOT NULL,
+    interaction_type TEXT NOT NULL,
+    context TEXT NOT NULL,
+    ki REAL,
+    ic50 REAL,
+    kd REAL,
+    ec50 REAL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_patent ON interactions(patent_id, page_number);
+CREATE INDEX IF NOT EXISTS idx_interactions_ligand ON interactions(ligand);
+CREATE INDEX IF NOT EXISTS idx_interactions_protein ON interactions(protein);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# rowid страницы в полнотекстовом индексе: id патента в старших битах, номер
+# страницы в младших. Страницы документа занимают непрерывный диапазон rowid,
+# поэтому индекс документа обновляется без просмотра всей таблицы
+_PAGE_NUMBER_BITS = 20
+_PAGE_NUMBER_MASK = (1 << _PAGE_NUMBER_BITS) - 1
+
+
+def _page_rowid(patent_id: int, number: int) -> int:
+    return (patent_id << _PAGE_NUMBER_BITS) | number
+
+
+def fts_query(query: str) -> str:
+    """
+    Преобразует поисковую строку в запрос FTS5
+
+    Каждое слово строки ищется как отдельная фраза, все слова должны
+    встречаться на странице ("CDK9 IC50" -> "CDK9" AND "IC50"). Слова
+    с дефисами и другими знаками ищутся как фразы из своих частей,
+    поэтому "CDK-9" находит и "CDK-9", и "CDK 9".
+
+    Args:
+        query: Поисковая строка
+
+    Returns:
+        str: Запрос для MATCH
+    """
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    return " AND ".join(terms)
+
+
+def document_name(path: Path | str) -> str:
+    """
+    Возвращает имя патента в хранилище по пути к его PDF, .txt или файлу результатов
+
+    Пример:
+    `US11111111B2.pdf`, `US11111111B2.txt`, `US11111111B2.txt.pkl` --> `US11111111B2`
+
+    Args:
+        path: Путь или имя файла документа
+
+    Returns:
+        str: Имя патента
+    """
+    return Path(path).name.split(".", 1)[0]
+
+
+class CorpusStore:
+    """
+    Встроенное хранилище корпуса на SQLite (режим WAL).
+
+    Хранит патенты и стадию их обработки, текст страниц, метаданные
+    извлечения текста и извлеченные взаимодействия. Файлы в results/
+    по-прежнему создаются, а хранилище заменяет их сканирование: статистика
+    и списки результатов получаются запросами по индексам. Текст страниц
+    индексируется полнотекстовым индексом (FTS5), который обновляется при
+    каждом сохранении страниц документа (search_pages, candidate_pages).
+    Каждый документ записывается одной транзакцией, несколько документов
+    можно объединить в транзакцию через transaction().
+
+    Args:
+        db_file: Путь к файлу базы данных
+    """
+
+    def __init__(self, db_file: Path = CORPUS_DB_FILE):
+        self.db_file = db_file
+
+        self._lock = threading.RLock()
+        self._depth = 0
+
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self.db_file, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        has_index = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'pages_fts'"
+        ).fetchone()
+        self._connection.executescript(_SCHEMA)
+        if not has_index:
+            self._rebuild_index()
+        logger.debug(f"Хранилище корпуса открыто: {self.db_file}")
+
+    def _rebuild_index(self) -> None:
+        """Заполняет полнотекстовый индекс страницами, сохраненными в хранилище"""
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM pages_fts")
+            connection.execute(
+                f"INSERT INTO pages_fts (rowid, text) "
+                f"SELECT (patent_id << {_PAGE_NUMBER_BITS}) | number, text FROM pages"
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Выполняет операции внутри одной транзакции.
+
+        Вложенные вызовы выполняются в транзакции внешнего вызова, при ошибке
+        откатываются все изменения внешней транзакции.
+
+        Yields:
+            sqlite3.Connection: Соединение с базой данных
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._connection
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._connection.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._connection.execute("COMMIT")
+
+    def _upsert_patent(
+        self,
+        connection: sqlite3.Connection,
+        name: str,
+        status: str | None = None,
+        **fields: Any,
+    ) -> int:
+        """Создает или обновляет запись патента и возвращает ее id"""
+        now = time.time()
+        values = {key: value for key, value in fields.items() if value is not None}
+        if status is not None:
+            values["status"] = status
+
+        row = connection.execute("SELECT id FROM patents WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            values.setdefault("status", PatentStatus.DOWNLOADED)
+            columns = ["name", "created_at", "updated_at", *values]
+            cursor = connection.execute(
+                f"INSERT INTO patents ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [name, now, now, *values.values()],
+            )
+            return int(cursor.lastrowid)  # type: ignore[arg-type]
+
+        assignments = ", ".join(f"{key} = ?" for key in ["updated_at", *values])
+        connection.execute(
+            f"UPDATE patents SET {assignments} WHERE id = ?", [now, *values.values(), row[0]]
+        )
+        return int(row[0])
+
+    def add_patents(self, pdf_paths: Iterable[Path]) -> None:
+        """
+        Регистрирует PDF патентов (стадия обработки существующих патентов не меняется)
+
+        Args:
+            pdf_paths: Пути к PDF файлам
+        """
+        with self.transaction() as connection:
+            for pdf_path in pdf_paths:
+                self._upsert_patent(connection, document_name(pdf_path), pdf_path=str(pdf_path))
+
+    def save_extraction(
+        self,
+        text_path: Path,
+        pages: Iterable["Page"],
+        pdf_path: Path | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Сохраняет текст страниц и метаданные извлечения документа
+
+        Args:
+            text_path: Путь к .txt файлу документа
+            pages: Страницы документа
+            pdf_path: Путь к PDF файлу документа
+            metadata: Метаданные извлечения (PDFTextExtractor.extract_with_confidence)
+        """
+        with self.transaction() as connection:
+            # Повторное извлечение текста не отменяет обработку документа
+            row = connection.execute(
+                "SELECT status FROM patents WHERE name = ?", (document_name(text_path),)
+            ).fetchone()
+            processed = row is not None and row[0] == PatentStatus.PROCESSED
+            patent_id = self._upsert_patent(
+                connection,
+                document_name(text_path),
+                status=None if processed else PatentStatus.EXTRACTED,
+                pdf_path=str(pdf_path) if pdf_path is not None else None,
+                text_path=str(text_path),
+            )
+            connection.execute("DELETE FROM pages WHERE patent_id = ?", (patent_id,))
+            connection.execute(
+                "DELETE FROM pages_fts WHERE rowid BETWEEN ? AND ?",
+                (_page_rowid(patent_id, 0), _page_rowid(patent_id, _PAGE_NUMBER_MASK)),
+            )
+            pages = list(pages)
+            connection.executemany(
+                "INSERT OR REPLACE INTO pages (patent_id, number, text, symbols_count) "
+                "VALUES (?, ?, ?, ?)",
+                ((patent_id, page.number, page.text, page.symbols_count) for page in pages),
+            )
+            connection.executemany(
+                "INSERT INTO pages_fts (rowid, text) VALUES (?, ?)",
+                ((_page_rowid(patent_id, page.number), page.text) for page in pages),
+            )
+            num_pages = connection.execute(
+                "SELECT COUNT(*) FROM pages WHERE patent_id = ?", (patent_id,)
+            ).fetchone()[0]
+            self._upsert_patent(connection, document_name(text_path), num_pages=num_pages)
+
+            if metadata is not None:
+                config = metadata.get("config_used")
+                if dataclasses.is_dataclass(config) and not isinstance(config, type):
+                    config = dataclasses.asdict(config)
+                connection.execute(
+                    "INSERT OR REPLACE INTO extractions (patent_id, processing_time, text_length, "
+                    "pages_processed, errors_count, text_layer_pages, ocr_pages, low_dpi_pages, "
+                    "skipped_pages, config, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        patent_id,
+                        metadata.get("processing_time"),
+                        metadata.get("text_length"),
+                        metadata.get("pages_processed"),
+                        metadata.get("errors_count"),
+                        metadata.get("text_layer_pages"),
+                        metadata.get("ocr_pages"),
+                        metadata.get("low_dpi_pages"),
+                        len(metadata.get("skipped_pages") or {}),
+                        json.dumps(config, default=str),
+                        time.time(),
+                    ),
+                )
+
+    def save_results(self, name: str, result: "PipelineResult") -> None:
+        """
+        Сохраняет взаимодействия документа (заменяя ранее сохраненные)
+
+        Args:
+            name: Имя патента (см. document_name)
+            result: Результат обработки документа
+        """
+        rows = []
+        for pagedata in result.interactions:
+            page_number = getattr(pagedata.page, "number", None)
+            for interaction in pagedata.interactions.interactions:
+                params = interaction.parameters
+                rows.append(
+                    (
+                        page_number,
+                        interaction.ligand,
+                        interaction.protein,
+                        interaction.interaction_type,
+                        interaction.context,
+                        params.Ki,
+                        params.IC50,
+                        params.Kd,
+                        params.EC50,
+                    )
+                )
+
+        with self.transaction() as connection:
+            patent_id = self._upsert_patent(connection, name, status=PatentStatus.PROCESSED)
+            connection.execute("DELETE FROM interactions WHERE patent_id = ?", (patent_id,))
+            connection.executemany(
+                "INSERT INTO interactions (patent_id, page_number, ligand, protein, "
+                "interaction_type, context, ki, ic50, kd, ec50) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(patent_id, *row) for row in rows],
+            )
+        logger.debug(f"В хранилище корпуса сохранено {len(rows)} взаимодействий документа {name}")
+
+    def import_results(self, results_dir: Path = RESULTS_INTERMEDIATE_DIR) -> int:
+        """
+        Записывает в хранилище результаты, сохраненные в pkl файлах до появления
+        хранилища (документы, уже обработанные в хранилище, пропускаются)
+
+        Args:
+            results_dir: Директория промежуточных результатов
+
+        Returns:
+            int: Количество импортированных документов
+        """
+        if not results_dir.exists():
+            return 0
+
+        processed = {patent["name"] for patent in self.list_patents(PatentStatus.PROCESSED)}
+        imported = 0
+        for path in sorted(results_dir.glob("*.pkl")):
+            name = document_name(path)
+            if name in processed:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+                self.save_results(name, result)
+            except Exception as e:
+                logger.warning(f"Не удалось импортировать результаты {path.name}: {e}")
+                continue
+            imported += 1
+
+        if imported:
+            logger.info(f"В хранилище корпуса импортированы результаты {imported} документов")
+        return imported
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает статистику корпуса
+
+        Returns:
+            dict[str, int]: Количество патентов, извлеченных и обработанных
+            документов, страниц и взаимодействий
+        """
+        with self._lock:
+            counts = dict(
+                self._connection.execute(
+                    "SELECT status, COUNT(*) FROM patents GROUP BY status"
+                ).fetchall()
+            )
+            pages = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            interactions = self._connection.execute(
+                "SELECT COUNT(*) FROM interactions"
+            ).fetchone()[0]
+
+        return {
+            "patents": sum(counts.values()),
+            "extracted": counts.get(PatentStatus.EXTRACTED, 0) + counts.get(PatentStatus.PROCESSED, 0),
+            "processed": counts.get(PatentStatus.PROCESSED, 0),
+            "pages": pages,
+            "interactions": interactions,
+        }
+
+    def list_patents(self, status: str | None = None) -> list[dict[str, Any]]:
+        """
+        Возвращает патенты корпуса
+
+        Args:
+            status: Стадия обработки (PatentStatus), по умолчанию все патенты
+
+        Returns:
+            list[dict[str, Any]]: Записи патентов, упорядоченные по имени
+        """
+        query = "SELECT name, pdf_path, text_path, status, num_pages, updated_at FROM patents"
+        params: tuple = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            cursor = self._connection.execute(query + " ORDER BY name", params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def list_results(self) -> list[dict[str, Any]]:
+        """
+        Возвращает обработанные документы с количеством взаимодействий
+
+        Returns:
+            list[dict[str, Any]]: Имя патента, количество взаимодействий,
+            уникальных лигандов и белков
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT p.name, COUNT(i.id), COUNT(DISTINCT i.ligand), COUNT(DISTINCT i.protein)
+                FROM patents p LEFT JOIN interactions i ON i.patent_id = p.id
+                WHERE p.status = ?
+                GROUP BY p.id
+                ORDER BY p.name
+                """,
+                (PatentStatus.PROCESSED,),
+            ).fetchall()
+        return [
+            {"name": name, "interactions": count, "ligands": ligands, "proteins": proteins}
+            for name, count, ligands, proteins in rows
+        ]
+
+    def get_interactions(self, name: str | None = None) -> list[dict[str, Any]]:
+        """
+        Возвращает взаимодействия документа или всего корпуса
+
+        Args:
+            name: Имя патента (по умолчанию все патенты)
+
+        Returns:
+            list[dict[str, Any]]: Взаимодействия в колонках CSV результатов
+            и имя патента в колонке source
+        """
+        query = """
+            SELECT p.name AS source, i.page_number, i.ligand, i.protein, i.interaction_type,
+                   i.context, i.ki AS Ki, i.ic50 AS IC50, i.kd AS Kd, i.ec50 AS EC50
+            FROM interactions i JOIN patents p ON p.id = i.patent_id
+        """
+        params: tuple = ()
+        if name is not None:
+            query += " WHERE p.name = ?"
+            params = (name,)
+        with self._lock:
+            cursor = self._connection.execute(query + " ORDER BY p.name, i.page_number, i.id", params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def search_pages(
+        self,
+        query: str,
+        name: str | None = None,
+        limit: int | None = 50,
+        raw: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Ищет страницы корпуса по полнотекстовому индексу
+
+        Args:
+            query: Поисковая строка (все слова должны встречаться на странице, см. fts_query)
+            name: Имя патента (по умолчанию поиск по всему корпусу)
+            limit: Максимальное количество страниц (None - без ограничения)
+            raw: Передать query в MATCH без преобразования (синтаксис запросов FTS5:
+                OR, NOT, NEAR, префиксы "kinas*")
+
+        Returns:
+            list[dict[str, Any]]: Имя патента, номер страницы, фрагмент текста
+            с найденными словами в [] и релевантность (bm25, меньше - лучше),
+            в порядке релевантности
+        """
+        match = query if raw else fts_query(query)
+        if not match:
+            return []
+
+        sql = f"""
+            SELECT p.name, f.rowid & {_PAGE_NUMBER_MASK},
+                   snippet(pages_fts, 0, '[', ']', '...', 16), f.rank
+            FROM pages_fts f JOIN patents p ON p.id = f.rowid >> {_PAGE_NUMBER_BITS}
+            WHERE pages_fts MATCH ?
+        """
+        params: list[Any] = [match]
+        if name is not None:
+            sql += " AND p.name = ?"
+            params.append(name)
+        sql += " ORDER BY f.rank"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [
+            {"name": name, "page_number": number, "snippet": snippet, "rank": rank}
+            for name, number, snippet, rank in rows
+        ]
+
+    def candidate_pages(self, name: str, query: str, raw: bool = False) -> set[int] | None:
+        """
+        Возвращает номера страниц документа, соответствующих запросу
+
+        Args:
+            name: Имя патента
+            query: Поисковая строка (см. search_pages)
+            raw: Передать query в MATCH без преобразования
+
+        Returns:
+            set[int] | None: Номера страниц или None, если страниц документа
+            нет в хранилище (отбор страниц по индексу невозможен)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, num_pages FROM patents WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None or not row[1]:
+            return None
+
+        match = query if raw else fts_query(query)
+        if not match:
+            return None
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT rowid & {_PAGE_NUMBER_MASK} FROM pages_fts "
+                f"WHERE pages_fts MATCH ? AND rowid BETWEEN ? AND ?",
+                (match, _page_rowid(row[0], 0), _page_rowid(row[0], _PAGE_NUMBER_MASK)),
+            ).fetchall()
+        return {number for (number,) in rows}
+
+    def get_status(self, name: str) -> str | None:
+        """
+        Возвращает стадию обработки патента
+
+        Args:
+            name: Имя патента
+
+        Returns:
+            str | None: Стадия обработки (PatentStatus) или None, если патента нет в хранилище
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status FROM patents WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def close(self) -> None:
+        """Закрывает соединение с базой данных"""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM patents").fetchone()[0]
+
+
+_default_store: CorpusStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_corpus_store() -> CorpusStore:
+    """
+    Возвращает общее для процесса хранилище корпуса
+
+    Returns:
+        CorpusStore: Хранилище с настройками по умолчанию
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CorpusStore()
+            # Результаты, сохраненные до появления хранилища, доступны в нем сразу
+            _default_store.import_results()
+        return _default_store
@@ -0,0 +1,29 @@
+from pathlib import Path
+from typing import Callable
+
+import fitz
+import pytest
+
+# Текст страницы, достаточный для использования текстового слоя вместо OCR
+PAGE_TEXT = (
+    "The compound binds the kinase domain of the receptor with high affinity. "
+    "Binding was measured in a competition assay against the reference ligand. "
+    "Results for all tested compounds are summarised in the table below. "
+    "Each value is the mean of three independent measurements."
+)
+
+
+@pytest.fixture
+def make_pdf(tmp_path: Path) -> Callable[..., Path]:
+    """Создает PDF с текстовым слоем на каждой странице"""
+
+    def make(name: str = "US0000001B2", pages: int = 2) -> Path:
+        path = tmp_path / f"{name}.pdf"
+        with fitz.open() as pdf:
+            for _ in range(pages):
+                page = pdf.new_page()
+                page.insert_textbox(fitz.Rect(50, 50, 550, 800), PAGE_TEXT, fontsize=11)
+            pdf.save(path)
+        return path
+
+    return make
@@ -0,0 +1,73 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from agents import ModelBehaviorError
+
+from src.processing.agent_suite import AgentSuite
+from src.processing.llm_cache import LLMResponseCache
+from src.processing.schemas import (
+    PageSearchDecision,
+    SearcherAgentResults,
+    SearcherBatchResults,
+)
+from src.processing.txt_reader import Page
+
+
+class FakeRunner:
+    """Runner без обращения к модели: ответы агентов задаются в тесте"""
+
+    def __init__(self, outputs: dict):
+        self.outputs = outputs
+        self.calls: list[str] = []
+
+    async def run(self, agent, input):
+        self.calls.append(agent.name)
+        output = self.outputs[agent.name]
+        if isinstance(output, Exception):
+            raise output
+        return SimpleNamespace(final_output=output)
+
+
+def _suite(tmp_path: Path, outputs: dict) -> tuple[AgentSuite, FakeRunner]:
+    suite = AgentSuite(model="test-model", cache=LLMResponseCache(tmp_path / "llm.sqlite"))
+    runner = FakeRunner(outputs)
+    suite.runner = runner  # type: ignore[assignment]
+    return suite, runner
+
+
+def _pages() -> list[Page]:
+    return [Page(number=number, text=f"Text of page {number}") for number in (1, 2)]
+
+
+def test_invalid_batch_answer_is_not_retried(tmp_path: Path):
+    suite, runner = _suite(
+        tmp_path,
+        {
+            "BatchSearcherAgent": ModelBehaviorError("invalid json"),
+            "SearcherAgent": SearcherAgentResults(does_contain_interactions=True, accuracy=0.9),
+        },
+    )
+
+    assert suite.should_search_interactions_batch(_pages()) == [True, True]
+    assert runner.calls.count("BatchSearcherAgent") == 1
+    suite.cache.close()
+
+
+def test_incomplete_batch_answer_is_not_cached(tmp_path: Path):
+    incomplete = SearcherBatchResults(
+        decisions=[PageSearchDecision(page_number=1, does_contain_interactions=True, accuracy=0.9)]
+    )
+    suite, runner = _suite(
+        tmp_path,
+        {
+            "BatchSearcherAgent": incomplete,
+            "SearcherAgent": SearcherAgentResults(does_contain_interactions=False, accuracy=0.9),
+        },
+    )
+
+    assert suite.should_search_interactions_batch(_pages()) == [False, False]
+    assert suite.should_search_interactions_batch(_pages()) == [False, False]
+    # Неполный ответ запрашивается повторно, а решения страниц берутся из кэша
+    assert runner.calls.count("BatchSearcherAgent") == 2
+    assert runner.calls.count("SearcherAgent") == 2
+    suite.cache.close()
@@ -0,0 +1,94 @@
+import json
+import os
+import pickle
+from pathlib import Path
+
+from src.orchestration import checkpoint
+from src.orchestration.checkpoint import CheckpointData, CheckpointManager
+from src.processing.txt_reader import TxtDocument
+
+
+def test_record_documents_uses_one_fsync(tmp_path: Path, monkeypatch):
+    calls = []
+    fsync = os.fsync
+    monkeypatch.setattr(checkpoint.os, "fsync", lambda fd: calls.append(fd) or fsync(fd))
+    manager = CheckpointManager(tmp_path / "journal.jsonl")
+
+    manager.record_documents("process", ["a.txt", "b.txt", "c.txt"])
+
+    assert len(calls) == 1
+    assert manager.completed_documents("process") == {"a.txt", "b.txt", "c.txt"}
+    assert CheckpointManager(tmp_path / "journal.jsonl").completed_documents("process") == {
+        "a.txt",
+        "b.txt",
+        "c.txt",
+    }
+
+
+def test_journal_is_replayed_after_reopen(tmp_path: Path):
+    journal = tmp_path / "journal.jsonl"
+    text_path = tmp_path / "US1234B2.txt"
+    text_path.write_text("=== СТРАНИЦА 1 ===\nText", encoding="utf-8")
+    manager = CheckpointManager(journal)
+    manager.save_checkpoint("extract_texts", {"limit": 5, "pdf": tmp_path / "US1234B2.pdf"})
+    manager.record_document("process_documents", "US1234B2.txt")
+    manager.save_checkpoint(
+        "collect_documents", {"documents": [TxtDocument(text_path)], "names": {"US1234B2"}}
+    )
+
+    reopened = CheckpointManager(journal)
+
+    assert reopened.get_last_step() == "collect_documents"
+    context = reopened.get_saved_context()
+    assert [document.path for document in context["documents"]] == [text_path]
+    assert context["names"] == {"US1234B2"}
+    assert reopened.completed_documents("process_documents") == {"US1234B2.txt"}
+
+
+def test_partial_last_record_is_dropped(tmp_path: Path):
+    journal = tmp_path / "journal.jsonl"
+    CheckpointManager(journal).record_documents("process", ["a.txt", "b.txt"])
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"type": "document", "step": "process", "docu')
+
+    manager = CheckpointManager(journal)
+    assert manager.completed_documents("process") == {"a.txt", "b.txt"}
+    manager.record_document("process", "c.txt")
+
+    assert CheckpointManager(journal).completed_documents("process") == {"a.txt", "b.txt", "c.txt"}
+
+
+def test_legacy_checkpoint_is_migrated(tmp_path: Path):
+    journal = tmp_path / "checkpoint.pkl"
+    with open(journal, "wb") as f:
+        pickle.dump(CheckpointData("extract_texts", {"limit": 5, "names": ["US1234B2"]}), f)
+
+    manager = CheckpointManager(journal)
+
+    assert manager.get_last_step() == "extract_texts"
+    assert manager.get_saved_context() == {"limit": 5, "names": ["US1234B2"]}
+    assert journal.read_bytes().startswith(b"{")
+    assert CheckpointManager(journal).get_last_step() == "extract_texts"
+
+
+def test_document_records_with_results_are_replayed(tmp_path: Path):
+    # Журнал прежней версии хранил в записи документа его результат
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text(
+        json.dumps(
+            {
+                "type": "document",
+                "step": "process_documents",
+                "document": "US1234B2.txt",
+                "result": {"$pickle": str(tmp_path / "missing.pkl")},
+                "timestamp": "2026-01-01T00:00:00",
+            }
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    manager = CheckpointManager(journal)
+
+    assert manager.completed_documents("process_documents") == {"US1234B2.txt"}
+    assert manager.get_last_step() is None
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from src.processing.pipeline import PipelineResult
+from src.processing.txt_reader import Page
+from src.storage import CorpusStore
+from src.storage.corpus_store import PatentStatus
+
+
+def test_reextraction_keeps_processed_status(tmp_path: Path):
+    store = CorpusStore(tmp_path / "corpus.sqlite")
+    text_path = tmp_path / "US1234B2.txt"
+    pages = [Page(number=1, text="IC50 of compound 1 is 5 nM")]
+
+    store.save_extraction(text_path, pages)
+    assert store.get_status("US1234B2") == PatentStatus.EXTRACTED
+
+    store.save_results("US1234B2", PipelineResult(interactions=[]))
+    store.save_extraction(text_path, pages)
+
+    assert store.get_status("US1234B2") == PatentStatus.PROCESSED
+    assert [result["name"] for result in store.list_results()] == ["US1234B2"]
+    store.close()
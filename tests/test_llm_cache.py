@@ -0,0 +1,70 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from agents import Agent, AgentOutputSchema
+
+from src.processing.llm_cache import LLMResponseCache
+from src.processing.schemas import SupervisorAgentResults
+
+
+@pytest.fixture
+def agent() -> Agent:
+    return Agent(
+        name="SupervisorAgent",
+        instructions="Check the output",
+        model="test-model",
+        output_type=AgentOutputSchema(SupervisorAgentResults),
+    )
+
+
+def _answer(is_correct: bool) -> SupervisorAgentResults:
+    return SupervisorAgentResults(is_correct=is_correct, explanation="", fixable=False)
+
+
+def test_variants_are_cached_separately(agent: Agent, tmp_path: Path):
+    cache = LLMResponseCache(tmp_path / "llm_cache.sqlite")
+    cache.set(agent, "page", _answer(True))
+
+    assert cache.get(agent, "page") == _answer(True)
+    assert cache.get(agent, "page", variant=1) is None
+
+    cache.set(agent, "page", _answer(False), variant=1)
+    assert cache.get(agent, "page", variant=1) == _answer(False)
+    assert cache.get(agent, "page") == _answer(True)
+    cache.close()
+
+
+def test_get_does_not_write_until_batch(agent: Agent, tmp_path: Path):
+    cache_file = tmp_path / "llm_cache.sqlite"
+    cache = LLMResponseCache(cache_file)
+    cache.set(agent, "page", _answer(True))
+    key = cache.make_key(agent, "page")
+
+    def last_access() -> float:
+        with sqlite3.connect(cache_file) as connection:
+            return connection.execute(
+                "SELECT last_access FROM responses WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    stored = last_access()
+    assert cache.get(agent, "page") is not None
+    assert last_access() == stored
+
+    cache.close()
+    assert last_access() > stored
+
+
+def test_limits_apply_to_entries_of_all_processes(agent: Agent, tmp_path: Path):
+    # Два соединения с одним файлом, как у процессов разных шардов
+    first = LLMResponseCache(tmp_path / "llm_cache.sqlite", max_entries=10)
+    second = LLMResponseCache(tmp_path / "llm_cache.sqlite", max_entries=10)
+    for i in range(6):
+        first.set(agent, f"first {i}", _answer(True))
+        second.set(agent, f"second {i}", _answer(True))
+
+    assert len(first) == len(second) <= 10
+    with sqlite3.connect(tmp_path / "llm_cache.sqlite") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == len(first)
+    first.close()
+    second.close()
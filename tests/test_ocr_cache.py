@@ -0,0 +1,42 @@
+import sqlite3
+import zlib
+from pathlib import Path
+
+from src.processing.ocr_cache import CachedPage, OCRPageCache
+
+
+def test_limits_apply_to_entries_of_all_processes(tmp_path: Path):
+    # Два соединения с одним файлом, как у процессов разных шардов
+    first = OCRPageCache(tmp_path / "ocr_cache.sqlite", max_entries=10)
+    second = OCRPageCache(tmp_path / "ocr_cache.sqlite", max_entries=10)
+    first.set_many([(f"first {i}", CachedPage(text=f"page {i}", source="ocr")) for i in range(6)])
+    second.set_many([(f"second {i}", CachedPage(text=f"page {i}", source="ocr")) for i in range(6)])
+
+    assert len(first) == len(second) == 9
+    assert len(second.get_many([f"first {i}" for i in range(6)])) == 3
+    first.close()
+    second.close()
+
+
+def test_dpi_and_confidence_are_cached(tmp_path: Path):
+    cache_file = tmp_path / "ocr_cache.sqlite"
+    # Кэш, созданный до сохранения DPI и уверенности распознавания
+    with sqlite3.connect(cache_file) as connection:
+        connection.execute(
+            "CREATE TABLE pages (key TEXT PRIMARY KEY, source TEXT NOT NULL, "
+            "payload BLOB NOT NULL, words BLOB, tables BLOB, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO pages VALUES ('old', 'ocr', ?, NULL, NULL, 10, 0, 0)",
+            (zlib.compress(b"old page"),),
+        )
+
+    cache = OCRPageCache(cache_file)
+    cache.set_many([("new", CachedPage(text="new page", source="ocr", dpi=150, confidence=91.5))])
+
+    found = cache.get_many(["old", "new"])
+    assert (found["old"].text, found["old"].dpi, found["old"].confidence) == ("old page", None, None)
+    assert (found["new"].dpi, found["new"].confidence) == (150, 91.5)
+    assert len(cache) == 2
+    cache.close()
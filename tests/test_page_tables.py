@@ -0,0 +1,36 @@
+from src.processing.page_tables import AffinityTableReader, PageTable
+
+
+def _table(header: list[str], rows: list[list[str]]) -> PageTable:
+    return PageTable(page=3, header=header, rows=rows, source="text_layer")
+
+
+def test_protein_from_parameter_header():
+    table = _table(["Compound", "JAK1 IC50 (nM)", "JAK2 IC50 (μM)"], [["12", "4.5", "1.2"]])
+
+    interactions = AffinityTableReader().read(table)
+
+    assert [(i.ligand, i.protein, i.parameters.IC50) for i in interactions] == [
+        ("Compound 12", "JAK1", 4.5),
+        ("Compound 12", "JAK2", 1200.0),
+    ]
+
+
+def test_descriptive_header_is_not_a_protein():
+    table = _table(["Compound", "Kinase inhibition IC50 (nM)"], [["12", "4.5"]])
+
+    assert AffinityTableReader().read(table) == []
+    assert AffinityTableReader().read_pages([table]) == {}
+
+
+def test_protein_from_target_column():
+    table = _table(
+        ["Example", "Target", "Kinase inhibition IC50 (nM)"],
+        [["7", "BTK", "15"], ["8", "EGFR", ">10000"]],
+    )
+
+    interactions = AffinityTableReader().read(table)
+
+    assert [(i.ligand, i.protein, i.parameters.IC50) for i in interactions] == [
+        ("Example 7", "BTK", 15.0)
+    ]
@@ -0,0 +1,48 @@
+import asyncio
+import os
+from pathlib import Path
+
+from src.processing import pipeline as pipeline_module
+from src.processing.pipeline import Pipeline
+from src.processing.schemas import BioinfAgentResults
+from src.processing.txt_reader import TxtDocument
+from tests.test_scheduler import FakeAgentSuite, _write_document
+
+
+def _pipeline(tmp_path: Path, document: TxtDocument) -> Pipeline:
+    return Pipeline(
+        document,
+        tmp_path / "intermediate",
+        use_prefilter=False,
+        agent_suite=FakeAgentSuite(),  # type: ignore[arg-type]
+        use_tables=False,
+    )
+
+
+def test_page_results_are_fsynced_in_batches(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "PAGES_FSYNC_BATCH", 3)
+    fsync = os.fsync
+    calls = []
+    monkeypatch.setattr(pipeline_module.os, "fsync", lambda fd: (calls.append(fd), fsync(fd)))
+
+    document = TxtDocument(_write_document(tmp_path / "doc.txt", 7), lazy=True)
+    pipeline = _pipeline(tmp_path, document)
+    for page in document.pages:
+        asyncio.run(pipeline.arecord_page(page, BioinfAgentResults(interactions=[])))
+    assert len(calls) == 2
+
+    pipeline.close_progress()
+    assert len(calls) == 3
+
+    resumed = _pipeline(tmp_path, document)
+    assert all(resumed.is_page_saved(page) for page in document.pages)
+
+
+def test_progress_is_removed_after_result(tmp_path: Path):
+    document = TxtDocument(_write_document(tmp_path / "doc.txt", 5), lazy=True)
+    pipeline = _pipeline(tmp_path, document)
+
+    result = asyncio.run(pipeline.arun(max_concurrency=2))
+
+    assert len(result.interactions) == 5
+    assert not pipeline.progress_path.exists()
@@ -0,0 +1,133 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from src.constants.processing import PAGE_DIVIDER
+from src.processing.ocr_cache import OCRPageCache
+from src.processing.scheduler import CorpusScheduler
+from src.processing.text_extraction import OCRConfig, PDFTextExtractor
+from src.processing.schemas import BioinfAgentResults
+from src.processing.txt_reader import Page, TxtDocument
+
+
+class FakeAgentSuite:
+    """Агенты без обращения к LLM: все страницы содержат взаимодействия"""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def ashould_search_interactions_batch(self, pages: list[Page]) -> list[bool]:
+        return [True] * len(pages)
+
+    async def asearch_interactions(self, page: Page) -> BioinfAgentResults:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return BioinfAgentResults(interactions=[])
+
+    async def areview_bioinf_agent(self, page: Page, result: BioinfAgentResults):
+        return result
+
+
+def _write_document(path: Path, pages: int) -> Path:
+    path.write_text(
+        "\n".join(
+            f"{PAGE_DIVIDER.replace('%NUM%', str(number))}\nText of page {number}\n"
+            for number in range(1, pages + 1)
+        ),
+        encoding="utf-8",
+    )
+    return path
+
+
+def _scheduler(tmp_path: Path, suite: FakeAgentSuite, max_concurrency: int = 2):
+    return CorpusScheduler(
+        agent_suite=suite,  # type: ignore[arg-type]
+        max_concurrency=max_concurrency,
+        use_prefilter=False,
+        searcher_batch_size=4,
+        output_dir=tmp_path / "intermediate",
+    )
+
+
+async def _collect(results) -> list:
+    async def collect() -> list:
+        return [item async for item in results]
+
+    return await asyncio.wait_for(collect(), timeout=10)
+
+
+def test_vanished_document_is_reported_as_failed(tmp_path: Path):
+    present = TxtDocument(_write_document(tmp_path / "present.txt", 3), lazy=True)
+    vanished_path = _write_document(tmp_path / "vanished.txt", 3)
+    vanished = TxtDocument(vanished_path, lazy=True)
+    vanished.close()
+    vanished_path.unlink()
+
+    scheduler = _scheduler(tmp_path, FakeAgentSuite())
+    results = asyncio.run(_collect(scheduler.aprocess([vanished, present])))
+
+    by_name = {document.name: result for document, result in results}
+    assert by_name["vanished.txt"] is None
+    assert by_name["present.txt"] is not None
+
+
+def test_producer_error_is_raised(tmp_path: Path):
+    document = TxtDocument(_write_document(tmp_path / "first.txt", 2), lazy=True)
+
+    def documents():
+        yield document
+        raise RuntimeError("source failed")
+
+    scheduler = _scheduler(tmp_path, FakeAgentSuite())
+    with pytest.raises(RuntimeError, match="source failed"):
+        asyncio.run(_collect(scheduler.aprocess_iter(documents())))
+
+
+def test_pages_of_batch_are_extracted_concurrently(tmp_path: Path):
+    document = TxtDocument(_write_document(tmp_path / "doc.txt", 4), lazy=True)
+
+    suite = FakeAgentSuite(delay=0.05)
+    asyncio.run(_collect(_scheduler(tmp_path, suite, max_concurrency=4).aprocess([document])))
+    assert suite.max_running > 1
+
+    suite = FakeAgentSuite(delay=0.05)
+    asyncio.run(_collect(_scheduler(tmp_path, suite, max_concurrency=2).aprocess([document])))
+    assert suite.max_running == 2
+
+
+def test_early_close_does_not_hang(tmp_path: Path):
+    documents = [
+        TxtDocument(_write_document(tmp_path / f"doc{idx}.txt", 4), lazy=True)
+        for idx in range(5)
+    ]
+    scheduler = _scheduler(tmp_path, FakeAgentSuite())
+
+    for document, result in scheduler.process(documents):
+        assert result is not None
+        break
+
+
+def test_process_pdf_iter_streams_pdfs_from_iterator(tmp_path: Path, make_pdf):
+    export_path = tmp_path / "raw"
+    export_path.mkdir()
+    # Текст второго PDF уже извлечен и не распознается повторно
+    _write_document(export_path / "US0000002B2.txt", 1)
+    pdfs = [make_pdf("US0000001B2", pages=3), make_pdf("US0000002B2", pages=3)]
+
+    def pdf_files():
+        yield from pdfs
+
+    cache = OCRPageCache(tmp_path / "ocr_cache.sqlite")
+    extractor = PDFTextExtractor(OCRConfig(max_workers=1, use_text_layer=True), cache=cache)
+    scheduler = _scheduler(tmp_path, FakeAgentSuite())
+    results = list(scheduler.process_pdf_iter(pdf_files(), extractor, export_path, workers=2))
+    cache.close()
+
+    pages = {document.name: len(document) for document, result in results if result is not None}
+    assert pages == {"US0000001B2.txt": 3, "US0000002B2.txt": 1}
+    assert len(TxtDocument(export_path / "US0000001B2.txt")) == 3
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.orchestration.sharding import Shard
+
+NAMES = [f"US{number}B2" for number in range(10_000_000, 10_000_200)]
+
+
+def test_shards_partition_the_corpus():
+    shards = [Shard(count=4, index=index) for index in range(4)]
+
+    for name in NAMES:
+        assert sum(shard.owns(name) for shard in shards) == 1
+    # Патенты распределяются по всем шардам
+    assert all(any(shard.owns(name) for name in NAMES) for shard in shards)
+
+
+@pytest.mark.parametrize(
+    "name, index",
+    [("US11111111B2", 2), ("US10000000B2", 2), ("US9876543B2", 1)],
+)
+def test_owner_does_not_change_between_runs(name: str, index: int):
+    # Закрепленные значения: смена хеша перераспределила бы патенты уже запущенных шардов
+    assert Shard(count=4, index=index).owns(name)
+
+
+def test_owner_does_not_depend_on_hash_seed():
+    code = (
+        "from src.orchestration.sharding import Shard; "
+        f"print([name for name in {NAMES!r} if Shard(count=3, index=0).owns(name)])"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parents[1],
+            env={"PYTHONHASHSEED": seed},
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1
+
+
+def test_invalid_shard():
+    with pytest.raises(ValueError):
+        Shard(count=2, index=2)
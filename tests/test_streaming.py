@@ -0,0 +1,45 @@
+from typing import Iterator
+
+from src.orchestration.streaming import Stage, StreamingExecutor, StreamStage
+
+
+def test_failed_items_are_counted_and_skipped():
+    def double(item: int) -> int:
+        if item == 3:
+            raise ValueError("bad item")
+        return item * 2
+
+    executor = StreamingExecutor([Stage("double", double, workers=2)])
+
+    assert sorted(executor.run(range(6))) == [0, 2, 4, 8, 10]
+    assert executor.stats["double"].processed == 5
+    assert executor.stats["double"].failed == 1
+
+
+def test_stream_stage_failure_reports_unprocessed_items():
+    def process(items: Iterator[int]) -> Iterator[int]:
+        for item in items:
+            if item == 2:
+                raise RuntimeError("stage failed")
+            yield item
+
+    executor = StreamingExecutor(
+        [Stage("source", lambda item: item), StreamStage("process", process)]
+    )
+
+    assert list(executor.run(range(8))) == [0, 1]
+    stats = executor.stats["process"]
+    assert stats.processed == 2
+    # Элемент, на котором произошла ошибка, и все оставшиеся во входной очереди
+    assert stats.failed == 6
+
+
+def test_stream_stage_matches_results_by_key():
+    def process(items: Iterator[str]) -> Iterator[str]:
+        for item in items:
+            yield item.upper()
+
+    executor = StreamingExecutor([StreamStage("process", process, key=str.lower)])
+
+    assert sorted(executor.run(["a", "b"])) == ["A", "B"]
+    assert executor.stats["process"].failed == 0
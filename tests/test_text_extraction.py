@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+
+from src.processing import text_extraction
+from src.processing.ocr_cache import OCRPageCache
+from src.processing.ocr_words import OCRWords, words_sidecar_path
+from src.processing.page_tables import load_tables, tables_sidecar_path
+from src.processing.text_extraction import OCRConfig, PDFTextExtractor
+from src.storage import CorpusStore
+
+
+@pytest.fixture
+def pdf_path(make_pdf) -> Path:
+    return make_pdf()
+
+
+@pytest.fixture
+def extractor(tmp_path: Path):
+    config = OCRConfig(
+        max_workers=1, use_text_layer=True, save_words=True, extract_tables=True
+    )
+    cache = OCRPageCache(tmp_path / "ocr_cache.sqlite")
+    with PDFTextExtractor(config, cache=cache) as extractor:
+        yield extractor
+    cache.close()
+
+
+def test_iter_page_extractions_writes_sidecars_from_cache(
+    extractor: PDFTextExtractor, pdf_path: Path, tmp_path: Path
+):
+    text_path = tmp_path / "US0000001B2.txt"
+    first = list(extractor.iter_page_extractions(pdf_path, text_path))
+    words = OCRWords.load(words_sidecar_path(text_path))
+    tables = load_tables(tables_sidecar_path(text_path))
+    assert len(first) == 2 and len(words) > 0
+
+    words_sidecar_path(text_path).unlink()
+    tables_sidecar_path(text_path).unlink()
+
+    # Все страницы берутся из кэша, файлы слов и таблиц записываются снова
+    second = list(extractor.iter_page_extractions(pdf_path, text_path))
+    assert [page.text for page in second] == [page.text for page in first]
+    assert OCRWords.load(words_sidecar_path(text_path)).text_data.tobytes() == (
+        words.text_data.tobytes()
+    )
+    assert load_tables(tables_sidecar_path(text_path)) == tables
+
+
+def test_extract_texts_uses_one_pool(make_pdf, tmp_path: Path, monkeypatch):
+    pools = []
+
+    class CountingPool(text_extraction.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    cache = OCRPageCache(tmp_path / "ocr_cache.sqlite")
+    monkeypatch.setattr(text_extraction, "ProcessPoolExecutor", CountingPool)
+    monkeypatch.setattr(text_extraction, "get_default_ocr_cache", lambda: cache)
+    monkeypatch.setattr(text_extraction, "PAGES_LIMIT", 2)
+    make_pdf("US0000001B2", pages=1)
+    make_pdf("US0000002B2", pages=3)
+    make_pdf("US0000003B2", pages=3)
+    store = CorpusStore(tmp_path / "corpus.sqlite")
+
+    results = text_extraction.extract_texts(
+        tmp_path,
+        OCRConfig(max_workers=1, use_text_layer=True),
+        export_path=tmp_path / "raw",
+        store=store,
+    )
+
+    assert results.count_new == 3
+    assert len(pools) == 1
+    store.close()
+    cache.close()
+
+
+def test_resumed_windowed_extraction_counts_all_pages(
+    extractor: PDFTextExtractor, make_pdf, tmp_path: Path, monkeypatch
+):
+    pdf_path = make_pdf(pages=5)
+    output_path = tmp_path / "US0000001B2.txt"
+    write_progress = PDFTextExtractor._write_progress
+
+    def interrupt(progress_path: Path, progress: dict) -> None:
+        write_progress(progress_path, progress)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(PDFTextExtractor, "_write_progress", staticmethod(interrupt))
+    with pytest.raises(KeyboardInterrupt):
+        extractor.extract_windowed(pdf_path, output_path, window_size=2)
+    monkeypatch.setattr(PDFTextExtractor, "_write_progress", staticmethod(write_progress))
+
+    metadata = extractor.extract_windowed(pdf_path, output_path, window_size=2)
+
+    assert metadata["pages_processed"] == 5
+    assert metadata["text_layer_pages"] == 5
+    assert metadata["text_length"] == len(output_path.read_text(encoding="utf-8"))